@@ -0,0 +1,156 @@
+"""
+Handler latency with DB calls made on the event loop vs awaited on the DB thread pool.
+
+Usage:
+    python -m benchmarks.db_offload_benchmark [--users 200] [--per-user 3] [--query-ms 20] [--reply-ms 50] [--url sqlite:///...]
+
+`--users` users send `--per-user` updates each, all at once. Every update runs a
+handler that looks the user up (a query taking `--query-ms`, simulated with a
+sleep inside the database) then awaits a `--reply-ms` reply, like most handlers
+here. Updates are dispatched by PerUserUpdateProcessor with room for every user.
+
+"blocking" calls the service method directly, as handlers used to; "aio" awaits
+`service.aio.<method>`. Printed: total time, update latency percentiles and the
+worst event loop stall (how late a 10 ms ticker woke up).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+from telegram.ext import Application, MessageHandler, filters  # noqa: E402
+
+import database.database as db  # noqa: E402
+from benchmarks.update_processing_benchmark import _OfflineRequest, synthetic_updates  # noqa: E402
+from config import DB_EXECUTOR_WORKERS  # noqa: E402
+from core.update_processor import PerUserUpdateProcessor  # noqa: E402
+from database.models import Base, User  # noqa: E402
+from shared.base_service import BaseService  # noqa: E402
+
+
+class _LookupService(BaseService):
+    def __init__(self, sleep_sql: str, query_seconds: float) -> None:
+        super().__init__()
+        self.sleep_sql = sleep_sql
+        self.query_seconds = query_seconds
+
+    def get_user_by_telegram(self, telegram_id: str):  # type: ignore[override]
+        with self.db() as session:
+            session.execute(text(self.sleep_sql), {"seconds": self.query_seconds})
+            return session.query(User).filter_by(telegram_id=telegram_id).first()
+
+
+def _setup(url: str, users: int) -> str:
+    """Bind the session factory to `url`, seed the users and return the SQL of a timed sleep"""
+    engine = create_engine(url, pool_size=DB_EXECUTOR_WORKERS, max_overflow=0)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _add_sleep(dbapi_connection, _):
+            # Sleeps without the GIL, like a PostgreSQL query waiting on the network
+            dbapi_connection.create_function("sleep_s", 1, time.sleep)
+        sleep_sql = "SELECT sleep_s(:seconds)"
+    else:
+        sleep_sql = "SELECT pg_sleep(:seconds)"
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    db.SessionLocal.configure(bind=engine)
+    with db.get_db_session() as session:
+        session.add_all(
+            User(telegram_id=str(i), first_name="bench", referral_code=f"bench{i}")
+            for i in range(1, users + 1)
+        )
+        session.commit()
+    return sleep_sql
+
+
+async def _run(mode: str, service: _LookupService, args) -> dict:
+    app = (
+        Application.builder()
+        .token("1:bench")
+        .request(_OfflineRequest())
+        .concurrent_updates(PerUserUpdateProcessor(args.users))
+        .build()
+    )
+    updates = synthetic_updates(app.bot, args.users, args.per_user)
+    queued_at: dict[int, float] = {}
+    latencies = []
+    done = asyncio.Event()
+
+    async def handler(update, context):
+        telegram_id = str(update.effective_user.id)
+        if mode == "aio":
+            user = await service.aio.get_user_by_telegram(telegram_id)
+        else:
+            user = service.get_user_by_telegram(telegram_id)
+        assert user is not None
+        await asyncio.sleep(args.reply_ms / 1000)
+        latencies.append(time.perf_counter() - queued_at[update.update_id])
+        if len(latencies) == len(updates):
+            done.set()
+
+    max_stall = 0.0
+
+    async def ticker():
+        nonlocal max_stall
+        while not done.is_set():
+            expected = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            max_stall = max(max_stall, time.perf_counter() - expected)
+
+    app.add_handler(MessageHandler(filters.TEXT, handler))
+    async with app:
+        await app.start()
+        ticking = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        for update in updates:
+            queued_at[update.update_id] = time.perf_counter()
+            await app.update_queue.put(update)
+        await done.wait()
+        elapsed = time.perf_counter() - started
+        await ticking
+        await app.stop()
+
+    latencies.sort()
+    return {
+        "seconds": elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "max": latencies[-1],
+        "stall": max_stall,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--per-user", type=int, default=3)
+    parser.add_argument("--query-ms", type=float, default=20)
+    parser.add_argument("--reply-ms", type=float, default=50)
+    parser.add_argument("--url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        sleep_sql = _setup(url, args.users)
+        service = _LookupService(sleep_sql, args.query_ms / 1000)
+
+        print(
+            f"{args.users} concurrent users x {args.per_user} updates, {args.query_ms:.0f} ms query, "
+            f"{args.reply_ms:.0f} ms reply, {DB_EXECUTOR_WORKERS} DB threads"
+        )
+        print(f"{'mode':<10} {'seconds':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'loop stall ms':>14}")
+        for mode in ("blocking", "aio"):
+            result = asyncio.run(_run(mode, service, args))
+            print(
+                f"{mode:<10} {result['seconds']:>9.2f} {result['p50'] * 1000:>9.0f} {result['p95'] * 1000:>9.0f} "
+                f"{result['max'] * 1000:>9.0f} {result['stall'] * 1000:>14.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Round trips needed to deduplicate and record a scan window of deposits.
+
+Usage:
+    python -m benchmarks.deposit_dedup_benchmark [--transactions 10000] [--url sqlite://]
+
+Compares the per-transaction path (get_deposit_by_tx_hash + create_deposit_if_new)
+with the batched path (find_existing_tx_hashes + record_deposits_bulk), for a
+window of new transactions and for a re-scan where every hash already exists.
+Pass `--url` with a PostgreSQL URL to measure against a real server.
+"""
+import argparse
+import os
+import time
+from decimal import Decimal
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import database.database as db  # noqa: E402
+from database.models import Base, Deposit, User, UserWallet  # noqa: E402
+from services.deposit_service import DepositService  # noqa: E402
+
+
+class RoundTripCounter:
+    def __init__(self, engine) -> None:
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def _on_commit(self, *args, **kwargs):
+        self.count += 1
+
+
+def _setup(url: str):
+    kwargs = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}} if url.startswith("sqlite") else {}
+    engine = create_engine(url, **kwargs)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    db.SessionLocal.configure(bind=engine)
+    with db.get_db_session() as session:
+        user = User(telegram_id="bench", first_name="bench", referral_code="bench")
+        session.add(user)
+        session.flush()
+        wallet = UserWallet(user_id=user.id, address="TBench", private_key_encrypted="-")
+        session.add(wallet)
+        session.commit()
+        return engine, user.id, wallet.id
+
+
+def _window(prefix: str, n: int, user_id: int, wallet_id: int) -> list[dict]:
+    return [
+        {
+            "user_id": user_id,
+            "wallet_id": wallet_id,
+            "tx_hash": f"{prefix}{i:060d}",
+            "amount_trx": Decimal("1.5"),
+            "confirmations": 0,
+        }
+        for i in range(n)
+    ]
+
+
+def per_transaction(rows: list[dict]) -> None:
+    for row in rows:
+        if not DepositService.get_deposit_by_tx_hash(row["tx_hash"]):
+            DepositService.create_deposit_if_new(**row)
+
+
+def batched(rows: list[dict]) -> None:
+    existing = DepositService.find_existing_tx_hashes(row["tx_hash"] for row in rows)
+    DepositService.record_deposits_bulk([row for row in rows if row["tx_hash"] not in existing])
+
+
+def _measure(counter: RoundTripCounter, fn, rows) -> tuple[int, float]:
+    counter.count = 0
+    started = time.perf_counter()
+    fn(rows)
+    return counter.count, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transactions", type=int, default=10_000)
+    parser.add_argument("--url", default="sqlite://")
+    args = parser.parse_args()
+
+    engine, user_id, wallet_id = _setup(args.url)
+    counter = RoundTripCounter(engine)
+
+    print(f"{args.transactions} transactions per window ({engine.dialect.name})")
+    print(f"{'path':<16} {'window':<8} {'round trips':>12} {'seconds':>9}")
+    for name, fn, prefix in (("per-transaction", per_transaction, "a"), ("batched", batched, "b")):
+        rows = _window(prefix, args.transactions, user_id, wallet_id)
+        for label in ("new", "re-scan"):
+            trips, elapsed = _measure(counter, fn, rows)
+            print(f"{name:<16} {label:<8} {trips:>12} {elapsed:>9.2f}")
+
+    with db.get_db_session() as session:
+        assert session.query(Deposit).count() == 2 * args.transactions
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Deposit scanner throughput against a local fake TronGrid.
+
+Usage:
+    python -m benchmarks.deposit_scanner_benchmark [--wallets 2000] [--latency 0.05]
+
+Prints wallets/second for several concurrency levels. The provider quota is
+lifted for the run so only concurrency and latency matter.
+"""
+import argparse
+from types import SimpleNamespace
+
+from benchmarks.fake_trongrid import FakeTronGrid
+from blockchain.provider_pool import Endpoint, ProviderPool
+from utils.rate_limiter import TokenBucket
+from workers.deposit_scanner import DepositScanner
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--wallets", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated API latency (seconds)")
+    parser.add_argument("--levels", type=str, default="1,8,32,64")
+    args = parser.parse_args()
+
+    wallets = [
+        SimpleNamespace(id=i, user_id=i, address=f"T{i:033d}")
+        for i in range(args.wallets)
+    ]
+    levels = [int(x) for x in args.levels.split(",")]
+
+    with FakeTronGrid(latency=args.latency) as url:
+        print(f"{args.wallets} wallets, {args.latency * 1000:.0f} ms simulated latency")
+        print(f"{'concurrency':>12} {'seconds':>10} {'wallets/s':>10}")
+        for level in levels:
+            scanner = DepositScanner(
+                concurrency=level,
+                pool=ProviderPool([Endpoint(url, limiter=TokenBucket(rate=1_000_000, capacity=1_000_000))]),
+            )
+            stats = scanner.run(wallets, lambda wallet, txs, cursor: None)
+            print(f"{level:>12} {stats.elapsed:>10.2f} {stats.wallets_per_second:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+API calls per hour of deposit polling, flat cadence vs hot/cold tiers.
+
+Usage:
+    python -m benchmarks.deposit_tiering_benchmark [--wallets 10000] [--hot-share 0.02] [--hours 24]
+
+Replays the scheduler cycle by cycle with the real backoff policy
+(services.deposit_service.dormant_poll_delay): `hot-share` of the wallets
+stay hot the whole time, the others are dormant from the start. Dormant
+wallets are simulated on a sample of `--sample` wallets and scaled up.
+"""
+import argparse
+import os
+from datetime import timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from config import DEPOSIT_CHECK_INTERVAL, DEPOSIT_COLD_MAX_MINUTES  # noqa: E402
+from services.deposit_service import dormant_poll_delay  # noqa: E402
+
+
+def dormant_polls(hours: int) -> list[int]:
+    """Polls made by one dormant wallet during each hour"""
+    per_hour = [0] * hours
+    cycle = timedelta(minutes=DEPOSIT_CHECK_INTERVAL)
+    now, next_poll, idle = timedelta(0), timedelta(0), 0
+    while now < timedelta(hours=hours):
+        if now >= next_poll:
+            per_hour[int(now / timedelta(hours=1))] += 1
+            idle += 1
+            next_poll = now + dormant_poll_delay(idle)
+        now += cycle
+    return per_hour
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--wallets", type=int, default=10_000)
+    parser.add_argument("--hot-share", type=float, default=0.02)
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--sample", type=int, default=1000)
+    args = parser.parse_args()
+
+    hot = int(args.wallets * args.hot_share)
+    dormant = args.wallets - hot
+    cycles_per_hour = 60 // DEPOSIT_CHECK_INTERVAL
+    flat = args.wallets * cycles_per_hour
+    sample = max(1, min(dormant, args.sample))
+    per_hour = [0] * args.hours
+    for _ in range(sample):
+        for hour, polls in enumerate(dormant_polls(args.hours)):
+            per_hour[hour] += polls
+
+    print(
+        f"{args.wallets} wallets ({hot} hot), check every {DEPOSIT_CHECK_INTERVAL} min, "
+        f"dormant backoff capped at {DEPOSIT_COLD_MAX_MINUTES} min"
+    )
+    total_tiered = 0
+    print(f"{'hour':>5} {'flat calls':>11} {'tiered calls':>13} {'ratio':>7}")
+    for hour, polls in enumerate(per_hour):
+        tiered = hot * cycles_per_hour + round(dormant * polls / sample)
+        total_tiered += tiered
+        print(f"{hour:>5} {flat:>11} {tiered:>13} {flat / tiered:>6.1f}x")
+    print(f"{'total':>5} {flat * args.hours:>11} {total_tiered:>13} {flat * args.hours / total_tiered:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
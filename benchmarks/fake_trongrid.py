@@ -0,0 +1,92 @@
+"""
+Minimal local stand-in for the TronGrid HTTP API, used by the benchmarks.
+
+Every request sleeps `latency` seconds before answering, which mimics the
+network round trip to a remote provider. Broadcast transactions get a receipt
+`confirm_delay` seconds after they were first broadcast.
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, keep-alive clients
+    # hit the Nagle / delayed-ACK stall (~40 ms per response)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # silence default stderr logging
+        pass
+
+    def _reply(self, payload: dict, status: int = 200) -> None:
+        time.sleep(self.server.latency)
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.hits += 1
+        if "/transactions" in self.path:
+            self._reply({"data": [], "success": True, "meta": {"page_size": 0}})
+        else:
+            self._reply({}, status=404)
+
+    def do_POST(self):
+        self.server.hits += 1
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        method = self.path.rsplit("/", 1)[-1]
+        if method == "getaccount":
+            self._reply({"balance": 1_000_000})
+        elif method == "getnodeinfo":
+            self._reply({"solidityBlock": "Num:100,ID:" + "0" * 16 + "ab" * 24})
+        elif method == "getsignweight":
+            txid = hashlib.sha256(json.dumps(body.get("raw_data"), sort_keys=True).encode()).hexdigest()
+            self._reply({"transaction": {"transaction": {"txID": txid}}})
+        elif method == "broadcasttransaction":
+            self.server.broadcasts.setdefault(body["txID"], time.monotonic())
+            self._reply({"result": True, "txid": body["txID"]})
+        elif method == "gettransactioninfobyid":
+            sent_at = self.server.broadcasts.get(body.get("value"))
+            if sent_at is not None and time.monotonic() - sent_at >= self.server.confirm_delay:
+                self._reply({"id": body["value"], "blockNumber": 101, "receipt": {"net_usage": 267}})
+            else:
+                self._reply({})
+        else:
+            self._reply({})
+
+
+class FakeTronGrid:
+    """Run the fake API in a background thread: `with FakeTronGrid(latency=0.05) as url: ...`"""
+
+    def __init__(self, latency: float = 0.05, confirm_delay: float = 3.0) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.latency = latency
+        self.server.hits = 0
+        self.server.confirm_delay = confirm_delay
+        self.server.broadcasts = {}
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def hits(self) -> int:
+        return self.server.hits
+
+    def __enter__(self) -> str:
+        self._thread.start()
+        return self.url
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,109 @@
+"""
+Transaction history pages: load everything and slice vs keyset pagination.
+
+Usage:
+    python -m benchmarks.history_pagination_benchmark [--sizes 100,2000,20000] [--per-page 3] [--repeat 20] [--url sqlite:///...]
+
+For each history size one user gets that many transactions (a few sharing a
+timestamp). "slice" is the previous handler: `list_transactions` then a Python
+slice. "keyset" is `get_transactions_page` following the cursor. Printed: the
+average milliseconds to serve the first page and a page deep in the history
+(the middle one), including the page total.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine  # noqa: E402
+
+import database.database as db  # noqa: E402
+from database.models import Base, Transaction, TransactionStatus, TransactionType, User  # noqa: E402
+from shared.user_service import UserService  # noqa: E402
+
+
+def _seed(url: str, sizes: list[int]) -> dict[int, int]:
+    """Create one user per history size; return {size: user id}"""
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    db.SessionLocal.configure(bind=engine)
+    users = {}
+    start = datetime(2025, 1, 1)
+    with db.get_db_session() as session:
+        for size in sizes:
+            user = User(telegram_id=f"bench{size}", first_name="bench", referral_code=f"bench{size}")
+            session.add(user)
+            session.flush()
+            session.bulk_insert_mappings(Transaction, [
+                {
+                    "user_id": user.id,
+                    "type": TransactionType.deposit if i % 2 else TransactionType.withdrawal,
+                    "amount_trx": 1,
+                    "status": TransactionStatus.completed,
+                    "created_at": start + timedelta(seconds=i // 3),
+                    "updated_at": start,
+                }
+                for i in range(size)
+            ])
+            users[size] = user.id
+        session.commit()
+    return users
+
+
+def _timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100,2000,20000")
+    parser.add_argument("--per-page", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        users = _seed(args.url or f"sqlite:///{os.path.join(tmp, 'bench.db')}", sizes)
+        service = UserService()
+
+        print(f"{args.per_page} transactions per page, average of {args.repeat} runs")
+        print(f"{'history':>8} {'slice p1 ms':>12} {'slice deep ms':>14} {'keyset p1 ms':>13} {'keyset deep ms':>15}")
+        for size in sizes:
+            user_id = users[size]
+            deep = size // args.per_page // 2
+
+            def sliced(page: int) -> None:
+                rows = service.list_transactions(user_id)
+                rows[page * args.per_page:(page + 1) * args.per_page]
+                service.close_db()
+
+            # Cursor of the page before the deep one, as its "Next" button would carry
+            with db.get_db_session() as session:
+                row = (
+                    session.query(Transaction)
+                    .filter_by(user_id=user_id)
+                    .order_by(Transaction.created_at.desc(), Transaction.id.desc())
+                    .offset(deep * args.per_page - 1)
+                    .first()
+                )
+                cursor = (row.created_at, row.id)
+
+            results = [
+                _timed(lambda: sliced(0), args.repeat),
+                _timed(lambda: sliced(deep), args.repeat),
+                _timed(lambda: service.get_transactions_page(user_id, None, args.per_page), args.repeat),
+                _timed(lambda: service.get_transactions_page(user_id, None, args.per_page, after=cursor), args.repeat),
+            ]
+            print(f"{size:>8} {results[0]:>12.2f} {results[1]:>14.2f} {results[2]:>13.2f} {results[3]:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Referral code of a new user: random code probed against users vs derived from the Telegram id.
+
+Usage:
+    python -m benchmarks.referral_code_benchmark [--sizes 1000,100000,500000] [--registrations 500] [--url sqlite:///...]
+
+For each size the users table is filled with that many users, then `--registrations`
+users register. "probe" is what registration used to do: draw a random 8-character
+code and query users until it is unused, in its own session. "derived" is
+`referral_code_for`. Printed: average milliseconds to get the code and to register
+(code, then `UserService.create_user`).
+"""
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, func  # noqa: E402
+
+import database.database as db  # noqa: E402
+from database.models import Base, User  # noqa: E402
+from shared.referral_codes import referral_code_for  # noqa: E402
+from shared.user_service import UserService  # noqa: E402
+
+
+def _random_code() -> str:
+    return "".join(random.choices(string.ascii_lowercase + string.digits, k=8))
+
+
+def _probe() -> str:
+    with db.get_db_session() as session:
+        code = _random_code()
+        while session.query(User).filter_by(referral_code=code).first():
+            code = _random_code()
+        return code
+
+
+def _fill(url: str, size: int) -> None:
+    """Grow the users table to `size` rows (existing users have random codes)."""
+    with db.get_db_session() as session:
+        count = session.query(func.count(User.id)).scalar()
+        batch = 10000
+        for start in range(count, size, batch):
+            session.bulk_insert_mappings(User, [
+                {
+                    "telegram_id": f"seed{i}",
+                    "first_name": "bench",
+                    "referral_code": _random_code(),
+                    "account_balance": 0,
+                    "total_deposited": 0,
+                    "total_withdrawn": 0,
+                    "total_referral_earnings": 0,
+                    "is_active": True,
+                }
+                for i in range(start, min(size, start + batch))
+            ])
+            session.commit()
+
+
+def _register(service: UserService, telegram_id: str, code: str) -> None:
+    service.create_user(telegram_id, None, "bench", None, code, None)
+    service.close_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,100000,500000")
+    parser.add_argument("--registrations", type=int, default=500)
+    parser.add_argument("--url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_engine(url)
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        db.SessionLocal.configure(bind=engine)
+        service = UserService()
+        next_id = 10**9
+
+        print(f"average of {args.registrations} registrations")
+        print(f"{'users':>8} {'probe ms':>9} {'derived ms':>11} {'register probe ms':>18} {'register derived ms':>20}")
+        for size in sizes:
+            _fill(url, size)
+            results = []
+            for make_code in (lambda telegram_id: _probe(), referral_code_for):
+                code_seconds = register_seconds = 0.0
+                for _ in range(args.registrations):
+                    telegram_id = str(next_id)
+                    next_id += 1
+                    started = time.perf_counter()
+                    code = make_code(telegram_id)
+                    code_seconds += time.perf_counter() - started
+                    _register(service, telegram_id, code)
+                    register_seconds += time.perf_counter() - started
+                results.append((code_seconds, register_seconds))
+            probe, derived = (
+                (code / args.registrations * 1000, register / args.registrations * 1000)
+                for code, register in results
+            )
+            print(f"{size:>8} {probe[0]:>9.3f} {derived[0]:>11.3f} {probe[1]:>18.2f} {derived[1]:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
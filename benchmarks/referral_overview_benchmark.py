@@ -0,0 +1,125 @@
+"""
+Referral overview: load the rows vs one aggregate query vs the running totals row.
+
+Usage:
+    python -m benchmarks.referral_overview_benchmark [--sizes 100,10000,50000] [--repeat 10] [--url sqlite:///...]
+
+For each size a sponsor gets that many referrals and as many commissions (one in
+three paid). "rows" is what the overview used to do: load every referred user to
+count them, then every paid and every pending commission. "aggregate" is
+`aggregate_referral_stats` (one query on the indexes), "stats row" is
+`ReferralService.get_referral_stats` reading referral_stats. Printed: average
+milliseconds per overview.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine  # noqa: E402
+
+import database.database as db  # noqa: E402
+from database.models import (  # noqa: E402
+    Base, CommissionStatus, CommissionType, ReferralCommission, User,
+)
+from modules.referral.service import ReferralService  # noqa: E402
+from shared.referral_stats import aggregate_referral_stats, rebuild_referral_stats  # noqa: E402
+
+
+def _seed(url: str, sizes: list[int]) -> dict[int, int]:
+    """Create one sponsor per size with its referrals and commissions; return {size: sponsor id}"""
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    db.SessionLocal.configure(bind=engine)
+    sponsors = {}
+    with db.get_db_session() as session:
+        for size in sizes:
+            sponsor = User(telegram_id=f"sponsor{size}", first_name="bench", referral_code=f"sponsor{size}")
+            session.add(sponsor)
+            session.flush()
+            session.bulk_insert_mappings(User, [
+                {
+                    "telegram_id": f"{size}-{i}",
+                    "first_name": "bench",
+                    "referral_code": f"{size}-{i}",
+                    "sponsor_id": sponsor.id,
+                    "account_balance": 0,
+                    "total_deposited": 0,
+                    "total_withdrawn": 0,
+                    "total_referral_earnings": 0,
+                    "is_active": True,
+                }
+                for i in range(size)
+            ])
+            first_referral = sponsor.id + 1
+            session.bulk_insert_mappings(ReferralCommission, [
+                {
+                    "user_id": sponsor.id,
+                    "referred_user_id": first_referral + i,
+                    "transaction_id": f"{size}-{i}",
+                    "commission_type": CommissionType.deposit,
+                    "amount_trx": 1,
+                    "percentage": 0.01,
+                    "status": CommissionStatus.paid if i % 3 == 0 else CommissionStatus.pending,
+                }
+                for i in range(size)
+            ])
+            rebuild_referral_stats(session, sponsor.id)
+            sponsors[size] = sponsor.id
+        session.commit()
+    return sponsors
+
+
+def _rows(user_id: int) -> None:
+    with db.get_db_session() as session:
+        len(session.query(User).filter(User.sponsor_id == user_id).all())
+        for status in (CommissionStatus.paid, CommissionStatus.pending):
+            rows = (
+                session.query(ReferralCommission)
+                .filter(ReferralCommission.user_id == user_id, ReferralCommission.status == status)
+                .all()
+            )
+            sum(c.amount_trx for c in rows)
+
+
+def _aggregate(user_id: int) -> None:
+    with db.get_db_session() as session:
+        aggregate_referral_stats(session, user_id)
+
+
+def _timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100,10000,50000")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sponsors = _seed(args.url or f"sqlite:///{os.path.join(tmp, 'bench.db')}", sizes)
+        service = ReferralService()
+
+        print(f"average of {args.repeat} overviews")
+        print(f"{'referrals':>10} {'rows ms':>10} {'aggregate ms':>13} {'stats row ms':>13}")
+        for size in sizes:
+            user_id = sponsors[size]
+            results = [
+                _timed(lambda: _rows(user_id), args.repeat),
+                _timed(lambda: _aggregate(user_id), args.repeat),
+                _timed(lambda: service.get_referral_stats(user_id), args.repeat),
+            ]
+            print(f"{size:>10} {results[0]:>10.2f} {results[1]:>13.2f} {results[2]:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
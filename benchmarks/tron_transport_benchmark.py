@@ -0,0 +1,88 @@
+"""
+Per-call latency of the TRON HTTP transport against a local fake TronGrid.
+
+Usage:
+    python -m benchmarks.tron_transport_benchmark [--calls 300] [--latency 0.005] [--concurrency 16]
+
+Compares a bare `requests.get` per call (a new connection every time, as
+get_trx_transactions used to do) with the shared keep-alive pool, for
+transaction listing, and tronpy balance queries through the pooled provider.
+The fake server runs on localhost without TLS, so the handshake saved per call
+is much larger against the real TronGrid than what is shown here.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import requests
+from tronpy import Tron
+
+from benchmarks.fake_trongrid import FakeTronGrid
+from blockchain.transport import PooledHTTPProvider, TronTransport
+from blockchain.tron_client import generate_wallet
+
+TX_PATH = "/v1/accounts/TBench/transactions"
+
+
+def _timed(fn, calls: int) -> list[float]:
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def _timed_async(url: str, calls: int, concurrency: int) -> tuple[list[float], float]:
+    transport = TronTransport(url, max_connections=concurrency)
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+    async with transport.async_client() as client:
+
+        async def _call() -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                (await client.get(TX_PATH)).raise_for_status()
+                samples.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(_call() for _ in range(calls)))
+        return samples, time.perf_counter() - started
+
+
+def _row(name: str, samples: list[float], wall: float | None = None) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    wall = sum(samples) if wall is None else wall
+    print(
+        f"{name:<28} {statistics.mean(samples) * 1000:>9.2f} {statistics.median(samples) * 1000:>9.2f}"
+        f" {p95 * 1000:>9.2f} {len(samples) / wall:>10.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.005, help="simulated API latency (seconds)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    address, _ = generate_wallet()
+
+    with FakeTronGrid(latency=args.latency) as url:
+        transport = TronTransport(url)
+        tron = Tron(PooledHTTPProvider(transport))
+
+        print(f"{args.calls} calls, {args.latency * 1000:.1f} ms simulated latency")
+        print(f"{'path':<28} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'calls/s':>10}")
+        _row("requests.get (no session)", _timed(lambda: requests.get(url + TX_PATH, timeout=10).raise_for_status(), args.calls))
+        _row("pooled transport (sync)", _timed(lambda: transport.request("GET", TX_PATH).raise_for_status(), args.calls))
+        _row("tronpy balance (pooled)", _timed(lambda: tron.get_account_balance(address), args.calls))
+        samples, wall = asyncio.run(_timed_async(url, args.calls, args.concurrency))
+        _row(f"pooled async x{args.concurrency}", samples, wall)
+        transport.close()
+
+
+if __name__ == "__main__":
+    main()
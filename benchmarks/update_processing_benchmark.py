@@ -0,0 +1,151 @@
+"""
+Update processing: sequential vs concurrent dispatch, with per-user ordering checks.
+
+Usage:
+    python -m benchmarks.update_processing_benchmark [--users 200] [--per-user 5] [--latency 0.05] [--concurrency 32]
+
+A synthetic generator produces a burst of text updates from `--users` users, each
+user's numbered in order and interleaved at random. The handler awaits `--latency`
+seconds of simulated I/O (a DB call or a reply); one user in ten is "slow" and
+takes ten times longer, like a heavy history page. No network is used.
+
+For each dispatcher the run prints total time, p50/p95 latency (queued to handled)
+of the fast users' updates, and ordering violations: a user's update handled
+while another of theirs was still running, or out of sequence.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from telegram import Update
+from telegram.ext import Application, MessageHandler, filters
+from telegram.request import BaseRequest
+
+from core.update_processor import PerUserUpdateProcessor
+
+
+class _OfflineRequest(BaseRequest):
+    """Answers getMe so the application can start without a network"""
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        result = {"id": 1, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+def synthetic_updates(bot, users: int, per_user: int, seed: int = 0) -> list[Update]:
+    """`per_user` numbered messages from each user, shuffled across users but in order per user"""
+    rng = random.Random(seed)
+    remaining = {user_id: 0 for user_id in range(1, users + 1)}
+    updates = []
+    while remaining:
+        user_id = rng.choice(list(remaining))
+        seq = remaining[user_id]
+        remaining[user_id] += 1
+        if remaining[user_id] == per_user:
+            del remaining[user_id]
+        updates.append(Update.de_json({
+            "update_id": len(updates) + 1,
+            "message": {
+                "message_id": seq + 1,
+                "date": 0,
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+                "text": str(seq),
+            },
+        }, bot))
+    return updates
+
+
+async def _run(concurrent_updates, args) -> dict:
+    app = Application.builder().token("1:bench").request(_OfflineRequest()).concurrent_updates(concurrent_updates).build()
+    updates = synthetic_updates(app.bot, args.users, args.per_user)
+    queued_at: dict[int, float] = {}
+    latencies = []
+    running = set()
+    last_seq = defaultdict(lambda: -1)
+    violations = 0
+    done = asyncio.Event()
+    handled = 0
+
+    async def handler(update, context):
+        nonlocal violations, handled
+        user_id = update.effective_user.id
+        seq = int(update.message.text)
+        if user_id in running or seq != last_seq[user_id] + 1:
+            violations += 1
+        running.add(user_id)
+        last_seq[user_id] = seq
+        slow = user_id % 10 == 0
+        await asyncio.sleep(args.latency * (10 if slow else 1))
+        running.discard(user_id)
+        if not slow:
+            latencies.append(time.perf_counter() - queued_at[update.update_id])
+        handled += 1
+        if handled == len(updates):
+            done.set()
+
+    app.add_handler(MessageHandler(filters.TEXT, handler))
+    async with app:
+        await app.start()
+        started = time.perf_counter()
+        for update in updates:
+            queued_at[update.update_id] = time.perf_counter()
+            await app.update_queue.put(update)
+        await done.wait()
+        elapsed = time.perf_counter() - started
+        await app.stop()
+
+    latencies.sort()
+    return {
+        "seconds": elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "violations": violations,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--per-user", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated handler I/O (seconds)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--skip-sequential", action="store_true", help="the sequential run is the slow one")
+    args = parser.parse_args()
+
+    runs = [
+        ("PTB concurrent", args.concurrency),  # SimpleUpdateProcessor: no per-user ordering
+        ("per-user", PerUserUpdateProcessor(args.concurrency)),
+    ]
+    if not args.skip_sequential:
+        runs.insert(0, ("sequential", False))
+
+    print(
+        f"{args.users} users x {args.per_user} updates, {args.latency * 1000:.0f} ms handler I/O "
+        f"(1 user in 10 is 10x slower), concurrency {args.concurrency}"
+    )
+    print(f"{'dispatcher':<16} {'seconds':>9} {'p50 ms':>9} {'p95 ms':>9} {'ordering violations':>20}")
+    for name, concurrent_updates in runs:
+        result = asyncio.run(_run(concurrent_updates, args))
+        print(
+            f"{name:<16} {result['seconds']:>9.2f} {result['p50'] * 1000:>9.0f} "
+            f"{result['p95'] * 1000:>9.0f} {result['violations']:>20}"
+        )
+
+
+if __name__ == "__main__":
+    main()
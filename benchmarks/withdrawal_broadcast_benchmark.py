@@ -0,0 +1,80 @@
+"""
+Withdrawal throughput: serial send-and-wait vs the broadcaster with the confirmation tracker.
+
+Usage:
+    python -m benchmarks.withdrawal_broadcast_benchmark [--withdrawals 20] [--latency 0.05] [--confirm-delay 3]
+
+Runs against the local fake TronGrid, where a broadcast transaction gets its
+receipt `confirm-delay` seconds later (one TRON block is ~3 s). The serial path
+waits for each receipt before sending the next transfer, as process_withdrawals
+used to; the broadcaster signs everything, broadcasts concurrently and hands the
+txids to a confirmation tracker. "worker busy" is how long the calling thread is
+held, "all confirmed" is when the last receipt has been received.
+"""
+import argparse
+import time
+from decimal import Decimal
+
+import blockchain.tron_client as tron_client
+from benchmarks.fake_trongrid import FakeTronGrid
+from blockchain.confirmation_tracker import ConfirmationTracker
+from blockchain.provider_pool import Endpoint, ProviderPool
+from utils.rate_limiter import TokenBucket
+from workers.withdrawal_broadcaster import WithdrawalBroadcaster
+
+
+def serial(private_key: str, transfers: dict, poll_interval: float) -> float:
+    for to_address, amount in transfers.values():
+        txid = tron_client.send_trx(private_key, to_address, amount)
+        while tron_client.get_transaction_receipt(txid) is None:
+            time.sleep(poll_interval)
+    return time.perf_counter()
+
+
+def broadcaster_run(private_key: str, transfers: dict, concurrency: int, poll_interval: float) -> float:
+    broadcaster = WithdrawalBroadcaster(private_key, concurrency=concurrency)
+    tracker = ConfirmationTracker(poll_interval=poll_interval, concurrency=concurrency)
+    receipts = {}
+    signed = {key: txn.to_json() for key, txn in broadcaster.sign(transfers).items()}
+    broadcaster.broadcast(signed)
+    for txn in signed.values():
+        tracker.track(txn["txID"], receipts.__setitem__)
+    worker_done = time.perf_counter()
+    tracker.drain(timeout=60)
+    tracker.stop()
+    assert len(receipts) == len(transfers)
+    return worker_done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--withdrawals", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated API latency (seconds)")
+    parser.add_argument("--confirm-delay", type=float, default=3.0, help="seconds until a receipt is available")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    _, private_key = tron_client.generate_wallet()
+    destination, _ = tron_client.generate_wallet()
+    transfers = {i: (destination, Decimal("1.5") + i) for i in range(args.withdrawals)}
+
+    with FakeTronGrid(latency=args.latency, confirm_delay=args.confirm_delay) as url:
+        tron_client.pool = ProviderPool([Endpoint(url, limiter=TokenBucket(rate=1_000_000, capacity=1_000_000))])
+        print(f"{args.withdrawals} withdrawals, {args.latency * 1000:.0f} ms latency, {args.confirm_delay:.1f} s to confirm")
+        print(f"{'path':<24} {'worker busy':>12} {'all confirmed':>14} {'withdrawals/min':>16}")
+        poll_interval = args.confirm_delay / 3
+        for name, run in (
+            ("serial send-and-wait", lambda: serial(private_key, transfers, poll_interval)),
+            (f"broadcaster x{args.concurrency}", lambda: broadcaster_run(private_key, transfers, args.concurrency, poll_interval)),
+        ):
+            started = time.perf_counter()
+            worker_done = run()
+            elapsed = time.perf_counter() - started
+            print(
+                f"{name:<24} {worker_done - started:>11.2f}s {elapsed:>13.2f}s "
+                f"{args.withdrawals / elapsed * 60:>16.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Round trips needed to settle confirmed withdrawals.
+
+Usage:
+    python -m benchmarks.withdrawal_settlement_benchmark [--withdrawals 1000] [--users 100] [--url sqlite://]
+
+Compares settling each withdrawal on its own (get_user_by_id + complete_withdrawal,
+as the processor did per receipt) with settling the whole batch through
+WithdrawalService.settle_withdrawals (one session, one commit). One withdrawal in
+ten fails, so refunds are exercised too. Pass `--url` with a PostgreSQL URL to
+measure against a real server.
+"""
+import argparse
+import os
+import time
+from decimal import Decimal
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import database.database as db  # noqa: E402
+from benchmarks.deposit_dedup_benchmark import RoundTripCounter  # noqa: E402
+from database.models import (  # noqa: E402
+    Base, Transaction, TransactionStatus, TransactionType, User, Withdrawal, WithdrawalStatus,
+)
+from modules.withdrawal.service import Settlement, WithdrawalService  # noqa: E402
+
+
+def _setup(url: str):
+    if url.startswith("sqlite"):
+        kwargs = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+    else:
+        kwargs = db._engine_options  # same executemany batching as the application engine
+    engine = create_engine(url, **kwargs)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    db.SessionLocal.configure(bind=engine)
+    return engine
+
+
+def _seed(n: int, users: int) -> dict[int, Settlement]:
+    """n in-flight withdrawals (with their ledger entries) spread over `users` users"""
+    with db.get_db_session() as session:
+        session.query(Transaction).delete()
+        session.query(Withdrawal).delete()
+        session.query(User).delete()
+        accounts = [
+            User(telegram_id=f"bench{i}", first_name="bench", referral_code=f"bench{i}", account_balance=Decimal(0))
+            for i in range(users)
+        ]
+        session.add_all(accounts)
+        session.flush()
+        withdrawals = [
+            Withdrawal(
+                user_id=accounts[i % users].id, amount_trx=Decimal("10"), fee_trx=Decimal("0.1"),
+                to_address="TBench", status=WithdrawalStatus.processing, tx_hash=f"{i:064x}",
+            )
+            for i in range(n)
+        ]
+        session.add_all(withdrawals)
+        session.flush()
+        session.add_all(
+            Transaction(
+                user_id=wd.user_id, type=TransactionType.withdrawal, amount_trx=wd.amount_trx,
+                status=TransactionStatus.pending, reference_id=str(wd.id),
+            )
+            for wd in withdrawals
+        )
+        session.commit()
+        return {
+            wd.id: Settlement(wd.tx_hash, failure="OUT_OF_ENERGY" if i % 10 == 9 else None)
+            for i, wd in enumerate(withdrawals)
+        }
+
+
+def one_by_one(service: WithdrawalService, outcomes: dict[int, Settlement]) -> None:
+    with db.get_db_session() as session:
+        user_ids = dict(session.query(Withdrawal.id, Withdrawal.user_id))
+    for wd_id, outcome in outcomes.items():
+        user = service.get_user_by_id(user_ids[wd_id])
+        if outcome.failure is None:
+            service.complete_withdrawal(user.id, wd_id, Decimal("10"), outcome.tx_hash)
+        else:
+            service.fail_withdrawal(wd_id, user.id, outcome.failure, outcome.tx_hash)
+
+
+def batched(service: WithdrawalService, outcomes: dict[int, Settlement]) -> None:
+    service.settle_withdrawals(outcomes)
+
+
+def _check(outcomes: dict[int, Settlement]) -> None:
+    failed = sum(1 for outcome in outcomes.values() if outcome.failure)
+    with db.get_db_session() as session:
+        assert session.query(Withdrawal).filter_by(status=WithdrawalStatus.failed).count() == failed
+        assert session.query(Transaction).filter_by(status=TransactionStatus.completed).count() == len(outcomes) - failed
+        refunded = sum(user.account_balance for user in session.query(User))
+        assert refunded == failed * Decimal("10.1"), refunded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--withdrawals", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--url", default="sqlite://")
+    args = parser.parse_args()
+
+    engine = _setup(args.url)
+    counter = RoundTripCounter(engine)
+    service = WithdrawalService()
+
+    print(f"{args.withdrawals} withdrawals over {args.users} users ({engine.dialect.name})")
+    print(f"{'path':<12} {'round trips':>12} {'per withdrawal':>15} {'seconds':>9}")
+    for name, fn in (("one by one", one_by_one), ("batched", batched)):
+        outcomes = _seed(args.withdrawals, args.users)
+        counter.count = 0
+        started = time.perf_counter()
+        fn(service, outcomes)
+        elapsed = time.perf_counter() - started
+        _check(outcomes)
+        print(f"{name:<12} {counter.count:>12} {counter.count / args.withdrawals:>15.2f} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Background tracking of broadcast transactions until they land in a block
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from blockchain.tron_client import get_transaction_receipt
+from config import CONFIRMATION_POLL_INTERVAL, CONFIRMATION_BATCH_SIZE, CONFIRMATION_CONCURRENCY
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# Called once per txid with its receipt, or None if it expired without reaching the chain
+ReceiptCallback = Callable[[str, Optional[dict]], None]
+
+DEFAULT_EXPIRATION = timedelta(seconds=60)  # tronpy's default transaction lifetime
+# Grace period after expiration before a transaction not found on chain is considered dead
+EXPIRATION_MARGIN = timedelta(minutes=2)
+
+
+@dataclass
+class _Tracked:
+    txid: str
+    callback: ReceiptCallback
+    give_up_at: float  # epoch seconds
+    after_round: Optional[Callable[[], None]] = None
+
+
+class ConfirmationTracker:
+    """Resolve broadcast transactions in a background thread instead of blocking the sender.
+
+    - `track(txid, callback)` returns immediately; the callback later receives the receipt
+      (success or failure, see `is_successful_receipt`) or None once the transaction has
+      expired without reaching the chain.
+    - Every `poll_interval` the oldest `batch_size` in-flight txids are looked up, `concurrency`
+      at a time, so one round costs a bounded number of API calls however many are in flight.
+    - Callbacks run one at a time on the tracker thread: they must not block for long and
+      should use their own DB session. To settle in bulk, a callback can queue its result and
+      pass an `after_round` function, called once per round after all callbacks have run.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = CONFIRMATION_POLL_INTERVAL,
+        batch_size: int = CONFIRMATION_BATCH_SIZE,
+        concurrency: int = CONFIRMATION_CONCURRENCY,
+        get_receipt: Callable[[str], Optional[dict]] = get_transaction_receipt,
+    ) -> None:
+        self.poll_interval = poll_interval
+        self.batch_size = max(1, int(batch_size))
+        self.concurrency = max(1, int(concurrency))
+        self.get_receipt = get_receipt
+        self._inflight: OrderedDict[str, _Tracked] = OrderedDict()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    def track(
+        self,
+        txid: str,
+        callback: ReceiptCallback,
+        expires_at: datetime | None = None,
+        after_round: Callable[[], None] | None = None,
+    ) -> bool:
+        """Follow `txid` until it is confirmed or dead; False if it is already tracked"""
+        if expires_at is None:
+            expiration = time.time() + DEFAULT_EXPIRATION.total_seconds()
+        elif expires_at.tzinfo is None:  # naive datetimes from the database are UTC
+            expiration = expires_at.replace(tzinfo=timezone.utc).timestamp()
+        else:
+            expiration = expires_at.timestamp()
+        give_up_at = expiration + EXPIRATION_MARGIN.total_seconds()
+        with self._lock:
+            if txid in self._inflight:
+                return False
+            self._inflight[txid] = _Tracked(txid, callback, give_up_at, after_round)
+        self.start()
+        return True
+
+    def is_tracking(self, txid: str) -> bool:
+        with self._lock:
+            return txid in self._inflight
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._inflight)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="tron-receipts")
+            self._thread = threading.Thread(target=self._run, name="confirmation-tracker", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def drain(self, timeout: float) -> bool:
+        """Wait until nothing is in flight (for short-lived processes); False on timeout"""
+        deadline = time.monotonic() + timeout
+        while self.pending:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(min(self.poll_interval, 0.1))
+        return True
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"[TRON] Confirmation tracker error: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _lookup(self, txid: str) -> Optional[dict] | Exception:
+        try:
+            return self.get_receipt(txid)
+        except Exception as exc:
+            return exc
+
+    def poll_once(self) -> int:
+        """Look up one batch of receipts and run the callbacks of resolved txids; return how many"""
+        with self._lock:
+            batch = list(self._inflight.values())[:self.batch_size]
+        if not batch:
+            return 0
+
+        executor = self._executor or ThreadPoolExecutor(max_workers=self.concurrency)
+        results = list(executor.map(self._lookup, [item.txid for item in batch]))
+        if executor is not self._executor:
+            executor.shutdown()
+
+        now = time.time()
+        resolved = []
+        flushes = []
+        with self._lock:
+            for item in batch:
+                # Polled txids go to the back so a large backlog is walked round-robin
+                self._inflight.move_to_end(item.txid)
+        for item, receipt in zip(batch, results):
+            if isinstance(receipt, Exception):
+                # Unknown, not absent: never give up on a transaction we could not look up
+                logger.warning(f"[TRON] Receipt lookup failed for {item.txid}: {receipt}")
+                continue
+            if receipt is None and now < item.give_up_at:
+                continue
+            resolved.append(item.txid)
+            if item.after_round is not None and item.after_round not in flushes:
+                flushes.append(item.after_round)
+            try:
+                item.callback(item.txid, receipt)
+            except Exception as e:
+                logger.error(f"[TRON] Confirmation callback failed for {item.txid}: {e}")
+        for flush in flushes:
+            try:
+                flush()
+            except Exception as e:
+                logger.error(f"[TRON] Confirmation round hook failed: {e}")
+        # Removed last, so `drain()` only returns once callbacks and round hooks are done
+        with self._lock:
+            for txid in resolved:
+                self._inflight.pop(txid, None)
+        return len(resolved)
+
+
+# Process-wide tracker, started on the first `track()` call
+tracker = ConfirmationTracker()
@@ -0,0 +1,288 @@
+"""
+Pool of TRON API endpoints with health scoring and failover
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+import httpx
+from tronpy import Tron
+
+from blockchain.transport import DEFAULT_API_URL, PooledHTTPProvider, TronTransport
+from config import (
+    TRON_API_URL, TRON_API_KEY, TRON_API_URLS, TRON_API_KEYS,
+    TRON_API_RATE_LIMIT, TRON_API_RATE_BURST, TRON_API_RATE_MIN, TRON_API_RATE_MAX,
+    TRON_ENDPOINT_EJECT_AFTER, TRON_ENDPOINT_COOLDOWN,
+)
+from utils.logger import get_logger
+from utils.rate_limiter import AdaptiveTokenBucket, TokenBucket
+
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+EWMA_ALPHA = 0.2
+INITIAL_LATENCY = 0.5  # seconds, assumed until an endpoint has answered
+ERROR_PENALTY = 10  # a 10% error rate doubles an endpoint's score
+MAX_COOLDOWN = 600.0
+
+
+class NoEndpointAvailable(Exception):
+    """Every endpoint failed for this call"""
+
+
+class Endpoint:
+    """One TRON API endpoint (URL + API key) with its own connection pool, quota and health stats"""
+
+    def __init__(self, url: str, api_key: str | None = None, limiter: TokenBucket | None = None) -> None:
+        self.url = url.rstrip("/")
+        self.api_key = api_key
+        self.transport = TronTransport(self.url, api_key=api_key)
+        self.tron = Tron(PooledHTTPProvider(self.transport))
+        self.limiter = limiter or AdaptiveTokenBucket(
+            TRON_API_RATE_LIMIT, TRON_API_RATE_BURST, min_rate=TRON_API_RATE_MIN, max_rate=TRON_API_RATE_MAX,
+        )
+
+        self.latency: float | None = None  # EWMA, seconds
+        self.error_rate = 0.0  # EWMA of failed calls
+        self.requests = 0
+        self.failures = 0
+        self.throttled = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.probing = False
+
+    @property
+    def name(self) -> str:
+        host = httpx.URL(self.url).host
+        return f"{host}/…{self.api_key[-4:]}" if self.api_key else host
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_until > 0
+
+    @property
+    def score(self) -> float:
+        """Lower is better: expected latency inflated by the recent error rate"""
+        return (self.latency or INITIAL_LATENCY) * (1 + ERROR_PENALTY * self.error_rate)
+
+    def stats(self) -> dict:
+        return {
+            "endpoint": self.name,
+            "latency_ms": round((self.latency or 0) * 1000, 1),
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "throttled": self.throttled,
+            "ejected": self.ejected,
+            **self.limiter.stats(),
+        }
+
+
+def _is_endpoint_failure(exc: Exception) -> bool:
+    """Network errors, 429 and 5xx are the endpoint's fault; anything else is an answer"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+def _is_throttle(exc: Exception) -> bool:
+    """429 and 5xx mean the provider wants less traffic"""
+    return isinstance(exc, httpx.HTTPStatusError) and (
+        exc.response.status_code == 429 or exc.response.status_code >= 500
+    )
+
+
+def _retry_after(exc: Exception) -> float | None:
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return None
+    try:
+        return float(exc.response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+def check_response(response: httpx.Response) -> httpx.Response:
+    """Raise for responses that should fail over to another endpoint (429, 5xx)"""
+    if response.status_code == 429 or response.status_code >= 500:
+        response.raise_for_status()
+    return response
+
+
+class ProviderPool:
+    """Route each TRON API call to the healthiest endpoint.
+
+    - Latency and error rate are tracked per endpoint as moving averages.
+    - A call that fails with a network error, 429 or 5xx is retried on the next best endpoint.
+    - After `eject_after` failures in a row (or any 429) an endpoint is ejected for a cooldown
+      that doubles each time; once it expires, a single call probes it back in.
+    - Other errors (API errors, unknown addresses...) are returned to the caller untouched.
+    - Each endpoint's quota bucket is told about successes and 429/5xx so its rate adapts.
+    """
+
+    def __init__(
+        self,
+        endpoints: list[Endpoint],
+        eject_after: int = TRON_ENDPOINT_EJECT_AFTER,
+        cooldown: float = TRON_ENDPOINT_COOLDOWN,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("ProviderPool needs at least one endpoint")
+        self.endpoints = endpoints
+        self.eject_after = max(1, eject_after)
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "ProviderPool":
+        urls = TRON_API_URLS or [TRON_API_URL or DEFAULT_API_URL]
+        keys = TRON_API_KEYS or [TRON_API_KEY]
+        if len(keys) == len(urls):
+            pairs = list(zip(urls, keys))
+        elif len(urls) == 1:
+            pairs = [(urls[0], key) for key in keys]
+        elif len(keys) == 1:
+            pairs = [(url, keys[0]) for url in urls]
+        else:
+            raise ValueError("TRON_API_KEYS must hold one key, or one key per URL in TRON_API_URLS")
+        return cls([Endpoint(url, key) for url, key in pairs])
+
+    def _pick(self, tried: set[Endpoint]) -> Endpoint | None:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [ep for ep in self.endpoints if ep not in tried]
+            if not candidates:
+                return None
+            for ep in candidates:
+                if ep.ejected and ep.ejected_until <= now and not ep.probing:
+                    ep.probing = True
+                    return ep
+            healthy = [ep for ep in candidates if not ep.ejected]
+            if healthy:
+                return min(healthy, key=lambda ep: ep.score)
+            # Everything is ejected: use the endpoint closest to the end of its cooldown
+            return min(candidates, key=lambda ep: ep.ejected_until)
+
+    def _record_success(self, ep: Endpoint, elapsed: float) -> None:
+        with self._lock:
+            ep.requests += 1
+            ep.latency = elapsed if ep.latency is None else (1 - EWMA_ALPHA) * ep.latency + EWMA_ALPHA * elapsed
+            ep.error_rate *= 1 - EWMA_ALPHA
+            ep.consecutive_failures = 0
+            ep.probing = False
+            ep.limiter.on_success()
+            if ep.ejected:
+                ep.ejected_until = 0.0
+                ep.ejections = 0
+                logger.info(f"[TRON] Endpoint {ep.name} is back in the pool")
+
+    def _record_failure(self, ep: Endpoint, exc: Exception) -> None:
+        retry_after = _retry_after(exc)
+        throttled = isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 429
+        if _is_throttle(exc):
+            rate = ep.limiter.rate
+            ep.limiter.on_throttle(retry_after)
+            if ep.limiter.rate < rate:
+                logger.warning(f"[TRON] Endpoint {ep.name} throttled, rate lowered to {ep.limiter.rate:.2f} req/s")
+        with self._lock:
+            ep.requests += 1
+            ep.failures += 1
+            ep.throttled += throttled
+            ep.error_rate = (1 - EWMA_ALPHA) * ep.error_rate + EWMA_ALPHA
+            ep.consecutive_failures += 1
+            if throttled or ep.probing or ep.consecutive_failures >= self.eject_after:
+                cooldown = min(self.cooldown * 2 ** ep.ejections, MAX_COOLDOWN)
+                if retry_after:
+                    cooldown = max(cooldown, retry_after)
+                ep.ejected_until = time.monotonic() + cooldown
+                ep.ejections += 1
+                ep.probing = False
+                logger.warning(f"[TRON] Endpoint {ep.name} ejected for {cooldown:.1f}s: {exc}")
+
+    def call(self, fn: Callable[[Endpoint], T]) -> T:
+        """Run `fn(endpoint)`, failing over to the next best endpoint on endpoint errors"""
+        tried: set[Endpoint] = set()
+        last_error: Exception | None = None
+        while (ep := self._pick(tried)) is not None:
+            tried.add(ep)
+            ep.limiter.acquire()
+            started = time.monotonic()
+            try:
+                result = fn(ep)
+            except Exception as exc:
+                if not _is_endpoint_failure(exc):
+                    self._record_success(ep, time.monotonic() - started)
+                    raise
+                self._record_failure(ep, exc)
+                last_error = exc
+                continue
+            self._record_success(ep, time.monotonic() - started)
+            return result
+        raise NoEndpointAvailable(f"All TRON endpoints failed: {last_error}") from last_error
+
+    def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """HTTP request on the healthiest endpoint; 4xx responses other than 429 are returned as is"""
+        return self.call(lambda ep: check_response(ep.transport.request(method, path, **kwargs)))
+
+    async def call_async(self, fn: Callable[[Endpoint], Awaitable[T]]) -> T:
+        """Async variant of `call`"""
+        tried: set[Endpoint] = set()
+        last_error: Exception | None = None
+        while (ep := self._pick(tried)) is not None:
+            tried.add(ep)
+            await ep.limiter.acquire_async()
+            started = time.monotonic()
+            try:
+                result = await fn(ep)
+            except Exception as exc:
+                if not _is_endpoint_failure(exc):
+                    self._record_success(ep, time.monotonic() - started)
+                    raise
+                self._record_failure(ep, exc)
+                last_error = exc
+                continue
+            self._record_success(ep, time.monotonic() - started)
+            return result
+        raise NoEndpointAvailable(f"All TRON endpoints failed: {last_error}") from last_error
+
+    @asynccontextmanager
+    async def async_session(self, max_connections: int | None = None) -> AsyncIterator["AsyncPoolSession"]:
+        """Open async clients on every endpoint for the current event loop"""
+        clients = {ep: ep.transport.async_client(max_connections=max_connections) for ep in self.endpoints}
+        try:
+            yield AsyncPoolSession(self, clients)
+        finally:
+            for client in clients.values():
+                await client.aclose()
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            return [ep.stats() for ep in self.endpoints]
+
+    def describe_rates(self) -> str:
+        """One-line summary of the current request rate of each endpoint, for logs"""
+        return ", ".join(
+            f"{s['endpoint']} {s['rate']}/{s.get('max_rate', s['rate'])} req/s" for s in self.stats()
+        )
+
+
+class AsyncPoolSession:
+    """Pool-routed async requests, see `ProviderPool.async_session()`"""
+
+    def __init__(self, pool: ProviderPool, clients: dict[Endpoint, httpx.AsyncClient]) -> None:
+        self.pool = pool
+        self.clients = clients
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        async def _send(ep: Endpoint) -> httpx.Response:
+            return check_response(await self.clients[ep].request(method, path, **kwargs))
+
+        return await self.pool.call_async(_send)
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
@@ -0,0 +1,109 @@
+"""
+Pooled HTTP transport for the TRON API
+"""
+import threading
+
+import httpx
+from tronpy.providers import HTTPProvider
+
+from config import (
+    TRON_API_KEY, TRON_HTTP_TIMEOUT, TRON_HTTP_CONNECT_TIMEOUT, TRON_HTTP_MAX_CONNECTIONS, TRON_HTTP2,
+)
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+DEFAULT_API_URL = "https://api.trongrid.io"
+
+
+class TronTransport:
+    """Shared HTTP transport for every call to the TRON API.
+
+    - One keep-alive connection pool per endpoint, so calls skip the TCP/TLS handshake.
+    - Connect and read timeouts on every request; a hung socket can no longer block a worker.
+    - HTTP/2 when `h2` is installed and TRON_HTTP2 is on.
+    - `request()` is the sync entry point (thread-safe); `async_client()` returns an
+      `httpx.AsyncClient` with the same settings for asyncio code.
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        timeout: float = TRON_HTTP_TIMEOUT,
+        connect_timeout: float = TRON_HTTP_CONNECT_TIMEOUT,
+        max_connections: int = TRON_HTTP_MAX_CONNECTIONS,
+        http2: bool = TRON_HTTP2,
+        api_key: str | None = TRON_API_KEY,
+    ) -> None:
+        self.base_url = (base_url or DEFAULT_API_URL).rstrip("/")
+        self.api_key = api_key
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_connections = max_connections
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._client: httpx.Client | None = None
+        self._lock = threading.Lock()
+
+    def _limits(self, max_connections: int | None = None) -> httpx.Limits:
+        size = max_connections or self.max_connections
+        return httpx.Limits(max_connections=size, max_keepalive_connections=size)
+
+    def _headers(self) -> dict:
+        headers = {"accept": "application/json"}
+        if self.api_key:
+            headers["TRON-PRO-API-KEY"] = self.api_key
+        return headers
+
+    @property
+    def client(self) -> httpx.Client:
+        """Process-wide sync client, created on first use"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        base_url=self.base_url,
+                        headers=self._headers(),
+                        timeout=self.timeout,
+                        limits=self._limits(),
+                        http2=self.http2,
+                    )
+        return self._client
+
+    def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        return self.client.request(method, path, **kwargs)
+
+    def async_client(self, base_url: str | None = None, max_connections: int | None = None) -> httpx.AsyncClient:
+        """New pooled async client, to be used as `async with transport.async_client() as client`.
+
+        Async clients are bound to the event loop they run on, so each loop opens its own.
+        """
+        return httpx.AsyncClient(
+            base_url=(base_url or self.base_url).rstrip("/"),
+            headers=self._headers(),
+            timeout=self.timeout,
+            limits=self._limits(max_connections),
+            http2=self.http2,
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """tronpy provider sending its node API calls (balance, blocks, broadcast) through a TronTransport"""
+
+    def __init__(self, transport: TronTransport) -> None:
+        super().__init__(transport.base_url, timeout=transport.timeout.read, api_key=transport.api_key or None)
+        self.transport = transport
+
+    def make_request(self, method: str, params: dict | None = None) -> dict:
+        headers = {"Tron-Pro-Api-Key": self.random_api_key} if self.use_api_key else None
+        resp = self.transport.request("POST", "/" + method.lstrip("/"), json=params or {}, headers=headers)
+        resp.raise_for_status()
+        return resp.json()
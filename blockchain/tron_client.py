@@ -1,14 +1,18 @@
 """ Blockchain client for TRON """
+from dataclasses import dataclass, field
 from decimal import Decimal
-from tronpy import Tron
+from tronpy.exceptions import TransactionNotFound
 from tronpy.keys import PrivateKey
-from tronpy.providers import HTTPProvider
-from config import TRON_API_URL, TRON_PRIVATE_KEY
-import requests
+from tronpy.tron import Transaction
+from config import TRON_PRIVATE_KEY, TRON_TX_MAX_PAGES
+from blockchain.provider_pool import AsyncPoolSession, ProviderPool
 from utils.logger import logger
 
 
-tron = Tron(HTTPProvider(TRON_API_URL))
+# Every call below is routed through the pool: healthiest endpoint first, failover on errors
+pool = ProviderPool.from_config()
+
+TRANSACTIONS_PAGE_SIZE = 50
 
 
 def get_main_wallet() -> tuple[str, PrivateKey] | None:
@@ -29,55 +33,209 @@ def generate_wallet() -> tuple[str, str]:
     return address, priv.hex()
 
 
-def get_trx_transactions(address: str) -> list[dict]:
-    """Get the list of transactions for a given address"""
+def _transactions_request(address: str, min_timestamp: int | None = None, fingerprint: str | None = None) -> tuple[str, dict]:
+    """Path and query for an incoming transactions page.
+
+    Without `min_timestamp` the latest page is returned (newest first). With it, confirmed
+    transactions since that timestamp are returned oldest first so a cursor can follow them.
+    """
+    params = {"limit": TRANSACTIONS_PAGE_SIZE, "only_to": "true"}
+    if min_timestamp is None:
+        params["order_by"] = "block_timestamp,desc"
+    else:
+        params.update(order_by="block_timestamp,asc", min_timestamp=min_timestamp, only_confirmed="true")
+    if fingerprint:
+        params["fingerprint"] = fingerprint
+    return f"/v1/accounts/{address}/transactions", params
+
+
+def _next_fingerprint(payload: dict) -> str | None:
+    """Fingerprint of the next page, if TronGrid reports one"""
+    meta = payload.get('meta') or {}
+    if len(payload.get('data', [])) < TRANSACTIONS_PAGE_SIZE:
+        return None
+    return meta.get('fingerprint')
+
+
+def _parse_trx_transactions(data: dict) -> list[dict]:
+    """Keep only TRX transfers from a TronGrid transactions payload"""
+    transactions = []
+    for tx in data.get('data', []):
+        # Vérifier que c'est un transfert de TRX
+        if tx.get('raw_data', {}).get('contract', [{}])[0].get('type') == 'TransferContract':
+            contract = tx['raw_data']['contract'][0]['parameter']['value']
+            transactions.append({
+                'txID': tx['txID'],
+                'from': contract.get('owner_address'),
+                'to': contract.get('to_address'),
+                'amount': contract.get('amount'),
+                'timestamp': tx.get('block_timestamp'),
+                'confirmations': tx.get('ret', [{}])[0].get('contractRet') == 'SUCCESS' and 20 or 0  # Hypothèse
+            })
+    return transactions
+
+
+@dataclass
+class TransactionsWindow:
+    """Incoming transactions of a wallet fetched since a timestamp.
+
+    `transfers` keeps the TRX transfers only. `last_timestamp` is the newest block timestamp
+    among every fetched transaction, of any type (TRC10/TRC20 transfers, other contracts), and
+    `boundary_tx_ids` the txIDs fetched at that timestamp: a scan cursor moves past those too.
+    """
+    transfers: list[dict] = field(default_factory=list)
+    last_timestamp: int | None = None
+    boundary_tx_ids: set[str] = field(default_factory=set)
+
+    def add_page(self, payload: dict) -> None:
+        self.transfers.extend(_parse_trx_transactions(payload))
+        for tx in payload.get('data', []):
+            timestamp = tx.get('block_timestamp')
+            if timestamp is None:
+                continue
+            if self.last_timestamp is None or timestamp > self.last_timestamp:
+                self.last_timestamp, self.boundary_tx_ids = timestamp, {tx['txID']}
+            elif timestamp == self.last_timestamp:
+                self.boundary_tx_ids.add(tx['txID'])
+
+
+def get_trx_transactions(address: str, min_timestamp: int | None = None) -> list[dict]:
+    """Get the list of transactions for a given address.
+
+    When `min_timestamp` is given, every page since that timestamp is fetched
+    (fingerprint pagination, up to TRON_TX_MAX_PAGES pages).
+    """
+    transactions = []
+    fingerprint = None
     try:
-        url = f"{TRON_API_URL}/v1/accounts/{address}/transactions?limit=50&only_to=true&sort=-timestamp"
-        headers = {
-            "accept": "application/json"
-        }
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            data = response.json()
-            transactions = []
-            for tx in data.get('data', []):
-                # Vérifier que c'est un transfert de TRX
-                if tx.get('raw_data', {}).get('contract', [{}])[0].get('type') == 'TransferContract':
-                    contract = tx['raw_data']['contract'][0]['parameter']['value']
-                    transactions.append({
-                        'txID': tx['txID'],
-                        'from': contract.get('owner_address'),
-                        'to': contract.get('to_address'),
-                        'amount': contract.get('amount'),
-                        'confirmations': tx.get('ret', [{}])[0].get('contractRet') == 'SUCCESS' and 20 or 0  # Hypothèse
-                    })
-            return transactions
-        else:
-            logger.error(f"Erreur API TronGrid: {response.status_code} - {response.text}")
-            return []
+        for _ in range(TRON_TX_MAX_PAGES):
+            path, params = _transactions_request(address, min_timestamp, fingerprint)
+            response = pool.request("GET", path, params=params)
+            if response.status_code != 200:
+                logger.error(f"Erreur API TronGrid: {response.status_code} - {response.text}")
+                break
+            payload = response.json()
+            transactions.extend(_parse_trx_transactions(payload))
+            fingerprint = _next_fingerprint(payload)
+            if min_timestamp is None or not fingerprint:
+                break
     except Exception as e:
         logger.error(f"Erreur dans get_trx_transactions: {e}")
-        return []
+    return transactions
+
+
+async def get_trx_transactions_async(
+    session: AsyncPoolSession,
+    address: str,
+    min_timestamp: int | None = None,
+) -> TransactionsWindow | None:
+    """Async variant of get_trx_transactions using a session from `pool.async_session()`.
+
+    Returns the fetched window, TRX transfers plus the newest timestamp of any transaction,
+    or None when the first request failed so callers can tell errors from empty wallets.
+    """
+    window = TransactionsWindow()
+    pages = 0
+    fingerprint = None
+    try:
+        for page in range(TRON_TX_MAX_PAGES):
+            path, params = _transactions_request(address, min_timestamp, fingerprint)
+            response = await session.get(path, params=params)
+            if response.status_code != 200:
+                logger.error(f"Erreur API TronGrid: {response.status_code} - {response.text}")
+                return None if page == 0 else window
+            payload = response.json()
+            window.add_page(payload)
+            pages += 1
+            fingerprint = _next_fingerprint(payload)
+            if min_timestamp is None or not fingerprint:
+                break
+    except Exception as e:
+        logger.error(f"Erreur dans get_trx_transactions_async: {e}")
+        return window if pages else None
+    return window
+
+
+def get_now_block_number() -> int:
+    """Get the number of the latest block produced on chain"""
+    return pool.call(lambda ep: ep.tron.get_latest_block_number())
 
 
-def send_trx(from_privkey_hex: str, to_address: str, amount: Decimal) -> str:
-    """Send TRX from a private key to an address"""
+def get_blocks(start_num: int, end_num: int) -> list[dict]:
+    """Get blocks in [start_num, end_num) (at most 100 per call), ordered by number"""
+    ret = pool.call(lambda ep: ep.tron.provider.make_request(
+        "wallet/getblockbylimitnext",
+        {"startNum": start_num, "endNum": end_num, "visible": True},
+    ))
+    blocks = ret.get("block", [])
+    return sorted(blocks, key=lambda b: b["block_header"]["raw_data"]["number"])
+
+
+def get_block_by_num(num: int) -> dict:
+    """Get a single block by number"""
+    return pool.call(lambda ep: ep.tron.provider.make_request("wallet/getblockbynum", {"num": num, "visible": True}))
+
+
+def get_block_transfers(block: dict) -> list[dict]:
+    """List the TRX transfers of a block, in the same shape as get_trx_transactions"""
+    return _parse_trx_transactions({"data": block.get("transactions", [])})
+
+
+def build_signed_trx(from_privkey_hex: str, to_address: str, amount: Decimal, expiration_seconds: int | None = None) -> Transaction:
+    """Build and sign a TRX transfer without broadcasting it (txid is known from here on)"""
     priv = PrivateKey(bytes.fromhex(from_privkey_hex))
     address = priv.public_key.to_base58check_address()
-    txn = (
-        tron.trx.transfer(address, to_address, int(amount * 1_000_000))
-        .build()
-        .sign(priv)
-    )
-    result = txn.broadcast().wait()
-    return result['id']
 
+    def _build(ep):
+        builder = ep.tron.trx.transfer(address, to_address, int(amount * 1_000_000))
+        if expiration_seconds:
+            builder = builder.expiration(expiration_seconds * 1000)
+        return builder.build().sign(priv)
+
+    return pool.call(_build)
+
+
+def broadcast_transaction(txn_json: dict) -> str:
+    """Broadcast a signed transaction and return its txid.
+
+    Sending the same signed transaction again is harmless, so this can be retried
+    (and fail over to another endpoint) without risking a double payment.
+    """
+    def _broadcast(ep):
+        payload = ep.tron.provider.make_request("wallet/broadcasttransaction", txn_json)
+        if payload.get("code") == "DUP_TRANSACTION_ERROR":  # accepted by an earlier attempt
+            return
+        ep.tron._handle_api_error(payload)
+
+    pool.call(_broadcast)
+    return txn_json["txID"]
+
+
+def get_transaction_receipt(txid: str) -> dict | None:
+    """Transaction info once the transaction is in a block, None before"""
+    try:
+        return pool.call(lambda ep: ep.tron.get_transaction_info(txid))
+    except TransactionNotFound:
+        return None
+
+
+def is_successful_receipt(receipt: dict) -> bool:
+    return receipt.get("result") != "FAILED" and receipt.get("receipt", {}).get("result", "SUCCESS") == "SUCCESS"
+
+
+def send_trx(from_privkey_hex: str, to_address: str, amount: Decimal, expiration_seconds: int | None = None) -> str:
+    """Build, sign and broadcast a TRX transfer; return its txid without waiting for a block.
+
+    Confirmation is followed by `blockchain.confirmation_tracker`.
+    """
+    txn = build_signed_trx(from_privkey_hex, to_address, amount, expiration_seconds)
+    return broadcast_transaction(txn.to_json())
 
 
 def get_trx_balance(address: str) -> int | None:
     """Get the balance of an address"""
     try:
-        return tron.get_account_balance(address) 
+        return pool.call(lambda ep: ep.tron.get_account_balance(address))
     except Exception as e:
         logger.error(f"Error getting balance: {e}")
         return None
\ No newline at end of file
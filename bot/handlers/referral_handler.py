@@ -25,12 +25,10 @@ async def handle_referral(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # Single-level: direct referrals only
-    direct_refs = service.get_direct_referrals(user.id)
-    total_referrals = str(len(direct_refs))
-
-    summary = service.summarize_commissions(user.id)
-    total_paid_trx = format_trx(summary.get("total_paid", 0.0))
-    total_pending_trx = format_trx(summary.get("total_pending", 0.0))
+    stats = service.get_referral_stats(user.id)
+    total_referrals = str(stats["referrals"])
+    total_paid_trx = format_trx(stats["total_paid"])
+    total_pending_trx = format_trx(stats["total_pending"])
 
     # Share link constructed from bot username + referral code
     bot_username = context.bot.username
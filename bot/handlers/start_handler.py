@@ -25,6 +25,7 @@ from bot.messages import (
 from services.user_service import UserService
 from config import ITEMS_PER_PAGE, TELEGRAM_ADMIN_USERNAME
 from utils.helpers import escape_markdown_v2
+from bot.utils import notify_user
 
 
 # Exported handlers (registration is done elsewhere)
@@ -49,8 +50,8 @@ async def handle_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if context.args:
         referral_code = context.args[0]
 
-    # generate unique code for the new user
-    code = UserService.generate_unique_referral_code()
+    # the new user's code, derived from their Telegram id
+    code = UserService.referral_code_for(telegram_id)
 
     sponsor_id = None
     sponsor_line = ""
@@ -59,14 +60,13 @@ async def handle_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if sponsor:
             sponsor_id = sponsor.id
             sponsor_line = f"👤 Referred by : {escape_markdown_v2('@' + (sponsor.username or 'User'))}\n"
-            # notify sponsor
-            await context.bot.send_message(
+            # notify sponsor through the outbox, registration does not wait on their chat
+            await notify_user(
                 sponsor.telegram_id,
                 msg_new_referral(
                     sponsor_username='@' + (sponsor.username or 'User'),
                     friend_username='@' + (username or 'this user'),
                 ),
-                parse_mode=ParseMode.MARKDOWN_V2,
             )
 
     # create user and wallet
@@ -1,10 +1,8 @@
-import asyncio
 import datetime
-from telegram import Bot, ReplyKeyboardMarkup
-from telegram.constants import ParseMode
+from telegram import ReplyKeyboardMarkup
 from decimal import Decimal
 from utils.helpers import escape_markdown_v2
-from config import TELEGRAM_BOT_TOKEN
+from utils.telegram.outbox import outbox
 
 
 def format_trx(amount: float | Decimal, decimals: int = 2) -> str:
@@ -33,35 +31,10 @@ def format_datetime(dt: datetime.datetime | None) -> str:
 
 
 async def notify_user(telegram_id: str, message: str, reply_markup: ReplyKeyboardMarkup = None) -> None:
-    """Send a Markdown-v2 formatted message to the given Telegram user, if possible."""
-    # Initialize Telegram Bot for notifications
-    bot = Bot(token=TELEGRAM_BOT_TOKEN)
-    if not telegram_id:
-        return
-    try:
-        await bot.send_message(chat_id=telegram_id, text=(message), parse_mode=ParseMode.MARKDOWN_V2, reply_markup=reply_markup)
-    except Exception as e:
-        logger.error(f"[Notify] Failed to send message to {telegram_id}: {e}")
+    """Queue a Markdown-v2 formatted message to the given Telegram user, if possible."""
+    outbox.enqueue(telegram_id, message, reply_markup)
 
-def safe_notify_user(telegram_id: int, message: str, reply_markup: ReplyKeyboardMarkup = None):
-    """Send a Markdown-v2 formatted message to the given Telegram user, if possible."""
-    try:
-        # Python ≥3.7: create a new loop if none exists (e.g. in thread)
-        loop = asyncio.get_event_loop()
-    except RuntimeError as e:
-        if "There is no current event loop" in str(e):
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        else:
-            raise
 
-    try:
-        if loop.is_running():
-            asyncio.run_coroutine_threadsafe(
-                notify_user(telegram_id, message, reply_markup), loop
-            )
-        else:
-            loop.run_until_complete(notify_user(telegram_id, message, reply_markup))
-    except Exception as e:
-        # log this error instead of retrying recursively
-        logger.error(f"[Notify] Failed to notify {telegram_id}: {e}")
\ No newline at end of file
+def safe_notify_user(telegram_id: int, message: str, reply_markup: ReplyKeyboardMarkup = None):
+    """Queue a Markdown-v2 formatted message from any thread (delivered by the notification outbox)."""
+    outbox.enqueue(telegram_id, message, reply_markup)
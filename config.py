@@ -9,7 +9,48 @@ TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 TELEGRAM_ADMIN_ID = os.getenv('TELEGRAM_ADMIN_ID')
 TELEGRAM_ADMIN_USERNAME = os.getenv('TELEGRAM_ADMIN_USERNAME')
 
+# Telegram send rate, shared by replies and notifications: messages/s overall, per private chat
+# and per group (20 per minute); then messages sent per round by the notification outbox
+TELEGRAM_GLOBAL_RATE_LIMIT = float(os.getenv('TELEGRAM_GLOBAL_RATE_LIMIT', 30))
+TELEGRAM_CHAT_RATE_LIMIT = float(os.getenv('TELEGRAM_CHAT_RATE_LIMIT', 1))
+TELEGRAM_GROUP_RATE_LIMIT = float(os.getenv('TELEGRAM_GROUP_RATE_LIMIT', 20 / 60))
+TELEGRAM_OUTBOX_BATCH_SIZE = int(os.getenv('TELEGRAM_OUTBOX_BATCH_SIZE', 30))
+
+# How the bot receives updates: 'polling' or 'webhook' (Telegram pushes updates over HTTPS). Either way
+# run a single bot process: conversation state, rate limits and the user cache are kept in memory
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+# Updates handled at the same time by one process; a user's own updates always run one after another
+TELEGRAM_CONCURRENT_UPDATES = max(1, int(os.getenv('TELEGRAM_CONCURRENT_UPDATES', 16)))
+
+# Webhook mode: public HTTPS URL registered with Telegram, local address the server listens on and the
+# URL path it serves. TLS is normally terminated by a reverse proxy; set WEBHOOK_CERT/WEBHOOK_KEY to
+# terminate it in the bot instead. Telegram sends WEBHOOK_SECRET_TOKEN with every update and anything
+# without it is rejected. WEBHOOK_MAX_CONNECTIONS caps the parallel requests Telegram makes.
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8443))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram').strip('/')
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN')
+WEBHOOK_CERT = os.getenv('WEBHOOK_CERT')
+WEBHOOK_KEY = os.getenv('WEBHOOK_KEY')
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', 40))
+
 DATABASE_URL = os.getenv('DATABASE_URL')
+# Connection pool of each process: connections kept open, extra ones opened under load, seconds a
+# checkout waits before failing, and age in seconds after which a connection is replaced (-1: never).
+# Each instance may open up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', -1))
+# Minutes between pool statistics log lines (0 disables them)
+DB_POOL_STATS_INTERVAL = int(os.getenv('DB_POOL_STATS_INTERVAL', 15))
+# Threads running blocking DB calls awaited by bot handlers (keep at or below the connection pool size)
+DB_EXECUTOR_WORKERS = int(os.getenv('DB_EXECUTOR_WORKERS', 10))
+# Users cached by telegram_id in each process (0 disables) and for how many seconds. Changes made by
+# this process are applied at once; those made by other processes (workers) show after at most USER_CACHE_TTL.
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 30))
 
 # Limits
 DAILY_WITHDRAWAL_LIMIT = float(os.getenv('DAILY_WITHDRAWAL_LIMIT', 1000))
@@ -20,6 +61,30 @@ ITEMS_PER_PAGE = int(os.getenv('ITEMS_PER_PAGE', 3))
 TRON_PRIVATE_KEY = os.getenv('TRON_PRIVATE_KEY')
 TRON_API_URL = os.getenv('TRON_API_URL')
 TRON_EXPLORER_URL = os.getenv('TRON_EXPLORER_URL')
+TRON_API_KEY = os.getenv('TRON_API_KEY')
+# Several endpoints and/or API keys for failover (comma-separated).
+# One key per URL, one key shared by all URLs, or one URL used with every key.
+TRON_API_URLS = [u.strip() for u in os.getenv('TRON_API_URLS', '').split(',') if u.strip()]
+TRON_API_KEYS = [k.strip() for k in os.getenv('TRON_API_KEYS', '').split(',') if k.strip()]
+# Failures in a row before an endpoint is ejected, and first ejection time (seconds, doubles on repeat)
+TRON_ENDPOINT_EJECT_AFTER = int(os.getenv('TRON_ENDPOINT_EJECT_AFTER', 3))
+TRON_ENDPOINT_COOLDOWN = float(os.getenv('TRON_ENDPOINT_COOLDOWN', 30))
+
+# TRON API quota per endpoint (starting requests per second and burst size).
+# The rate adapts to the provider: halved on 429/5xx, raised back while calls succeed, within [MIN, MAX].
+TRON_API_RATE_LIMIT = float(os.getenv('TRON_API_RATE_LIMIT', 8))
+TRON_API_RATE_BURST = int(os.getenv('TRON_API_RATE_BURST', 10))
+TRON_API_RATE_MIN = float(os.getenv('TRON_API_RATE_MIN', 0.5))
+TRON_API_RATE_MAX = float(os.getenv('TRON_API_RATE_MAX', 15))
+# Max pages of 50 transactions fetched per wallet and scan
+TRON_TX_MAX_PAGES = int(os.getenv('TRON_TX_MAX_PAGES', 20))
+
+# HTTP transport to the TRON API (timeouts in seconds, size of the keep-alive pool)
+TRON_HTTP_TIMEOUT = float(os.getenv('TRON_HTTP_TIMEOUT', 15))
+TRON_HTTP_CONNECT_TIMEOUT = float(os.getenv('TRON_HTTP_CONNECT_TIMEOUT', 5))
+TRON_HTTP_MAX_CONNECTIONS = int(os.getenv('TRON_HTTP_MAX_CONNECTIONS', 20))
+# Use HTTP/2 when the h2 package is installed (pip install "httpx[http2]")
+TRON_HTTP2 = os.getenv('TRON_HTTP2', 'true').lower() in ('1', 'true', 'yes')
 
 # Deposit to main wallet rate (e.g. 0.9 = 90%)
 DEPOSIT_TO_MAIN_WALLET_RATE = float(os.getenv('DEPOSIT_TO_MAIN_WALLET_RATE', 0.9))
@@ -34,8 +99,49 @@ REFERRAL_RATE = float(os.getenv('REFERRAL_RATE', 0.01))
 DEPOSIT_CHECK_INTERVAL = int(os.getenv('DEPOSIT_CHECK_INTERVAL', 4))
 WITHDRAWAL_PROCESS_INTERVAL = int(os.getenv('WITHDRAWAL_PROCESS_INTERVAL', 5))
 
+# Withdrawal broadcaster: parallel sends and signed transaction lifetime (seconds)
+WITHDRAWAL_BROADCAST_CONCURRENCY = int(os.getenv('WITHDRAWAL_BROADCAST_CONCURRENCY', 8))
+WITHDRAWAL_TX_EXPIRATION_SECONDS = int(os.getenv('WITHDRAWAL_TX_EXPIRATION_SECONDS', 600))
+
+# Withdrawal claiming: rows claimed per batch and how long a claim holds before another processor may take it (seconds)
+WITHDRAWAL_CLAIM_BATCH_SIZE = int(os.getenv('WITHDRAWAL_CLAIM_BATCH_SIZE', 50))
+WITHDRAWAL_CLAIM_LEASE_SECONDS = int(os.getenv('WITHDRAWAL_CLAIM_LEASE_SECONDS', 300))
+
+# Admin broadcasts: recipients loaded (and progress checkpointed) per page, messages in flight
+BROADCAST_PAGE_SIZE = int(os.getenv('BROADCAST_PAGE_SIZE', 500))
+BROADCAST_CONCURRENCY = int(os.getenv('BROADCAST_CONCURRENCY', 30))
+# How long a sender's claim on a broadcast holds without a checkpoint (seconds); must exceed the time to send a page
+BROADCAST_CLAIM_LEASE_SECONDS = int(os.getenv('BROADCAST_CLAIM_LEASE_SECONDS', 300))
+
+# Confirmation tracker: receipt poll interval (seconds), receipts fetched per round and in parallel
+CONFIRMATION_POLL_INTERVAL = float(os.getenv('CONFIRMATION_POLL_INTERVAL', 3))
+CONFIRMATION_BATCH_SIZE = int(os.getenv('CONFIRMATION_BATCH_SIZE', 200))
+CONFIRMATION_CONCURRENCY = int(os.getenv('CONFIRMATION_CONCURRENCY', 8))
+
+# Deposit scanner (number of wallets fetched in parallel)
+DEPOSIT_SCAN_CONCURRENCY = int(os.getenv('DEPOSIT_SCAN_CONCURRENCY', 8))
+
+# Deposit monitor sharding: wallets are split into DEPOSIT_SHARD_COUNT shards (wallet id modulo count).
+# DEPOSIT_SHARDS lists the shards scanned by this process (comma-separated, empty = all).
+DEPOSIT_SHARD_COUNT = max(1, int(os.getenv('DEPOSIT_SHARD_COUNT', 1)))
+DEPOSIT_SHARDS = [int(shard) for shard in os.getenv('DEPOSIT_SHARDS', '').split(',') if shard.strip()]
+
+# Polling tiers: a wallet is hot (polled every cycle) for DEPOSIT_HOT_MINUTES after its deposit panel
+# is opened or a deposit arrives; dormant wallets back off exponentially up to DEPOSIT_COLD_MAX_MINUTES.
+DEPOSIT_HOT_MINUTES = int(os.getenv('DEPOSIT_HOT_MINUTES', 60))
+DEPOSIT_COLD_MAX_MINUTES = int(os.getenv('DEPOSIT_COLD_MAX_MINUTES', 360))
+
+# Deposit detection mode: 'polling' (per-wallet API calls) or 'blocks' (follow new blocks)
+DEPOSIT_DETECTION_MODE = os.getenv('DEPOSIT_DETECTION_MODE', 'polling')
+DEPOSIT_MIN_CONFIRMATIONS = int(os.getenv('DEPOSIT_MIN_CONFIRMATIONS', 19))
+BLOCK_SCAN_INTERVAL_SECONDS = int(os.getenv('BLOCK_SCAN_INTERVAL_SECONDS', 30))
+BLOCK_SCAN_MAX_BLOCKS_PER_RUN = int(os.getenv('BLOCK_SCAN_MAX_BLOCKS_PER_RUN', 2000))
+
 # Security
 ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY')
+# Keys the permutation turning Telegram ids into referral codes (required); set once, changing it
+# can make new codes collide with existing ones
+REFERRAL_CODE_KEY = os.getenv('REFERRAL_CODE_KEY', '')
 
 # Logging
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
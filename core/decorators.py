@@ -53,6 +53,7 @@ def require_admin(admin_ids: Optional[Iterable[int]] = None) -> Callable[[Handle
     """Decorator that ensures the caller is an admin user.
 
     If admin_ids is None, falls back to TELEGRAM_ADMIN_ID from config (single or CSV list).
+    With no admin configured, everyone is denied. Works on handler functions and methods.
     """
 
     # Normalize configured admin(s)
@@ -61,13 +62,14 @@ def require_admin(admin_ids: Optional[Iterable[int]] = None) -> Callable[[Handle
 
     def _decorator(func: Handler) -> Handler:
         @functools.wraps(func)
-        async def _wrapper(update, context):  # type: ignore[misc]
+        async def _wrapper(*args):  # type: ignore[misc]
+            update = args[-2]  # (update, context) or (self, update, context)
             user_id = getattr(getattr(update, "effective_user", None), "id", None)
-            if user_id is None or (allowed and user_id not in allowed):
+            if user_id is None or user_id not in allowed:
                 if getattr(update, "message", None):
                     await update.message.reply_text("❌ Access denied")
                 return None
-            return await func(update, context)
+            return await func(*args)
 
         return _wrapper  # type: ignore[return-value]
 
@@ -23,7 +23,7 @@ class AuthMiddleware:
         if not update.effective_user:
             return True
         telegram_id = str(update.effective_user.id)
-        user = self.user_service.get_user_by_telegram(telegram_id)
+        user = await self.user_service.aio.get_user_by_telegram(telegram_id)
         if not user:
             if update.message:
                 await update.message.reply_text("❌ User not found")
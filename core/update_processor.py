@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Dict, Hashable, List, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+MAX_PENDING_UPDATES = 1024  # updates admitted at once (running or waiting for their user's turn)
+
+
+class _Lane:
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0  # updates holding or waiting for the lock
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Process updates of different users concurrently, and each user's updates in order.
+
+    - At most `max_running` updates run at the same time, whoever they come from.
+    - Updates of one user (callback queries included) run one after another in arrival
+      order, so per-user state such as `context.user_data["withdraw"]` sees them in sequence.
+      Updates with neither a user nor a chat are not ordered.
+    - A user's waiting updates do not take a running slot: a user sending many messages
+      only delays themselves.
+
+    Only awaited work overlaps: a handler blocking the event loop (sync I/O) still blocks
+    every other update.
+    """
+
+    def __init__(self, max_running: int, max_pending: int = MAX_PENDING_UPDATES) -> None:
+        # The base class semaphore only bounds admitted updates; the running cap is applied
+        # after the per-user lock so waiting updates do not hold a slot.
+        super().__init__(max(max_pending, max_running))
+        self.max_running = max(1, int(max_running))
+        self._running = asyncio.Semaphore(self.max_running)
+        self._lanes: Dict[Hashable, _Lane] = {}
+
+    @staticmethod
+    def ordering_key(update: object) -> Optional[Hashable]:
+        if isinstance(update, Update):
+            if update.effective_user:
+                return ("user", update.effective_user.id)
+            if update.effective_chat:
+                return ("chat", update.effective_chat.id)
+        return None
+
+    @property
+    def waiting_users(self) -> List[Hashable]:
+        """Keys with more than one update admitted (one running, the others queued)."""
+        return [key for key, lane in self._lanes.items() if lane.users > 1]
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self.ordering_key(update)
+        if key is None:
+            async with self._running:
+                await coroutine
+            return
+
+        # No await before the lock: tasks reach it in the order the updates arrived,
+        # and asyncio.Lock wakes its waiters first in, first out
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _Lane()
+        lane.users += 1
+        try:
+            async with lane.lock:
+                async with self._running:
+                    await coroutine
+        finally:
+            lane.users -= 1
+            if lane.users == 0:
+                del self._lanes[key]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
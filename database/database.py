@@ -1,24 +1,84 @@
 """
 Database configuration and session management 
 """
-from sqlalchemy import create_engine
+import asyncio
+import contextvars
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, make_url, text
 from sqlalchemy.orm import sessionmaker, Session
 from contextlib import contextmanager
-from typing import Generator
+from typing import Any, Callable, Generator, TypeVar
 import config
+from database.pool import InstrumentedQueuePool
 from utils.logger import get_logger
 
 # Initialize logger
 logger = get_logger("database")
 
-# Create engine and session factory (simple configuration)
+_url = make_url(config.DATABASE_URL)
+
+# psycopg2 sends executemany() UPDATEs one statement at a time unless batching is enabled
+_engine_options = (
+    {"executemany_mode": "values_plus_batch"}
+    if _url.drivername in ("postgresql", "postgresql+psycopg2")
+    else {}
+)
+# An in-memory SQLite database lives in a single connection and keeps SQLAlchemy's own pool
+if not (_url.get_backend_name() == "sqlite" and _url.database in (None, "", ":memory:")):
+    _engine_options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+    )
+
+# One engine per process, shared by the bot, the workers and the scheduler's job store
 engine = create_engine(
     config.DATABASE_URL,
     pool_pre_ping=True,
     echo=(config.LOG_LEVEL == "DEBUG"),
+    **_engine_options,
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Blocking DB work awaited from the event loop runs on these threads. Keep it within the
+# connection pool so a thread never waits for a connection.
+_db_executor = ThreadPoolExecutor(max_workers=config.DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+if config.DB_EXECUTOR_WORKERS > config.DB_POOL_SIZE + config.DB_MAX_OVERFLOW:
+    logger.warning(
+        f"DB_EXECUTOR_WORKERS={config.DB_EXECUTOR_WORKERS} exceeds the connection pool "
+        f"({config.DB_POOL_SIZE} + {config.DB_MAX_OVERFLOW} overflow): DB threads will wait for connections"
+    )
+
+T = TypeVar("T")
+
+
+async def run_in_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Await blocking DB code (a service method, a query...) without blocking the event loop.
+
+    Runs on the DB thread pool with the caller's context variables.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    return await loop.run_in_executor(_db_executor, call)
+
+
+def get_pool_stats() -> dict:
+    """Connection pool usage of this process (checked out, overflow, waits, timeouts...)"""
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.stats()
+    return {"status": pool.status()}
+
+
+def log_pool_stats() -> None:
+    """Log one line of pool statistics (scheduled every DB_POOL_STATS_INTERVAL minutes)"""
+    stats = get_pool_stats()
+    logger.info("[DB pool] " + ", ".join(f"{key}={value}" for key, value in stats.items()))
+
 
 def init_database():
     """Initialize the database and create all tables"""
@@ -48,4 +108,42 @@ def get_db_session() -> Generator[Session, None, None]:
         logger.error(f"Database session error: {e}")
         raise
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+
+def dialect_insert(session: Session, model):
+    """Return an INSERT construct supporting ON CONFLICT for the session's dialect.
+
+    PostgreSQL is the production database; SQLite is accepted for local tooling.
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(model)
+
+
+def advisory_lock_key(name: str) -> int:
+    """Stable signed 64-bit key for a named advisory lock"""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+@contextmanager
+def try_advisory_lock(name: str) -> Generator[bool, None, None]:
+    """
+    Try to take a PostgreSQL session advisory lock for the duration of the block.
+    Yields False (without waiting) when another session already holds it.
+    The lock lives on a dedicated connection, so it is released if the process dies.
+    Other dialects have no advisory locks and always yield True.
+    """
+    with engine.connect() as conn:
+        if conn.dialect.name != "postgresql":
+            yield True
+            return
+        key = advisory_lock_key(name)
+        acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
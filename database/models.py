@@ -3,7 +3,7 @@ Database models
 Defines all database tables and relationships
 Integrates base models, utilities, and models
 """
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Numeric, Enum, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Date, Numeric, Enum, Boolean, Text, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base, declared_attr
 from sqlalchemy.orm import relationship, Session
 import enum
@@ -121,6 +121,12 @@ class CommissionStatus(enum.Enum):
     paid = 'paid'
 
 
+class BroadcastStatus(enum.Enum):
+    running = 'running'
+    completed = 'completed'
+    cancelled = 'cancelled'
+
+
 # Models
 class User(BaseModel):
     """User model for marketplace participants and advertisers"""
@@ -131,7 +137,7 @@ class User(BaseModel):
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=True)
     referral_code = Column(String, unique=True, nullable=False, index=True)
-    sponsor_id = Column(Integer, ForeignKey('users.id'), nullable=True)
+    sponsor_id = Column(Integer, ForeignKey('users.id'), nullable=True, index=True)
     account_balance = Column(Numeric(precision=18, scale=6), default=0, nullable=False)
     total_deposited = Column(Numeric(precision=18, scale=6), default=0, nullable=False)
     total_withdrawn = Column(Numeric(precision=18, scale=6), default=0, nullable=False)
@@ -161,6 +167,7 @@ class UserWallet(BaseModel):
     # Relationships
     user = relationship("User", back_populates="wallets")
     deposits = relationship("Deposit", back_populates="wallet")
+    scan_state = relationship("WalletScanState", back_populates="wallet", uselist=False)
 
 
 class Deposit(BaseModel):
@@ -191,11 +198,35 @@ class Withdrawal(BaseModel):
     tx_hash = Column(String, nullable=True)
     status = Column(Enum(WithdrawalStatus), default=WithdrawalStatus.pending, nullable=False)
     processed_at = Column(DateTime, nullable=True)
+    # Signed transaction (JSON), saved before broadcast so it can be re-sent as is; unused once expired
+    signed_tx = Column(Text, nullable=True)
+    tx_expires_at = Column(DateTime, nullable=True)
+    # Processor that claimed the withdrawal and until when; an expired lease can be claimed again
+    claimed_by = Column(String, nullable=True)
+    lease_until = Column(DateTime, nullable=True, index=True)
     
     # Relationships
     user = relationship("User", back_populates="withdrawals")
 
 
+class DailyWithdrawalCounter(BaseModel):
+    """Amount a user has requested to withdraw on a UTC day, failed withdrawals excluded.
+
+    Maintained in the same transaction as the withdrawal it counts, so the daily limit is
+    checked with one row read.
+    """
+    __tablename__ = 'daily_withdrawal_counters'
+
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    day = Column(Date, nullable=False)
+    amount_trx = Column(Numeric(precision=18, scale=6), default=0, server_default='0', nullable=False)
+    withdrawals = Column(Integer, default=0, server_default='0', nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'day', name='uq_daily_withdrawal_counters_user_day'),
+    )
+
+
 class ReferralCommission(BaseModel):
     """Referral commission model for tracking commissions"""
     __tablename__ = 'referral_commissions'
@@ -213,6 +244,25 @@ class ReferralCommission(BaseModel):
     beneficiary = relationship("User", foreign_keys=[user_id], back_populates="commissions_received")
     referrer = relationship("User", foreign_keys=[referred_user_id], back_populates="commissions_generated")
 
+    # Referral summaries add up a beneficiary's commissions by status
+    __table_args__ = (
+        Index('ix_referral_commissions_user_status', 'user_id', 'status'),
+    )
+
+
+class ReferralStats(BaseModel):
+    """Running referral totals of a sponsor, so the referral overview reads a single row.
+
+    Updated in the same transaction as the registration or commission it counts; a user
+    without a row has no referrals and no commissions.
+    """
+    __tablename__ = 'referral_stats'
+
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, unique=True)
+    referrals = Column(Integer, default=0, server_default='0', nullable=False)
+    paid_trx = Column(Numeric(precision=18, scale=6), default=0, server_default='0', nullable=False)
+    pending_trx = Column(Numeric(precision=18, scale=6), default=0, server_default='0', nullable=False)
+
 
 class Transaction(BaseModel):
     """Transaction model for tracking all financial operations"""
@@ -223,10 +273,60 @@ class Transaction(BaseModel):
     amount_trx = Column(Numeric(precision=18, scale=6), nullable=False)
     status = Column(Enum(TransactionStatus), default=TransactionStatus.pending, nullable=False)
     description = Column(String, nullable=True)
-    reference_id = Column(String, nullable=True)
+    reference_id = Column(String, nullable=True, index=True)
     tx_hash = Column(String, nullable=True)
     
     # Relationships
     user = relationship("User", back_populates="transactions")
 
+    # History pages are read newest first with a (created_at, id) keyset, for all types or one
+    __table_args__ = (
+        Index('ix_transactions_user_history', 'user_id', 'created_at', 'id'),
+        Index('ix_transactions_user_type_history', 'user_id', 'type', 'created_at', 'id'),
+    )
+
+
+class ChainCursor(BaseModel):
+    """Last blockchain block processed by a block-following worker"""
+    __tablename__ = 'chain_cursors'
+
+    name = Column(String, unique=True, nullable=False)
+    block_number = Column(BigInteger, nullable=False)
+
+
+class WalletScanState(BaseModel):
+    """Per-wallet deposit scan cursor: newest transaction already processed"""
+    __tablename__ = 'wallet_scan_states'
+
+    wallet_id = Column(Integer, ForeignKey('user_wallets.id'), nullable=False, unique=True)
+    last_timestamp = Column(BigInteger, nullable=True)  # block timestamp (ms) of the newest processed tx
+    # Space-separated txIDs of every processed tx at last_timestamp (several can share a block)
+    boundary_tx_hashes = Column(Text, nullable=True)
+    # Polling tier: hot wallets are polled every cycle, dormant ones with exponential backoff
+    hot_until = Column(DateTime, nullable=True)
+    next_poll_at = Column(DateTime, nullable=True, index=True)  # NULL = poll on the next cycle
+    idle_polls = Column(Integer, default=0, server_default='0', nullable=False)  # empty polls in a row
+
+    # Relationships
+    wallet = relationship("UserWallet", back_populates="scan_state")
+
+
+class Broadcast(BaseModel):
+    """Admin announcement to every active user, checkpointed so it can be resumed"""
+    __tablename__ = 'broadcasts'
 
+    text = Column(Text, nullable=False)  # MarkdownV2
+    created_by = Column(String, nullable=False)  # admin telegram_id, receives the final report
+    status = Column(Enum(BroadcastStatus), default=BroadcastStatus.running, nullable=False, index=True)
+    # Recipients are walked in users.id order: everyone up to last_user_id has been handled.
+    # Users who register after the broadcast started (id > max_user_id) are not included.
+    last_user_id = Column(Integer, default=0, server_default='0', nullable=False)
+    max_user_id = Column(Integer, nullable=False)
+    total = Column(Integer, default=0, server_default='0', nullable=False)
+    delivered = Column(Integer, default=0, server_default='0', nullable=False)
+    blocked = Column(Integer, default=0, server_default='0', nullable=False)  # bot blocked or account deleted
+    failed = Column(Integer, default=0, server_default='0', nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    # Process sending the broadcast and until when; an expired lease can be claimed again
+    claimed_by = Column(String, nullable=True)
+    lease_until = Column(DateTime, nullable=True)
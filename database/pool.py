@@ -0,0 +1,71 @@
+"""
+Connection pool with usage statistics
+"""
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that counts checkouts, time spent getting a connection, overflow and timeouts.
+
+    - Wait time covers the whole checkout: waiting for a connection to be returned, or
+      opening a new one when the pool has room.
+    - An overflow event is a connection opened beyond `pool_size` (up to `max_overflow`).
+    - A timeout is a checkout that gave up after `timeout` seconds with the pool exhausted.
+
+    Counters are per process and since start (or `recreate()`, e.g. after `engine.dispose()`).
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.peak_checked_out = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        started = time.monotonic()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        waited = time.monotonic() - started
+        checked_out = self.checkedout()
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+        return record
+
+    def _inc_overflow(self) -> bool:
+        opened = super()._inc_overflow()
+        # _overflow counts from -pool_size: above zero the new connection is an overflow one
+        if opened and self._overflow > 0:
+            with self._stats_lock:
+                self.overflow_events += 1
+        return opened
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "size": self.size(),
+                "max_overflow": self._max_overflow,
+                "checked_out": self.checkedout(),
+                "idle": self.checkedin(),
+                "overflow": max(0, self.overflow()),
+                "peak_checked_out": self.peak_checked_out,
+                "checkouts": self.checkouts,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_seconds / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+            }
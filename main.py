@@ -2,7 +2,8 @@ import asyncio
 import atexit
 
 from modules.common.instances import common_handler
-from telegram.ext import Application, CommandHandler, MessageHandler, filters
+from telegram import Update
+from telegram.ext import Application, CommandHandler, MessageHandler, TypeHandler, filters
 from telegram.ext import CallbackQueryHandler
 
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -10,17 +11,23 @@ from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.executors.pool import ThreadPoolExecutor as APSchedulerThreadPoolExecutor
 
 from config import (
-    TELEGRAM_BOT_TOKEN, DATABASE_URL,
+    TELEGRAM_BOT_TOKEN, BOT_MODE, TELEGRAM_CONCURRENT_UPDATES,
+    WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN,
+    WEBHOOK_CERT, WEBHOOK_KEY, WEBHOOK_MAX_CONNECTIONS,
     DEPOSIT_CHECK_INTERVAL, WITHDRAWAL_PROCESS_INTERVAL,
-    AP_SCHEDULER_THREAD_POOL_SIZE
+    AP_SCHEDULER_THREAD_POOL_SIZE, DEPOSIT_DETECTION_MODE,
+    BLOCK_SCAN_INTERVAL_SECONDS, DEPOSIT_SHARD_COUNT, DEPOSIT_SHARDS, DB_POOL_STATS_INTERVAL,
 )
 
 from database import init_database
+from database.database import engine, log_pool_stats
 
 from core.middleware import AuthMiddleware, LoggingMiddleware, RateLimitMiddleware
 from core.router_registry import RouterRegistry
+from core.update_processor import PerUserUpdateProcessor
 
 from modules.account import AccountRouter, account_handler
+from modules.broadcast import broadcast_handler
 from modules.common import CommonRouter
 from modules.deposit import DepositRouter, deposit_handler
 from modules.info import InfoRouter, info_handler
@@ -28,9 +35,13 @@ from modules.referral import ReferralRouter, referral_handler
 from modules.withdrawal import WithdrawalRouter, withdrawal_handler
 
 from workers.deposit_monitor import run_deposit_monitor
+from workers.block_follower import run_block_follower
 from workers.withdrawal_processor import run_withdrawal_processor
 
+from shared.user_cache import reset_user_memo
 from utils.logger import get_logger
+from utils.telegram.outbox import NOTIFICATION_DRAIN_TIMEOUT, outbox
+from utils.telegram.rate_limiter import telegram_rate_limiter
 
 
 logger = get_logger(__name__)
@@ -49,24 +60,57 @@ registry.register_middleware(RateLimitMiddleware(1.0))
 
 
 def start_scheduler():
-    jobstores = {'default': SQLAlchemyJobStore(url=DATABASE_URL)}
+    # The job store shares the application's engine and connection pool
+    jobstores = {'default': SQLAlchemyJobStore(engine=engine)}
     executors = {'default': APSchedulerThreadPoolExecutor(AP_SCHEDULER_THREAD_POOL_SIZE)}
     scheduler = BackgroundScheduler(jobstores=jobstores, executors=executors, timezone='UTC')
     
     # cron job
-    scheduler.add_job(run_deposit_monitor, 'interval', minutes=DEPOSIT_CHECK_INTERVAL, id='monitor_deposits', replace_existing=True)
+    deposit_job_ids = []
+    if DEPOSIT_DETECTION_MODE == 'blocks':
+        scheduler.add_job(run_block_follower, 'interval', seconds=BLOCK_SCAN_INTERVAL_SECONDS, id='follow_blocks', replace_existing=True)
+        deposit_job_ids.append('follow_blocks')
+    elif DEPOSIT_SHARD_COUNT > 1:
+        # One job per shard; other processes or hosts can run the remaining shards
+        for shard in DEPOSIT_SHARDS or range(DEPOSIT_SHARD_COUNT):
+            job_id = f'monitor_deposits_shard_{shard}'
+            scheduler.add_job(
+                run_deposit_monitor, 'interval', minutes=DEPOSIT_CHECK_INTERVAL, id=job_id,
+                kwargs={'shard': shard, 'shard_count': DEPOSIT_SHARD_COUNT}, replace_existing=True,
+            )
+            deposit_job_ids.append(job_id)
+    else:
+        scheduler.add_job(run_deposit_monitor, 'interval', minutes=DEPOSIT_CHECK_INTERVAL, id='monitor_deposits', replace_existing=True)
+        deposit_job_ids.append('monitor_deposits')
     scheduler.add_job(run_withdrawal_processor, 'interval', minutes=WITHDRAWAL_PROCESS_INTERVAL, id='process_withdrawals', replace_existing=True)
+    if DB_POOL_STATS_INTERVAL > 0:
+        scheduler.add_job(log_pool_stats, 'interval', minutes=DB_POOL_STATS_INTERVAL, id='log_pool_stats', replace_existing=True)
     
     scheduler.start()
+    # Drop persisted deposit jobs of a mode or shard layout that is not in use
+    for job in scheduler.get_jobs():
+        if job.id.startswith(('monitor_deposits', 'follow_blocks')) and job.id not in deposit_job_ids:
+            scheduler.remove_job(job.id)
+    if DB_POOL_STATS_INTERVAL <= 0 and scheduler.get_job('log_pool_stats'):
+        scheduler.remove_job('log_pool_stats')
     logger.info("[Scheduler] APScheduler started with persistent jobs.")
+    # atexit runs in reverse order: stop the jobs first, then flush their notifications
+    atexit.register(lambda: outbox.drain(NOTIFICATION_DRAIN_TIMEOUT))
     atexit.register(lambda: scheduler.shutdown())
     return scheduler
 
 
 async def setup_bot():
     """Configure and setup the bot with all handlers"""
-    # Create bot application
-    app = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    # Create bot application; its requests share one send rate with the notification outbox
+    app = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .rate_limiter(telegram_rate_limiter)
+        .concurrent_updates(PerUserUpdateProcessor(TELEGRAM_CONCURRENT_UPDATES))
+        .post_init(broadcast_handler.resume_interrupted)
+        .build()
+    )
 
     async def handle_message(update, context):
         text = update.message.text if update.message else ""
@@ -79,6 +123,9 @@ async def setup_bot():
         else:
             await update.message.reply_text("❓ Invalid command")
     
+    # Every update starts with an empty user memo: middleware and handlers share one user lookup
+    app.add_handler(TypeHandler(Update, reset_user_memo), group=-1)
+
     # Register command handlers (explicit)
     app.add_handler(CommandHandler("start", account_handler.handle_start))
     app.add_handler(CommandHandler("deposit", deposit_handler.handle_deposit))
@@ -91,12 +138,18 @@ async def setup_bot():
     app.add_handler(CommandHandler("support", info_handler.handle_support))
     app.add_handler(CommandHandler("faq", info_handler.handle_faq))
     app.add_handler(CommandHandler("main", common_handler.back_to_main_menu))
+
+    # Admin commands
+    app.add_handler(CommandHandler("broadcast", broadcast_handler.handle_broadcast))
+    app.add_handler(CommandHandler("broadcast_status", broadcast_handler.handle_broadcast_status))
+    app.add_handler(CommandHandler("broadcast_cancel", broadcast_handler.handle_broadcast_cancel))
+    app.add_handler(CommandHandler("broadcast_resume", broadcast_handler.handle_broadcast_resume))
     
     # Register free-text message router
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     
     # Register callback query handlers
-    app.add_handler(CallbackQueryHandler(account_handler.handle_history_pagination, pattern=r"^history_(?:all|deposits|withdrawals)_page_\d+$"))
+    app.add_handler(CallbackQueryHandler(account_handler.handle_history_pagination, pattern=r"^history_(?:all|deposits|withdrawals)_(?:page_\d+|(?:older|newer)_\d+_[0-9a-z]+_[0-9a-z]+)$"))
     app.add_handler(CallbackQueryHandler(info_handler.handle_referral_info, pattern=r"^referral_info$"))
     
     # Error handler
@@ -104,6 +157,32 @@ async def setup_bot():
     
     return app
 
+async def start_updates(app: Application) -> None:
+    """Start receiving updates: long polling, or a webhook server when BOT_MODE=webhook"""
+    if BOT_MODE == 'polling':
+        await app.updater.start_polling()
+        return
+    if BOT_MODE != 'webhook':
+        raise ValueError(f"BOT_MODE must be 'polling' or 'webhook', got {BOT_MODE!r}")
+    if not WEBHOOK_URL or not WEBHOOK_SECRET_TOKEN:
+        raise ValueError("BOT_MODE=webhook requires WEBHOOK_URL and WEBHOOK_SECRET_TOKEN")
+    # Plain HTTP behind a TLS-terminating proxy unless a certificate is configured. Requests
+    # without the secret token header are rejected by the server (403) before reaching handlers.
+    # Run one instance: conversation state (user_data), per-user update ordering, the Telegram rate
+    # limiters and the user cache all live in this process, and nothing shares them across instances.
+    await app.updater.start_webhook(
+        listen=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT,
+        url_path=WEBHOOK_PATH,
+        webhook_url=WEBHOOK_URL,
+        secret_token=WEBHOOK_SECRET_TOKEN,
+        cert=WEBHOOK_CERT or None,
+        key=WEBHOOK_KEY or None,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+    )
+    logger.info(f"[Main] Webhook server listening on {WEBHOOK_LISTEN}:{WEBHOOK_PORT}/{WEBHOOK_PATH}")
+
+
 async def main():
     # Initialize DB
     init_database()
@@ -116,9 +195,12 @@ async def main():
     
     # Use context manager for proper initialization
     async with app:
-        logger.info("[Main] Bot is running...")
+        # run_polling/run_webhook would call post_init; starting by hand, we do it
+        if app.post_init:
+            await app.post_init(app)
         await app.start()
-        await app.updater.start_polling()
+        await start_updates(app)
+        logger.info(f"[Main] Bot is running ({BOT_MODE})...")
         
         # Keep the bot running
         try:
@@ -126,6 +208,10 @@ async def main():
         except KeyboardInterrupt:
             logger.info("[Main] Received interrupt signal, shutting down...")
         finally:
+            if app.updater.running:
+                await app.updater.stop()
+            if app.running:
+                await app.stop()
             logger.info("[Main] Bot stopped.")
 
 def run_bot():
@@ -1,3 +1,5 @@
+from math import ceil
+
 from telegram import Update
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
@@ -9,7 +11,8 @@ from modules.common.messages import (
 )
 from .keyboards import (
     history_reply_keyboard,
-    pagination_inline_keyboard,
+    history_pagination_inline_keyboard,
+    parse_history_callback,
     HISTORY_BTN,
     ALL_TRANSACTIONS_BTN,
     DEPOSITS_ONLY_BTN,
@@ -26,6 +29,7 @@ from .messages import (
 from modules.referral.messages import msg_new_referral
 from config import ITEMS_PER_PAGE, TELEGRAM_ADMIN_USERNAME
 from utils.helpers import escape_markdown_v2
+from utils.telegram.notifier import notify_user
 
 
 class AccountHandler:
@@ -40,7 +44,7 @@ class AccountHandler:
         last_name = update.effective_user.last_name or None
 
         # if already registered, show main menu
-        user = self.account_service.get_user_by_telegram(telegram_id)
+        user = await self.account_service.aio.get_user_by_telegram(telegram_id)
         if user:
             await update.message.reply_markdown_v2(
                 msg_already_registered(),
@@ -53,28 +57,27 @@ class AccountHandler:
         if context.args:
             referral_code = context.args[0]
 
-        # generate unique code for the new user
-        code = self.account_service.generate_unique_referral_code()
+        # the new user's code, derived from their Telegram id
+        code = self.account_service.referral_code_for(telegram_id)
 
         sponsor_id = None
         sponsor_line = ""
         if referral_code and referral_code.lower() != code.lower():
-            sponsor = self.account_service.find_sponsor_by_code(referral_code)
+            sponsor = await self.account_service.aio.find_sponsor_by_code(referral_code)
             if sponsor:
                 sponsor_id = sponsor.id
                 sponsor_line = f"👤 Referred by : {escape_markdown_v2('@' + (sponsor.username or 'User'))}\n"
-                # notify sponsor
-                await context.bot.send_message(
+                # notify sponsor through the outbox, registration does not wait on their chat
+                await notify_user(
                     sponsor.telegram_id,
                     msg_new_referral(
                         sponsor_username='@' + (sponsor.username or 'User'),
                         friend_username='@' + (username or 'this user'),
                     ),
-                    parse_mode=ParseMode.MARKDOWN_V2,
                 )
 
         # create user and wallet
-        user = self.account_service.create_user(
+        user = await self.account_service.aio.create_user(
             telegram_id=telegram_id,
             username=username,
             first_name=first_name,
@@ -82,7 +85,7 @@ class AccountHandler:
             referral_code=code,
             sponsor_id=sponsor_id,
         )
-        wallet = self.account_service.get_or_create_wallet_for_user(user.id)
+        wallet = await self.account_service.aio.get_or_create_wallet_for_user(user.id)
 
         # share link
         share_link = self.account_service.build_share_link(context.bot.username, code)
@@ -100,7 +103,7 @@ class AccountHandler:
 
     async def handle_balance(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         telegram_id = str(update.effective_user.id)
-        user = self.account_service.get_user_by_telegram(telegram_id)
+        user = await self.account_service.aio.get_user_by_telegram(telegram_id)
         if not user:
             await update.message.reply_markdown_v2(
                 msg_not_registered_prompt_start(),
@@ -119,7 +122,7 @@ class AccountHandler:
 
     async def handle_history(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         telegram_id = str(update.effective_user.id)
-        user = self.account_service.get_user_by_telegram(telegram_id)
+        user = await self.account_service.aio.get_user_by_telegram(telegram_id)
         if not user:
             await update.message.reply_markdown_v2(
                 msg_not_registered_prompt_start(),
@@ -151,9 +154,11 @@ class AccountHandler:
             filter_key = "all"
         context.user_data["history_filter"] = filter_key
 
-        # Fetch and display first page
-        txs = self.account_service.list_transactions(user.id, None if filter_key == "all" else filter_key)
-        if not txs:
+        # Fetch and display the newest page
+        history_page = await self.account_service.aio.get_transactions_page(
+            user.id, None if filter_key == "all" else filter_key, ITEMS_PER_PAGE
+        )
+        if not history_page.transactions:
             if update.message:
                 await update.message.reply_markdown_v2(
                     msg_no_transactions_for_filter(),
@@ -165,42 +170,40 @@ class AccountHandler:
                 )
             return
 
-        await self._send_transactions_page(update, txs, 1, filter_key)
+        await self._send_transactions_page(update, history_page, 1, filter_key)
 
     async def handle_history_pagination(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         query = update.callback_query
         await query.answer()
-        try:
-            _, filter_key, _, page_str = query.data.split("_")
-            page = int(page_str)
-        except (ValueError, IndexError):
-            filter_key = "all"
-            page = 1
+        filter_key, page, after, before = parse_history_callback(query.data)
 
         telegram_id = str(query.from_user.id)
-        user = self.account_service.get_user_by_telegram(telegram_id)
+        user = await self.account_service.aio.get_user_by_telegram(telegram_id)
         if not user:
             await query.edit_message_text(msg_user_not_found())
             return
 
-        txs = self.account_service.list_transactions(user.id, None if filter_key == "all" else filter_key)
-        await self._send_transactions_page(update, txs, page, filter_key)
+        history_page = await self.account_service.aio.get_transactions_page(
+            user.id, None if filter_key == "all" else filter_key, ITEMS_PER_PAGE, after=after, before=before
+        )
+        await self._send_transactions_page(update, history_page, page, filter_key)
 
     # Internal helper for paginated rendering
-    async def _send_transactions_page(self, update: Update, transactions, page: int, filter_key: str):
-        from math import ceil
-
-        total_pages = max(1, ceil(len(transactions) / ITEMS_PER_PAGE))
-        page = max(1, min(page, total_pages))
-        start_idx = (page - 1) * ITEMS_PER_PAGE
-        end_idx = start_idx + ITEMS_PER_PAGE
-        page_txs = transactions[start_idx:end_idx]
+    async def _send_transactions_page(self, update: Update, history_page, page: int, filter_key: str):
+        # Page numbers travel in the callback data; keep them consistent with what the page is
+        total_pages = max(1, ceil(history_page.total / ITEMS_PER_PAGE))
+        page = max(page, 2) if history_page.has_previous else 1
+        if history_page.total_is_exact:
+            page = min(page, total_pages)
+            total_label = str(total_pages)
+        else:
+            total_label = f"{total_pages}+"
 
-        text = msg_history_page(page_txs, page, total_pages)
-        keyboard = pagination_inline_keyboard(page, total_pages, f"history_{filter_key}")
+        text = msg_history_page(history_page.transactions, page, total_label)
+        keyboard = history_pagination_inline_keyboard(filter_key, page, f"{page}/{total_label}", history_page)
 
         if update.message:
             await update.message.reply_markdown_v2(text, reply_markup=keyboard)
         else:
             query = update.callback_query
-            await query.edit_message_text(text, parse_mode=ParseMode.MARKDOWN_V2, reply_markup=keyboard)
\ No newline at end of file
+            await query.edit_message_text(text, parse_mode=ParseMode.MARKDOWN_V2, reply_markup=keyboard)
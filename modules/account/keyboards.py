@@ -1,3 +1,6 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
 from telegram import ReplyKeyboardMarkup
 from modules.common.keyboards import (
     # button labels
@@ -15,6 +18,7 @@ from modules.common.keyboards import (
     WITHDRAWALS_ONLY_BTN,
     # builders
     pagination_inline_keyboard as _common_pagination_inline_keyboard,
+    cursor_pagination_inline_keyboard,
 )
 
 __all__ = [
@@ -34,6 +38,8 @@ __all__ = [
     # builders
     "history_reply_keyboard",
     "pagination_inline_keyboard",
+    "history_pagination_inline_keyboard",
+    "parse_history_callback",
 ]
 
 
@@ -50,3 +56,57 @@ def history_reply_keyboard() -> ReplyKeyboardMarkup:
 def pagination_inline_keyboard(current_page: int, total_pages: int, callback_prefix: str):
     """Account domain pagination (delegates to common)."""
     return _common_pagination_inline_keyboard(current_page, total_pages, callback_prefix)
+
+
+# History callback data: history_<filter>_<older|newer>_<page>_<created_at>_<id>, where the
+# cursor is the (created_at, id) of the row the page continues from, in base 36 (created_at
+# as UTC microseconds since the epoch) to stay within Telegram's 64 bytes.
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_base36(number: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    encoded = ""
+    while True:
+        number, rem = divmod(number, 36)
+        encoded = digits[rem] + encoded
+        if not number:
+            return encoded
+
+
+def _history_callback(filter_key: str, direction: str, page: int, cursor: Tuple[datetime, int]) -> str:
+    created_at, tx_id = cursor
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+    return f"history_{filter_key}_{direction}_{page}_{_to_base36(micros)}_{_to_base36(tx_id)}"
+
+
+def parse_history_callback(data: str) -> Tuple[str, int, Optional[Tuple[datetime, int]], Optional[Tuple[datetime, int]]]:
+    """Return (filter_key, page, after, before) from history callback data.
+
+    Anything unreadable, including the page-number buttons of older messages, gives the newest page.
+    """
+    try:
+        _, filter_key, direction, page_str, micros, tx_id = data.split("_")
+        cursor = (_EPOCH + timedelta(microseconds=int(micros, 36)), int(tx_id, 36))
+        page = max(1, int(page_str))
+    except (ValueError, OverflowError):
+        parts = data.split("_")
+        return (parts[1] if len(parts) > 1 else "all"), 1, None, None
+    if direction == "older":
+        return filter_key, page, cursor, None
+    return filter_key, page, None, cursor
+
+
+def history_pagination_inline_keyboard(filter_key: str, page: int, page_label: str, history_page):
+    """Previous/next buttons for a TransactionPage, carrying the cursors of its first and last rows."""
+    previous_data = (
+        _history_callback(filter_key, "newer", page - 1, history_page.first_cursor)
+        if history_page.has_previous else None
+    )
+    next_data = (
+        _history_callback(filter_key, "older", page + 1, history_page.last_cursor)
+        if history_page.has_next else None
+    )
+    return cursor_pagination_inline_keyboard(page_label, previous_data, next_data)
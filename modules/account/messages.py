@@ -91,10 +91,11 @@ def msg_no_transactions_for_filter() -> str:
     return "\u2139 _No transactions found for this filter\\._"
 
 
-def msg_history_page(transactions, page: int, total_pages: int) -> str:
+def msg_history_page(transactions, page: int, total_pages) -> str:
+    """`total_pages` may be a label such as "100+" when the history was not counted in full."""
     sep = get_separator()
     lines = [
-        f"📝 *Transaction History* \\(Page {page}/{total_pages}\\)\n",
+        f"📝 *Transaction History* \\(Page {page}/{escape_markdown_v2(str(total_pages))}\\)\n",
         f"{sep}\n",
     ]
 
@@ -12,11 +12,12 @@ class AccountService(SharedUserService):
     # The methods below are inherited from SharedUserService and available for handlers:
     # - get_user_by_telegram(self, telegram_id: str) -> Optional[User]
     # - get_or_create_user(self, telegram_id: str, username: Optional[str] = None) -> User
-    # - generate_unique_referral_code(self) -> str
+    # - referral_code_for(telegram_id: str) -> str
     # - find_sponsor_by_code(self, referral_code: Optional[str]) -> Optional[User]
     # - create_user(...)
     # - get_or_create_wallet_for_user(self, user_id: int)
     # - build_share_link(self, bot_username: str, referral_code: str) -> str
     # - list_transactions(self, user_id: int, filter_key: Optional[str] = None) -> List[Transaction]
+    # - get_transactions_page(self, user_id, filter_key=None, limit=10, after=None, before=None) -> TransactionPage
     pass
 
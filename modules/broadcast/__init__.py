@@ -0,0 +1,6 @@
+from .instances import broadcast_handler, broadcast_sender
+
+__all__ = [
+    "broadcast_handler",
+    "broadcast_sender",
+]
\ No newline at end of file
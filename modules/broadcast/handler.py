@@ -0,0 +1,104 @@
+import asyncio
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes
+
+from core.decorators import require_admin
+from database.models import BroadcastStatus
+from utils.logger import get_logger
+from .messages import (
+    msg_broadcast_usage,
+    msg_broadcast_started,
+    msg_broadcast_status,
+    msg_broadcast_not_found,
+    msg_broadcast_not_running,
+    msg_broadcast_already_sending,
+    msg_broadcast_resumed,
+    msg_broadcast_cancelled,
+)
+
+
+logger = get_logger(__name__)
+
+
+class BroadcastHandler:
+    """Admin commands to message every user. Sending itself is done by BroadcastSender."""
+
+    def __init__(self, broadcast_service, broadcast_sender):
+        self.broadcast_service = broadcast_service
+        self.sender = broadcast_sender
+        self._watcher = None
+
+    @require_admin()
+    async def handle_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/broadcast <message>: start sending the message (its formatting kept) to all users."""
+        # text_markdown_v2 keeps the admin's bold/italic/links as MarkdownV2
+        parts = (update.message.text_markdown_v2 or "").split(maxsplit=1)
+        if len(parts) < 2:
+            await update.message.reply_markdown_v2(msg_broadcast_usage())
+            return
+
+        broadcast = await self.broadcast_service.aio.create_broadcast(parts[1], str(update.effective_user.id))
+        logger.info(f"[Broadcast] #{broadcast.id} created by {broadcast.created_by} for {broadcast.total} users")
+        await self.sender.start(context.bot, broadcast.id)
+        await update.message.reply_markdown_v2(msg_broadcast_started(broadcast))
+
+    @require_admin()
+    async def handle_broadcast_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/broadcast_status [id]: progress of a broadcast, the latest one by default."""
+        broadcast_id = self._broadcast_id(context)
+        if broadcast_id is None:
+            broadcast = await self.broadcast_service.aio.get_latest_broadcast()
+        else:
+            broadcast = await self.broadcast_service.aio.get_broadcast(broadcast_id)
+        if not broadcast:
+            await update.message.reply_markdown_v2(msg_broadcast_not_found())
+            return
+        await update.message.reply_markdown_v2(
+            msg_broadcast_status(broadcast, self.sender.is_sending(broadcast))
+        )
+
+    @require_admin()
+    async def handle_broadcast_cancel(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/broadcast_cancel <id>: stop a running broadcast after the page being sent."""
+        broadcast_id = self._broadcast_id(context)
+        if broadcast_id is None:
+            await update.message.reply_markdown_v2(msg_broadcast_usage())
+            return
+        broadcast = await self.broadcast_service.aio.cancel_broadcast(broadcast_id)
+        if broadcast:
+            await update.message.reply_markdown_v2(msg_broadcast_cancelled(broadcast))
+            return
+        broadcast = await self.broadcast_service.aio.get_broadcast(broadcast_id)
+        if not broadcast:
+            await update.message.reply_markdown_v2(msg_broadcast_not_found())
+        else:
+            await update.message.reply_markdown_v2(msg_broadcast_not_running(broadcast))
+
+    @require_admin()
+    async def handle_broadcast_resume(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/broadcast_resume <id>: continue an interrupted broadcast from its checkpoint."""
+        broadcast_id = self._broadcast_id(context)
+        if broadcast_id is None:
+            await update.message.reply_markdown_v2(msg_broadcast_usage())
+            return
+        broadcast = await self.broadcast_service.aio.get_broadcast(broadcast_id)
+        if not broadcast:
+            await update.message.reply_markdown_v2(msg_broadcast_not_found())
+        elif broadcast.status != BroadcastStatus.running:
+            await update.message.reply_markdown_v2(msg_broadcast_not_running(broadcast))
+        elif not await self.sender.start(context.bot, broadcast.id):
+            await update.message.reply_markdown_v2(msg_broadcast_already_sending(broadcast))
+        else:
+            await update.message.reply_markdown_v2(msg_broadcast_resumed(broadcast))
+
+    async def resume_interrupted(self, application: Application) -> None:
+        """Application post_init hook: resume interrupted broadcasts nobody else is sending, and keep watching."""
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self.sender.watch(application.bot))
+
+    @staticmethod
+    def _broadcast_id(context: ContextTypes.DEFAULT_TYPE):
+        if context.args and context.args[0].lstrip("#").isdigit():
+            return int(context.args[0].lstrip("#"))
+        return None
@@ -0,0 +1,7 @@
+from .handler import BroadcastHandler
+from .sender import BroadcastSender
+from .service import BroadcastService
+
+broadcast_service = BroadcastService()
+broadcast_sender = BroadcastSender(broadcast_service)
+broadcast_handler = BroadcastHandler(broadcast_service, broadcast_sender)
@@ -0,0 +1,73 @@
+# Broadcast-specific message builders (MarkdownV2)
+from database.models import Broadcast, BroadcastStatus
+from utils.telegram import escape_markdown_v2, format_datetime, get_separator
+
+
+def msg_broadcast_usage() -> str:
+    return (
+        "📣 *Broadcast*\n\n"
+        "`/broadcast <message>` sends the message to every user\\.\n"
+        "Formatting of the message is kept\\.\n\n"
+        "`/broadcast_status [id]` shows progress\n"
+        "`/broadcast_cancel <id>` stops a broadcast\n"
+        "`/broadcast_resume <id>` restarts an interrupted one"
+    )
+
+
+def msg_broadcast_started(broadcast: Broadcast) -> str:
+    return (
+        f"📣 *Broadcast \\#{broadcast.id} started*\n\n"
+        f"Recipients: {broadcast.total}\n"
+        f"Use `/broadcast_status {broadcast.id}` to follow it\\."
+    )
+
+
+def msg_broadcast_status(broadcast: Broadcast, sending: bool) -> str:
+    sep = get_separator()
+    processed = broadcast.delivered + broadcast.blocked + broadcast.failed
+    state = broadcast.status.value + (" \\(sending\\)" if sending else "")
+    if broadcast.status == BroadcastStatus.running and not sending:
+        state += " \\(interrupted, use /broadcast\\_resume\\)"
+    return (
+        f"📣 *Broadcast \\#{broadcast.id}*\n"
+        f"{sep}\n\n"
+        f"Status: {state}\n"
+        f"Progress: {processed}/{broadcast.total}\n"
+        f"✅ Delivered: {broadcast.delivered}\n"
+        f"🚫 Blocked: {broadcast.blocked}\n"
+        f"❌ Failed: {broadcast.failed}\n"
+        f"Started: {escape_markdown_v2(format_datetime(broadcast.created_at))}\n"
+        f"Finished: {escape_markdown_v2(format_datetime(broadcast.finished_at))}"
+    )
+
+
+def msg_broadcast_report(broadcast: Broadcast) -> str:
+    return (
+        f"📣 *Broadcast \\#{broadcast.id} {broadcast.status.value}*\n\n"
+        f"✅ Delivered: {broadcast.delivered}\n"
+        f"🚫 Blocked: {broadcast.blocked}\n"
+        f"❌ Failed: {broadcast.failed}"
+    )
+
+
+def msg_broadcast_not_found() -> str:
+    return "❌ *Broadcast not found\\.*"
+
+
+def msg_broadcast_not_running(broadcast: Broadcast) -> str:
+    return f"ℹ️ Broadcast \\#{broadcast.id} is already {broadcast.status.value}\\."
+
+
+def msg_broadcast_already_sending(broadcast: Broadcast) -> str:
+    return f"ℹ️ Broadcast \\#{broadcast.id} is already being sent\\."
+
+
+def msg_broadcast_resumed(broadcast: Broadcast) -> str:
+    return f"▶️ Broadcast \\#{broadcast.id} resumed\\."
+
+
+def msg_broadcast_cancelled(broadcast: Broadcast) -> str:
+    return (
+        f"⏹ *Broadcast \\#{broadcast.id} cancelled*\n\n"
+        f"✅ Delivered so far: {broadcast.delivered}"
+    )
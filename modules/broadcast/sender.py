@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+from collections import Counter
+from datetime import timedelta, timezone
+from typing import Dict
+
+from telegram import Bot
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from config import BROADCAST_CLAIM_LEASE_SECONDS, BROADCAST_CONCURRENCY, BROADCAST_PAGE_SIZE
+from database.models import Broadcast, BroadcastStatus
+from utils.helpers import get_utc_time
+from utils.logger import get_logger
+from utils.telegram.notifier import notify_user
+from utils.telegram.rate_limiter import Priority, retry_after_seconds
+from .messages import msg_broadcast_report
+from .service import BroadcastService
+
+
+logger = get_logger(__name__)
+
+MAX_ATTEMPTS = 3  # per recipient, for network errors and flood control the limiter gave up on
+NETWORK_RETRY_DELAY = 1.0
+
+# Identifies this process in broadcasts.claimed_by
+SENDER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+DELIVERED = "delivered"
+BLOCKED = "blocked"
+FAILED = "failed"
+
+
+class BroadcastSender:
+    """Deliver broadcasts from the bot's event loop, one asyncio task per broadcast.
+
+    - Recipients are read one page (`page_size` users) at a time in users.id order; after each
+      page the cursor and the delivered/blocked/failed counts are saved, so a broadcast
+      interrupted by a restart resumes after the last finished page (a recipient of the
+      unfinished page may get the message twice).
+    - Up to `concurrency` messages are in flight. The pace is set by the bot's rate limiter:
+      broadcasts use background priority, so they never delay replies to users.
+    - Cancelling a broadcast in the database stops its sender at the next checkpoint.
+    - A broadcast is sent by one process at a time: the sender claims it (`claimed_by`) with a
+      lease renewed at every checkpoint. Other processes skip it while the lease holds, and
+      `watch` takes it over once the lease of a sender that died has expired.
+    - DB calls run on the DB thread pool (`aio`) so the event loop keeps serving updates.
+    """
+
+    def __init__(
+        self,
+        broadcast_service: BroadcastService,
+        page_size: int = BROADCAST_PAGE_SIZE,
+        concurrency: int = BROADCAST_CONCURRENCY,
+        lease_seconds: int = BROADCAST_CLAIM_LEASE_SECONDS,
+        sender_id: str = SENDER_ID,
+    ) -> None:
+        self.broadcast_service = broadcast_service
+        self.page_size = max(1, int(page_size))
+        self.concurrency = max(1, int(concurrency))
+        self.lease = timedelta(seconds=max(1, int(lease_seconds)))
+        self.sender_id = sender_id
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def is_running(self, broadcast_id: int) -> bool:
+        task = self._tasks.get(broadcast_id)
+        return task is not None and not task.done()
+
+    def is_sending(self, broadcast: Broadcast) -> bool:
+        """True if this process, or another one holding an unexpired lease, is sending the broadcast."""
+        if self.is_running(broadcast.id):
+            return True
+        lease_until = broadcast.lease_until
+        if broadcast.claimed_by is None or lease_until is None:
+            return False
+        if lease_until.tzinfo is None:  # naive datetimes from the database are UTC
+            lease_until = lease_until.replace(tzinfo=timezone.utc)
+        return lease_until > get_utc_time()
+
+    async def start(self, bot: Bot, broadcast_id: int) -> bool:
+        """Claim the broadcast and send it in the background; False if this or another process is sending it."""
+        if self.is_running(broadcast_id):
+            return False
+        claimed = await self.broadcast_service.aio.claim_broadcast(broadcast_id, self.sender_id, self.lease)
+        if not claimed or self.is_running(broadcast_id):
+            return False
+        self._tasks[broadcast_id] = asyncio.create_task(self._run_safe(bot, broadcast_id))
+        return True
+
+    async def watch(self, bot: Bot) -> None:
+        """Start every running broadcast nobody is sending, now and then once per lease period.
+
+        Picks up broadcasts interrupted by a restart and, once their lease expires, those whose
+        sender died in another process.
+        """
+        interval = self.lease.total_seconds()
+        while True:
+            try:
+                for broadcast in await self.broadcast_service.aio.get_running_broadcasts():
+                    if await self.start(bot, broadcast.id):
+                        logger.info(f"[Broadcast] Resuming #{broadcast.id}")
+            except Exception as e:
+                logger.error(f"[Broadcast] Cannot resume broadcasts: {e}")
+            await asyncio.sleep(interval)
+
+    async def _run_safe(self, bot: Bot, broadcast_id: int) -> None:
+        try:
+            await self.run(bot, broadcast_id)
+        except Exception as e:
+            # Left running: /broadcast_resume or the watcher picks it up from the checkpoint
+            logger.error(f"[Broadcast] #{broadcast_id} stopped: {e}")
+        finally:
+            self._tasks.pop(broadcast_id, None)
+
+    async def run(self, bot: Bot, broadcast_id: int) -> Broadcast | None:
+        """Claim a running broadcast, send it to its remaining recipients and report to its author.
+
+        Returns None without sending if another sender holds the broadcast. The claim is released
+        when the run ends, however it ends.
+        """
+        if not await self.broadcast_service.aio.claim_broadcast(broadcast_id, self.sender_id, self.lease):
+            return await self.broadcast_service.aio.get_broadcast(broadcast_id)
+        try:
+            return await self._send(bot, broadcast_id)
+        finally:
+            try:
+                await self.broadcast_service.aio.release_broadcast(broadcast_id, self.sender_id)
+            except Exception as e:
+                # The lease expires on its own
+                logger.warning(f"[Broadcast] Cannot release #{broadcast_id}: {e}")
+
+    async def _send(self, bot: Bot, broadcast_id: int) -> Broadcast | None:
+        broadcast = await self.broadcast_service.aio.get_broadcast(broadcast_id)
+        if not broadcast or broadcast.status != BroadcastStatus.running:
+            return broadcast
+        logger.info(f"[Broadcast] #{broadcast_id} sending from user id {broadcast.last_user_id}")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def deliver(chat_id: str) -> str:
+            async with semaphore:
+                return await self._deliver(bot, chat_id, broadcast.text)
+
+        cursor = broadcast.last_user_id
+        while True:
+            page = await self.broadcast_service.aio.next_recipients(broadcast, cursor, self.page_size)
+            if not page:
+                break
+            outcomes = Counter(await asyncio.gather(*(deliver(telegram_id) for _, telegram_id in page)))
+            cursor = page[-1][0]
+            status = await self.broadcast_service.aio.checkpoint(
+                broadcast_id, cursor, outcomes[DELIVERED], outcomes[BLOCKED], outcomes[FAILED],
+                self.sender_id, self.lease,
+            )
+            if status is None:
+                logger.warning(f"[Broadcast] #{broadcast_id} taken over by another sender, stopping")
+                return None
+            if status != BroadcastStatus.running:
+                logger.info(f"[Broadcast] #{broadcast_id} {status.value}, stopping")
+                return None
+
+        finished = await self.broadcast_service.aio.finish_broadcast(broadcast_id, self.sender_id)
+        if finished:
+            logger.info(
+                f"[Broadcast] #{broadcast_id} completed: {finished.delivered} delivered, "
+                f"{finished.blocked} blocked, {finished.failed} failed"
+            )
+            await notify_user(finished.created_by, msg_broadcast_report(finished))
+        return finished
+
+    async def _deliver(self, bot: Bot, chat_id: str, text: str) -> str:
+        """Send one message; return DELIVERED, BLOCKED or FAILED."""
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                await bot.send_message(
+                    chat_id=chat_id,
+                    text=text,
+                    parse_mode=ParseMode.MARKDOWN_V2,
+                    rate_limit_args={"priority": Priority.BACKGROUND},
+                )
+                return DELIVERED
+            except RetryAfter as e:
+                # The limiter already paused every send; wait out the remainder and try again
+                await asyncio.sleep(retry_after_seconds(e))
+            except Forbidden:
+                return BLOCKED
+            except BadRequest as e:
+                logger.warning(f"[Broadcast] Cannot send to {chat_id}: {e}")
+                return FAILED
+            except NetworkError as e:
+                if attempt == MAX_ATTEMPTS:
+                    logger.warning(f"[Broadcast] Cannot send to {chat_id}: {e}")
+                    return FAILED
+                await asyncio.sleep(NETWORK_RETRY_DELAY * attempt)
+            except Exception as e:
+                logger.warning(f"[Broadcast] Cannot send to {chat_id}: {e}")
+                return FAILED
+        return FAILED
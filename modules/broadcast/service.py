@@ -0,0 +1,156 @@
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, or_
+
+from shared.base_service import BaseService
+from database.models import Broadcast, BroadcastStatus, User
+from utils.helpers import get_utc_time
+
+
+class BroadcastService(BaseService):
+    """DB/business logic for admin broadcasts (module-scoped service)."""
+
+    def create_broadcast(self, text: str, created_by: str) -> Broadcast:
+        """Record a new broadcast addressed to every active user registered so far."""
+        with self.db() as session:
+            max_user_id, total = (
+                session.query(func.coalesce(func.max(User.id), 0), func.count(User.id))
+                .filter(User.is_active.is_(True))
+                .one()
+            )
+            broadcast = Broadcast(
+                text=text,
+                created_by=created_by,
+                status=BroadcastStatus.running,
+                max_user_id=max_user_id,
+                total=total,
+            )
+            session.add(broadcast)
+            session.commit()
+            session.refresh(broadcast)
+            return broadcast
+
+    def get_broadcast(self, broadcast_id: int) -> Optional[Broadcast]:
+        with self.db() as session:
+            return session.query(Broadcast).get(broadcast_id)
+
+    def get_latest_broadcast(self) -> Optional[Broadcast]:
+        with self.db() as session:
+            return session.query(Broadcast).order_by(Broadcast.id.desc()).first()
+
+    def get_running_broadcasts(self) -> List[Broadcast]:
+        """Broadcasts not finished yet, e.g. interrupted by a restart."""
+        with self.db() as session:
+            return (
+                session.query(Broadcast)
+                .filter(Broadcast.status == BroadcastStatus.running)
+                .order_by(Broadcast.id.asc())
+                .all()
+            )
+
+    def next_recipients(self, broadcast: Broadcast, after_user_id: int, limit: int) -> List[Tuple[int, str]]:
+        """Next page of (user id, telegram_id) after `after_user_id` (keyset pagination on the PK)."""
+        with self.db() as session:
+            rows = (
+                session.query(User.id, User.telegram_id)
+                .filter(
+                    User.id > after_user_id,
+                    User.id <= broadcast.max_user_id,
+                    User.is_active.is_(True),
+                )
+                .order_by(User.id.asc())
+                .limit(limit)
+                .all()
+            )
+            return [(user_id, telegram_id) for user_id, telegram_id in rows]
+
+    def claim_broadcast(self, broadcast_id: int, sender_id: str, lease: timedelta) -> bool:
+        """Lease a running broadcast to `sender_id`; False if another sender holds an unexpired lease.
+
+        Claiming a broadcast already leased to `sender_id` renews its lease.
+        """
+        now = get_utc_time()
+        with self.db() as session:
+            claimed = session.query(Broadcast).filter(
+                Broadcast.id == broadcast_id,
+                Broadcast.status == BroadcastStatus.running,
+                or_(
+                    Broadcast.claimed_by.is_(None),
+                    Broadcast.claimed_by == sender_id,
+                    Broadcast.lease_until < now,
+                ),
+            ).update(
+                {Broadcast.claimed_by: sender_id, Broadcast.lease_until: now + lease},
+                synchronize_session=False,
+            )
+            session.commit()
+            return claimed == 1
+
+    def release_broadcast(self, broadcast_id: int, sender_id: str) -> None:
+        """Drop `sender_id`'s lease so another sender can resume the broadcast right away."""
+        with self.db() as session:
+            session.query(Broadcast).filter(
+                Broadcast.id == broadcast_id, Broadcast.claimed_by == sender_id
+            ).update({Broadcast.claimed_by: None, Broadcast.lease_until: None}, synchronize_session=False)
+            session.commit()
+
+    def checkpoint(
+        self,
+        broadcast_id: int,
+        last_user_id: int,
+        delivered: int,
+        blocked: int,
+        failed: int,
+        sender_id: str,
+        lease: timedelta,
+    ) -> Optional[BroadcastStatus]:
+        """Save progress after a page, renew the lease and return the current status (it may have been cancelled).
+
+        None if `sender_id` lost the broadcast (its lease expired and another sender claimed it):
+        the page is not recorded.
+        """
+        with self.db() as session:
+            saved = session.query(Broadcast).filter(
+                Broadcast.id == broadcast_id, Broadcast.claimed_by == sender_id
+            ).update(
+                {
+                    Broadcast.last_user_id: last_user_id,
+                    Broadcast.delivered: Broadcast.delivered + delivered,
+                    Broadcast.blocked: Broadcast.blocked + blocked,
+                    Broadcast.failed: Broadcast.failed + failed,
+                    Broadcast.lease_until: get_utc_time() + lease,
+                },
+                synchronize_session=False,
+            )
+            session.commit()
+            if not saved:
+                return None
+            return session.query(Broadcast.status).filter(Broadcast.id == broadcast_id).scalar()
+
+    def finish_broadcast(self, broadcast_id: int, sender_id: str) -> Optional[Broadcast]:
+        """Mark a broadcast completed; None if it is not running or `sender_id` lost it."""
+        return self._close(broadcast_id, BroadcastStatus.completed, sender_id)
+
+    def cancel_broadcast(self, broadcast_id: int) -> Optional[Broadcast]:
+        """Stop a running broadcast; its sender notices at the next checkpoint."""
+        return self._close(broadcast_id, BroadcastStatus.cancelled)
+
+    def _close(
+        self, broadcast_id: int, status: BroadcastStatus, sender_id: Optional[str] = None
+    ) -> Optional[Broadcast]:
+        """Move a running broadcast to `status`; None if it is unknown or already finished.
+
+        With `sender_id`, only while that sender holds the broadcast.
+        """
+        with self.db() as session:
+            broadcast = session.query(Broadcast).filter_by(id=broadcast_id).with_for_update().first()
+            if not broadcast or broadcast.status != BroadcastStatus.running:
+                return None
+            if sender_id is not None and broadcast.claimed_by != sender_id:
+                return None
+            broadcast.status = status
+            broadcast.finished_at = get_utc_time()
+            session.commit()
+            session.refresh(broadcast)
+            return broadcast
@@ -55,4 +55,19 @@ def pagination_inline_keyboard(current_page: int, total_pages: int, callback_pre
     if current_page < total_pages:
         nav_buttons.append(InlineKeyboardButton("➡️ Next", callback_data=f"{callback_prefix}_page_{current_page+1}"))
 
-    return InlineKeyboardMarkup([nav_buttons])
\ No newline at end of file
+    return InlineKeyboardMarkup([nav_buttons])
+
+def cursor_pagination_inline_keyboard(
+    page_label: str, previous_data: str | None, next_data: str | None
+) -> InlineKeyboardMarkup:
+    """Pagination keyboard for keyset-paginated lists: the callback data carries the cursors."""
+    nav_buttons = []
+    if previous_data:
+        nav_buttons.append(InlineKeyboardButton("⬅️ Previous", callback_data=previous_data))
+
+    nav_buttons.append(InlineKeyboardButton(f"📄 {page_label}", callback_data="current_page"))
+
+    if next_data:
+        nav_buttons.append(InlineKeyboardButton("➡️ Next", callback_data=next_data))
+
+    return InlineKeyboardMarkup([nav_buttons])
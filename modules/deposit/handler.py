@@ -24,7 +24,7 @@ class DepositHandler:
     async def show_deposit_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         telegram_id = str(update.effective_user.id)
 
-        user = self.deposit_service.get_user_by_telegram(telegram_id)
+        user = await self.deposit_service.aio.get_user_by_telegram(telegram_id)
         if not user:
             await update.message.reply_markdown_v2(
                 msg_deposit_not_registered(),
@@ -32,10 +32,10 @@ class DepositHandler:
             )
             return
 
-        wallet = self.deposit_service.get_wallet_for_user(user.id)
+        wallet = await self.deposit_service.aio.get_wallet_for_user(user.id)
         if not wallet:
             # Create wallet on the fly and inform the user
-            wallet, created = self.deposit_service.get_or_create_wallet(user.id)
+            wallet, created = await self.deposit_service.aio.get_or_create_wallet(user.id)
             if created:
                 await update.message.reply_markdown_v2(
                     msg_deposit_wallet_auto_created(wallet.address),
@@ -49,6 +49,9 @@ class DepositHandler:
                 )
                 return
 
+        # The user is likely about to deposit: poll this wallet every cycle for a while
+        await self.deposit_service.aio.mark_wallet_hot(wallet.id)
+
         # Show the deposit panel with the user's address
         await update.message.reply_markdown_v2(
             msg_deposit_panel(wallet.address),
@@ -1,7 +1,9 @@
+from datetime import timedelta
 from decimal import Decimal
 from typing import Optional, Tuple
 
 from shared.base_service import BaseService
+from shared.user_cache import invalidate_user
 from database.models import (
     User,
     UserWallet,
@@ -10,10 +12,12 @@ from database.models import (
     TransactionType,
     TransactionStatus,
     DepositStatus,
+    WalletScanState,
 )
 from utils.helpers import get_utc_time
 from blockchain.tron_client import generate_wallet
 from utils.encryption import encrypt_text
+from config import DEPOSIT_HOT_MINUTES
 
 
 class DepositService(BaseService):
@@ -56,6 +60,18 @@ class DepositService(BaseService):
         db.refresh(wallet)
         return wallet, True
 
+    def mark_wallet_hot(self, wallet_id: int) -> None:
+        """Poll this wallet every cycle for a while (its owner is about to deposit)."""
+        with self.db() as session:
+            state = session.query(WalletScanState).filter_by(wallet_id=wallet_id).first()
+            if not state:
+                state = WalletScanState(wallet_id=wallet_id)
+                session.add(state)
+            state.hot_until = get_utc_time() + timedelta(minutes=DEPOSIT_HOT_MINUTES)
+            state.next_poll_at = None
+            state.idle_polls = 0
+            session.commit()
+
     # ---- Deposit workflow (for workers and handlers) ----
     def create_deposit(self, user_id: int, wallet_id: int, tx_hash: str, amount: Decimal) -> Deposit:
         """Create a deposit record and a related pending transaction."""
@@ -113,6 +129,7 @@ class DepositService(BaseService):
             tx.tx_hash = tx_hash
 
         self.commit()
+        invalidate_user(user_id=dep.user_id)
         return dep
 
     def fail_deposit(self, tx_hash: str, reason: str) -> Optional[Deposit]:
@@ -7,7 +7,7 @@ from modules.referral.messages import (
     msg_referral_overview,
     msg_referral_info_single_level,
 )
-from modules.referral.services import referral_service
+from modules.referral.service import referral_service
 from bot.utils import format_trx
 from config import REFERRAL_RATE
 from utils.helpers import generate_share_link
@@ -19,7 +19,7 @@ class ReferralHandler:
         await self.show_referral_overview(update, context)
     
     async def show_referral_overview(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        user = referral_service.get_user_by_telegram(str(update.effective_user.id))
+        user = await referral_service.aio.get_user_by_telegram(str(update.effective_user.id))
         if not user:
             await update.message.reply_markdown_v2(
                 msg_not_registered_prompt_start(),
@@ -27,12 +27,10 @@ class ReferralHandler:
             )
             return
 
-        direct_refs = referral_service.get_direct_referrals(user.id)
-        total_referrals = str(len(direct_refs))
-
-        summary = referral_service.summarize_commissions(user.id)
-        total_paid_trx = format_trx(summary.get("total_paid", 0.0))
-        total_pending_trx = format_trx(summary.get("total_pending", 0.0))
+        stats = await referral_service.aio.get_referral_stats(user.id)
+        total_referrals = str(stats["referrals"])
+        total_paid_trx = format_trx(stats["total_paid"])
+        total_pending_trx = format_trx(stats["total_pending"])
 
         bot_username = context.bot.username
         share_link = generate_share_link(bot_username, user.referral_code)
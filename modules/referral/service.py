@@ -1,7 +1,8 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 
 from shared.base_service import BaseService
-from database.models import User, ReferralCommission, CommissionStatus
+from shared.referral_stats import aggregate_referral_stats, rebuild_referral_stats, stats_to_dict
+from database.models import User, ReferralStats
 
 
 class ReferralService(BaseService):
@@ -14,27 +15,28 @@ class ReferralService(BaseService):
         with self.db() as session:
             return session.query(User).filter(User.sponsor_id == user_id).all()
 
+    def get_referral_stats(self, user_id: int) -> Dict[str, Union[int, float]]:
+        """{"referrals", "total_paid", "total_pending"} from the sponsor's running totals (one row).
+
+        Users without a row (no referral or commission counted yet) get the aggregate query.
+        """
+        with self.db() as session:
+            stats = session.query(ReferralStats).filter_by(user_id=user_id).first()
+            if stats:
+                return stats_to_dict(stats)
+            return aggregate_referral_stats(session, user_id)
+
     def summarize_commissions(self, user_id: int) -> Dict[str, float]:
         with self.db() as session:
-            paid = (
-                session.query(ReferralCommission)
-                .filter(
-                    ReferralCommission.user_id == user_id,
-                    ReferralCommission.status == CommissionStatus.paid,
-                )
-                .all()
-            )
-            pending = (
-                session.query(ReferralCommission)
-                .filter(
-                    ReferralCommission.user_id == user_id,
-                    ReferralCommission.status == CommissionStatus.pending,
-                )
-                .all()
-            )
-        total_paid = float(sum(c.amount_trx for c in paid)) if paid else 0.0
-        total_pending = float(sum(c.amount_trx for c in pending)) if pending else 0.0
-        return {"total_paid": total_paid, "total_pending": total_pending}
-
-
-referral_service = ReferralService()
\ No newline at end of file
+            stats = aggregate_referral_stats(session, user_id)
+        return {"total_paid": stats["total_paid"], "total_pending": stats["total_pending"]}
+
+    def rebuild_referral_stats(self, user_id: int) -> Dict[str, Union[int, float]]:
+        """Recompute a sponsor's running totals from their referrals and commissions."""
+        with self.db() as session:
+            rebuild_referral_stats(session, user_id)
+            session.commit()
+            return aggregate_referral_stats(session, user_id)
+
+
+referral_service = ReferralService()
@@ -37,7 +37,7 @@ from .messages import (
 
 from bot.utils import format_trx
 from config import DAILY_WITHDRAWAL_LIMIT, MIN_WITHDRAWAL_AMOUNT, WITHDRAWAL_FEE_RATE
-from.service import WithdrawalService
+from.service import DailyLimitExceeded, WithdrawalService
 
 
 class WithdrawalHandler:
@@ -66,7 +66,7 @@ class WithdrawalHandler:
     # ==============================
     async def start_withdraw(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         telegram_id = str(update.effective_user.id)
-        user = self.withdrawal_service.get_user_by_telegram(telegram_id)
+        user = await self.withdrawal_service.aio.get_user_by_telegram(telegram_id)
         if not user:
             await update.message.reply_markdown_v2("❌ *You are not registered\\.* Use /start to register\\.")
             return
@@ -140,7 +140,7 @@ class WithdrawalHandler:
             )
             return
 
-        user = self.withdrawal_service.get_user_by_telegram(str(update.effective_user.id))
+        user = await self.withdrawal_service.aio.get_user_by_telegram(str(update.effective_user.id))
         if not user or Decimal(user.account_balance) < amount:
             await update.message.reply_markdown_v2(msg_insufficient_balance())
             return
@@ -176,34 +176,42 @@ class WithdrawalHandler:
         amount = state.get("amount")
         address = state.get("address")
 
-        user = self.withdrawal_service.get_user_by_telegram(str(update.effective_user.id))
+        user = await self.withdrawal_service.aio.get_user_by_telegram(str(update.effective_user.id))
         if not user or Decimal(user.account_balance) < amount:
             await update.message.reply_markdown_v2(msg_insufficient_balance())
             self._reset_state(context)
             await update.message.reply_markdown_v2(MAIN_MENU_BTN, reply_markup=main_reply_keyboard())
             return
 
-        daily_withdrawals = self.withdrawal_service.get_daily_withdrawals(user.id)
-        total_daily_withdrawn = sum(Decimal(str(w.amount_trx)) for w in daily_withdrawals)
-        remaining_limit = Decimal(str(DAILY_WITHDRAWAL_LIMIT)) - Decimal(str(total_daily_withdrawn))
+        total_daily_withdrawn = await self.withdrawal_service.aio.get_daily_withdrawn(user.id)
+        remaining_limit = Decimal(str(DAILY_WITHDRAWAL_LIMIT)) - total_daily_withdrawn
 
-        if amount > remaining_limit:
+        try:
+            if amount > remaining_limit:
+                raise DailyLimitExceeded(total_daily_withdrawn)
+            # The service checks the limit and the balance again, atomically
+            withdrawal = await self.withdrawal_service.aio.create_withdrawal(user.id, amount, address)
+        except DailyLimitExceeded as e:
             await update.message.reply_markdown_v2(
                 msg_daily_limit_exceeded(
                     format_trx(DAILY_WITHDRAWAL_LIMIT),
-                    format_trx(total_daily_withdrawn),
-                    format_trx(remaining_limit),
+                    format_trx(e.withdrawn_today),
+                    format_trx(Decimal(str(DAILY_WITHDRAWAL_LIMIT)) - e.withdrawn_today),
                     format_trx(amount),
                 )
             )
             self._reset_state(context)
             await update.message.reply_markdown_v2(MAIN_MENU_BTN, reply_markup=main_reply_keyboard())
             return
+        except ValueError:
+            await update.message.reply_markdown_v2(msg_insufficient_balance())
+            self._reset_state(context)
+            await update.message.reply_markdown_v2(MAIN_MENU_BTN, reply_markup=main_reply_keyboard())
+            return
+        await self.withdrawal_service.aio.create_withdrawal_transaction(user.id, amount, withdrawal.id)
+        remaining_limit -= amount
 
-        withdrawal = self.withdrawal_service.create_withdrawal(user.id, amount, address)
-        self.withdrawal_service.create_withdrawal_transaction(user.id, amount, withdrawal.id)
-
-        msg = msg_withdraw_submitted(format_trx(amount), format_trx(remaining_limit - amount))
+        msg = msg_withdraw_submitted(format_trx(amount), format_trx(remaining_limit))
         await update.message.reply_markdown_v2(msg)
 
         self._reset_state(context)
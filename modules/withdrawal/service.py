@@ -1,8 +1,15 @@
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, bindparam, or_, update
 
 from shared.base_service import BaseService
+from database.database import dialect_insert
+from shared.user_cache import invalidate_user
 from database.models import (
+    DailyWithdrawalCounter,
     User,
     Withdrawal,
     WithdrawalStatus,
@@ -15,6 +22,21 @@ from config import DAILY_WITHDRAWAL_LIMIT, MIN_WITHDRAWAL_AMOUNT, WITHDRAWAL_FEE
 from utils.validators import is_valid_tron_address
 
 
+@dataclass(frozen=True)
+class Settlement:
+    """Outcome of a withdrawal's transaction: completed, or failed with a reason"""
+    tx_hash: Optional[str]
+    failure: Optional[str] = None
+
+
+class DailyLimitExceeded(ValueError):
+    """The withdrawal would take the user past DAILY_WITHDRAWAL_LIMIT for today"""
+
+    def __init__(self, withdrawn_today: Decimal) -> None:
+        super().__init__("Daily withdrawal limit exceeded")
+        self.withdrawn_today = withdrawn_today
+
+
 class WithdrawalService(BaseService):
     """DB/business logic for withdrawals (module-scoped service)."""
 
@@ -25,6 +47,14 @@ class WithdrawalService(BaseService):
     def get_user_by_id(self, user_id: int) -> Optional[User]:  # type: ignore[override]
         return super().get_user_by_id(user_id)
 
+    def get_users_by_ids(self, user_ids: Iterable[int]) -> Dict[int, User]:
+        """Fetch many users in one query."""
+        ids = list(set(user_ids))
+        if not ids:
+            return {}
+        with self.db() as session:
+            return {user.id: user for user in session.query(User).filter(User.id.in_(ids))}
+
     # ---- Queries ----
     def get_daily_withdrawals(self, user_id: int) -> List[Withdrawal]:
         with self.db() as session:
@@ -39,39 +69,153 @@ class WithdrawalService(BaseService):
                 .all()
             )
 
+    def get_daily_withdrawn(self, user_id: int) -> Decimal:
+        """Amount counted towards the user's limit today (one row of daily_withdrawal_counters)."""
+        with self.db() as session:
+            amount = (
+                session.query(DailyWithdrawalCounter.amount_trx)
+                .filter_by(user_id=user_id, day=get_utc_date())
+                .scalar()
+            )
+            return Decimal(amount or 0)
+
     def list_pending_withdrawals(self) -> List[Withdrawal]:
+        """Withdrawals not sent yet."""
+        with self.db() as session:
+            return (
+                session.query(Withdrawal)
+                .filter(Withdrawal.status == WithdrawalStatus.pending)
+                .order_by(Withdrawal.id.asc())
+                .all()
+            )
+
+    def list_inflight_withdrawals(self) -> List[Withdrawal]:
+        """Withdrawals whose signed transaction was saved, awaiting broadcast or confirmation."""
         with self.db() as session:
             return (
                 session.query(Withdrawal)
-                .filter(Withdrawal.status.in_([WithdrawalStatus.pending, WithdrawalStatus.processing]))
+                .filter(Withdrawal.status == WithdrawalStatus.processing)
+                .order_by(Withdrawal.id.asc())
                 .all()
             )
 
+    # ---- Claiming (processors may run in parallel) ----
+    def _claim(self, criteria, worker_id: str, limit: int, lease: timedelta) -> List[Withdrawal]:
+        """Lock up to `limit` matching rows, skipping rows locked by other workers, and lease them."""
+        now = get_utc_time()
+        with self.db() as session:
+            try:
+                rows = (
+                    session.query(Withdrawal)
+                    .filter(criteria(now))
+                    .order_by(Withdrawal.id.asc())
+                    .limit(limit)
+                    .with_for_update(skip_locked=True)
+                    .all()
+                )
+                for wd in rows:
+                    wd.status = WithdrawalStatus.processing
+                    wd.claimed_by = worker_id
+                    wd.lease_until = now + lease
+                session.flush()
+                session.expunge_all()  # keep the loaded values readable once the session is closed
+                session.commit()
+                return rows
+            except Exception:
+                session.rollback()
+                raise
+
+    def claim_pending_withdrawals(self, worker_id: str, limit: int, lease: timedelta) -> List[Withdrawal]:
+        """Atomically move up to `limit` unsent withdrawals to processing for `worker_id`.
+
+        Rows are locked with FOR UPDATE SKIP LOCKED, so concurrent processors never claim the
+        same withdrawal. Claimed rows that were never signed (the worker died first) are claimed
+        again once their lease expires.
+        """
+        return self._claim(
+            lambda now: or_(
+                Withdrawal.status == WithdrawalStatus.pending,
+                and_(
+                    Withdrawal.status == WithdrawalStatus.processing,
+                    Withdrawal.signed_tx.is_(None),
+                    or_(Withdrawal.lease_until.is_(None), Withdrawal.lease_until < now),
+                ),
+            ),
+            worker_id, limit, lease,
+        )
+
+    def claim_abandoned_withdrawals(self, worker_id: str, limit: int, lease: timedelta) -> List[Withdrawal]:
+        """Claim signed in-flight withdrawals whose owner stopped tracking them (lease expired)."""
+        return self._claim(
+            lambda now: and_(
+                Withdrawal.status == WithdrawalStatus.processing,
+                Withdrawal.signed_tx.isnot(None),
+                or_(Withdrawal.lease_until.is_(None), Withdrawal.lease_until < now),
+            ),
+            worker_id, limit, lease,
+        )
+
     # ---- Mutations ----
     def create_withdrawal(self, user_id: int, amount: Decimal, to_address: str) -> Withdrawal:
-        db = self.get_db()
-        user = db.query(User).get(user_id)
-        if not user:
-            raise ValueError("User not found")
-        if Decimal(user.account_balance) < amount:
-            raise ValueError("Insufficient balance")
+        """Count the amount towards today's limit, deduct it from the balance and record the withdrawal.
 
-        fee_rate = Decimal(str(WITHDRAWAL_FEE_RATE))
-        fee = amount * fee_rate
+        Everything happens in one commit with conditional SQL updates: concurrent submissions by
+        the same user can neither exceed DAILY_WITHDRAWAL_LIMIT nor overdraw the balance.
+        Raises DailyLimitExceeded, or ValueError when the user is unknown or the balance too low.
+        """
+        db = self.get_db()
+        now = get_utc_time()
+        limit = Decimal(str(DAILY_WITHDRAWAL_LIMIT))
+        try:
+            # Deduct immediately (refunds handled on failure); the user row lock serializes the user
+            deducted = db.execute(
+                update(User)
+                .where(User.id == user_id, User.account_balance >= amount)
+                .values(account_balance=User.account_balance - amount)
+            ).rowcount
+            if not deducted:
+                exists = db.query(User.id).filter_by(id=user_id).first()
+                raise ValueError("Insufficient balance" if exists else "User not found")
 
-        # Deduct immediately; refunds handled on failure
-        user.account_balance -= amount
+            # Upsert today's counter unless it would pass the limit
+            counted = None
+            if amount <= limit:
+                counted = db.execute(
+                    dialect_insert(db, DailyWithdrawalCounter)
+                    .values(
+                        user_id=user_id, day=now.date(), amount_trx=amount, withdrawals=1,
+                        created_at=now, updated_at=now,
+                    )
+                    .on_conflict_do_update(
+                        index_elements=["user_id", "day"],
+                        set_={
+                            "amount_trx": DailyWithdrawalCounter.amount_trx + amount,
+                            "withdrawals": DailyWithdrawalCounter.withdrawals + 1,
+                            "updated_at": now,
+                        },
+                        where=DailyWithdrawalCounter.amount_trx + amount <= limit,
+                    )
+                    .returning(DailyWithdrawalCounter.id)
+                ).first()
+            if counted is None:
+                db.rollback()
+                raise DailyLimitExceeded(self.get_daily_withdrawn(user_id))
 
-        wd = Withdrawal(
-            user_id=user_id,
-            amount_trx=amount,
-            fee_trx=fee,
-            to_address=to_address,
-            status=WithdrawalStatus.pending,
-            created_at=get_utc_time(),
-        )
-        db.add(wd)
-        self.commit()
+            fee_rate = Decimal(str(WITHDRAWAL_FEE_RATE))
+            wd = Withdrawal(
+                user_id=user_id,
+                amount_trx=amount,
+                fee_trx=amount * fee_rate,
+                to_address=to_address,
+                status=WithdrawalStatus.pending,
+                created_at=now,
+            )
+            db.add(wd)
+            self.commit()
+        except Exception:
+            db.rollback()
+            raise
+        invalidate_user(user_id=user_id)
         db.refresh(wd)
         return wd
 
@@ -90,49 +234,218 @@ class WithdrawalService(BaseService):
         db.refresh(tx)
         return tx
 
-    def complete_withdrawal(self, user_id: int, withdrawal_id: int, amount_trx: Decimal, tx_hash: str) -> None:
-        """Mark withdrawal completed and update related records."""
-        db = self.get_db()
-        wd = db.query(Withdrawal).get(withdrawal_id)
-        user = db.query(User).get(user_id)
-        if not wd or not user:
-            raise ValueError("Withdrawal or User not found")
+    def mark_withdrawals_signed(
+        self,
+        signed: Dict[int, Tuple[str, str, datetime]],
+        worker_id: str,
+        lease_margin: timedelta = timedelta(0),
+    ) -> Set[int]:
+        """Save {withdrawal_id: (txid, signed_tx_json, expires_at)} in one commit, before broadcasting.
 
-        wd.tx_hash = tx_hash
-        wd.status = WithdrawalStatus.completed
-        wd.processed_at = get_utc_time()
-
-        user.total_withdrawn += Decimal(amount_trx)
-
-        tx_record = (
-            db.query(Transaction)
-            .filter_by(reference_id=str(withdrawal_id), type=TransactionType.withdrawal)
-            .first()
-        )
-        if tx_record:
-            tx_record.description = f"Withdrawal {tx_hash}"
+        Only withdrawals still claimed by `worker_id` are saved; their ids are returned, and only
+        those may be broadcast. The lease is extended to the transaction's expiration plus
+        `lease_margin`: until then the signing worker is the one expected to track and settle it.
+        """
+        if not signed:
+            return set()
+        db = self.get_db()
+        saved = set()
+        rows = db.query(Withdrawal).filter(
+            Withdrawal.id.in_(list(signed)), Withdrawal.claimed_by == worker_id
+        ).with_for_update().all()
+        for wd in rows:
+            wd.tx_hash, wd.signed_tx, wd.tx_expires_at = signed[wd.id]
+            wd.status = WithdrawalStatus.processing
+            wd.lease_until = wd.tx_expires_at + lease_margin
+            saved.add(wd.id)
         self.commit()
+        return saved
+
+    def reset_withdrawal(self, withdrawal_id: int, txid: Optional[str], worker_id: str) -> bool:
+        """Put back an in-flight withdrawal whose transaction `txid` expired without reaching the chain.
 
-    def fail_withdrawal(self, withdrawal_id: int, user_id: int, reason: str, tx_hash: Optional[str] = None) -> None:
-        """Mark withdrawal as failed and refund balance; update transaction description."""
+        Nothing happens (False) once the withdrawal carries another transaction (it was already
+        reset and signed again), with `txid` None once it has been signed, or once another worker
+        has claimed it.
+        """
         db = self.get_db()
-        wd = db.query(Withdrawal).get(withdrawal_id)
-        user = db.query(User).get(user_id)
-        if not wd or not user:
-            raise ValueError("Withdrawal or User not found")
-
-        user.account_balance += wd.amount_trx + wd.fee_trx
-        wd.status = WithdrawalStatus.failed
-
-        tx_record = (
-            db.query(Transaction)
-            .filter_by(reference_id=str(withdrawal_id), type=TransactionType.withdrawal)
-            .first()
-        )
-        if tx_record:
-            suffix = f" (tx {tx_hash})" if tx_hash else ""
-            tx_record.description = f"Withdrawal failed: {reason}{suffix}"
+        wd = db.query(Withdrawal).filter_by(id=withdrawal_id).with_for_update().first()
+        if (
+            not wd
+            or wd.status != WithdrawalStatus.processing
+            or wd.tx_hash != txid
+            or wd.claimed_by != worker_id
+        ):
+            db.rollback()
+            return False
+        wd.tx_hash = None
+        wd.signed_tx = None
+        wd.tx_expires_at = None
+        wd.claimed_by = None
+        wd.lease_until = None
+        wd.status = WithdrawalStatus.pending
         self.commit()
+        return True
+
+    def settle_withdrawals(
+        self, outcomes: Dict[int, Settlement], worker_id: Optional[str] = None
+    ) -> Dict[int, WithdrawalStatus]:
+        """Complete or fail a batch of withdrawals in one session and one commit.
+
+        Withdrawals are locked (FOR UPDATE) and only those still unsettled are touched, so a
+        retried or concurrent settlement never counts or refunds twice. An outcome is dropped
+        when the withdrawal no longer carries its transaction (`tx_hash`): it was reset and
+        signed again, and only the newer transaction settles it. With `worker_id`, withdrawals
+        claimed by another worker (this one's lease lapsed and it took over) are dropped too. Failures refund
+        amount + fee; user balances are updated with SQL increments so concurrent balance
+        changes are not overwritten. The withdrawal ledger entries and the daily withdrawal
+        counters (failed amounts stop counting) are updated in the same commit.
+        Returns {withdrawal_id: new status} for the withdrawals settled by this call.
+        """
+        if not outcomes:
+            return {}
+        now = get_utc_time()
+        settled: Dict[int, WithdrawalStatus] = {}
+        with self.db() as session:
+            try:
+                withdrawals = (
+                    session.query(Withdrawal)
+                    .filter(Withdrawal.id.in_(list(outcomes)))
+                    .order_by(Withdrawal.id.asc())
+                    .with_for_update()
+                    .all()
+                )
+                ledger = {
+                    tx.reference_id: tx
+                    for tx in session.query(Transaction).filter(
+                        Transaction.type == TransactionType.withdrawal,
+                        Transaction.reference_id.in_([str(wd.id) for wd in withdrawals]),
+                    )
+                }
+                completed, failed, ledger_rows = [], [], []
+                withdrawn: Dict[int, Decimal] = {}
+                refunds: Dict[int, Decimal] = {}
+                uncounted: Dict[Tuple[int, date], List] = {}  # (user, day) -> [amount, withdrawals]
+                for wd in withdrawals:
+                    if wd.status in (WithdrawalStatus.completed, WithdrawalStatus.failed):
+                        continue  # already settled (e.g. by a re-tracked transaction)
+                    outcome = outcomes[wd.id]
+                    if wd.tx_hash != outcome.tx_hash:
+                        continue  # stale outcome of a transaction the withdrawal was rebuilt from
+                    if worker_id is not None and wd.claimed_by != worker_id:
+                        continue  # taken over by another worker, which settles it
+                    tx_record = ledger.get(str(wd.id))
+                    if outcome.failure is None:
+                        completed.append({"b_id": wd.id, "b_tx_hash": outcome.tx_hash})
+                        withdrawn[wd.user_id] = withdrawn.get(wd.user_id, Decimal(0)) + Decimal(wd.amount_trx)
+                        settled[wd.id] = WithdrawalStatus.completed
+                        if tx_record:
+                            ledger_rows.append({
+                                "b_id": tx_record.id,
+                                "b_status": TransactionStatus.completed,
+                                "b_tx_hash": outcome.tx_hash,
+                                "b_description": f"Withdrawal {outcome.tx_hash}",
+                            })
+                    else:
+                        failed.append({"b_id": wd.id})
+                        refunds[wd.user_id] = refunds.get(wd.user_id, Decimal(0)) + wd.amount_trx + wd.fee_trx
+                        day = uncounted.setdefault((wd.user_id, wd.created_at.date()), [Decimal(0), 0])
+                        day[0] += Decimal(wd.amount_trx)
+                        day[1] += 1
+                        settled[wd.id] = WithdrawalStatus.failed
+                        if tx_record:
+                            suffix = f" (tx {outcome.tx_hash})" if outcome.tx_hash else ""
+                            ledger_rows.append({
+                                "b_id": tx_record.id,
+                                "b_status": TransactionStatus.failed,
+                                "b_tx_hash": tx_record.tx_hash,
+                                "b_description": f"Withdrawal failed: {outcome.failure}{suffix}",
+                            })
+
+                # One executemany per statement, however many rows and users are in the batch
+                conn = session.connection()
+                if completed:
+                    conn.execute(
+                        update(Withdrawal)
+                        .where(Withdrawal.id == bindparam("b_id"))
+                        .values(status=WithdrawalStatus.completed, tx_hash=bindparam("b_tx_hash"), processed_at=now),
+                        completed,
+                    )
+                if failed:
+                    conn.execute(
+                        update(Withdrawal).where(Withdrawal.id == bindparam("b_id")).values(status=WithdrawalStatus.failed),
+                        failed,
+                    )
+                if ledger_rows:
+                    conn.execute(
+                        update(Transaction)
+                        .where(Transaction.id == bindparam("b_id"))
+                        .values(
+                            status=bindparam("b_status"),
+                            tx_hash=bindparam("b_tx_hash"),
+                            description=bindparam("b_description"),
+                        ),
+                        ledger_rows,
+                    )
+                if withdrawn:
+                    conn.execute(
+                        update(User)
+                        .where(User.id == bindparam("b_id"))
+                        .values(total_withdrawn=User.total_withdrawn + bindparam("b_amount")),
+                        [{"b_id": user_id, "b_amount": amount} for user_id, amount in withdrawn.items()],
+                    )
+                if refunds:
+                    conn.execute(
+                        update(User)
+                        .where(User.id == bindparam("b_id"))
+                        .values(account_balance=User.account_balance + bindparam("b_amount")),
+                        [{"b_id": user_id, "b_amount": amount} for user_id, amount in refunds.items()],
+                    )
+                if uncounted:
+                    # Failed withdrawals no longer count towards the daily limit of the day they were made
+                    conn.execute(
+                        update(DailyWithdrawalCounter)
+                        .where(
+                            DailyWithdrawalCounter.user_id == bindparam("b_user_id"),
+                            DailyWithdrawalCounter.day == bindparam("b_day"),
+                        )
+                        .values(
+                            amount_trx=DailyWithdrawalCounter.amount_trx - bindparam("b_amount"),
+                            withdrawals=DailyWithdrawalCounter.withdrawals - bindparam("b_count"),
+                            updated_at=now,
+                        ),
+                        [
+                            {"b_user_id": user_id, "b_day": day, "b_amount": amount, "b_count": count}
+                            for (user_id, day), (amount, count) in uncounted.items()
+                        ],
+                    )
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+        for user_id in set(withdrawn) | set(refunds):
+            invalidate_user(user_id=user_id)
+        return settled
+
+    def complete_withdrawal(self, user_id: int, withdrawal_id: int, amount_trx: Decimal, tx_hash: str) -> None:
+        """Mark withdrawal completed and update related records."""
+        self.settle_withdrawals({withdrawal_id: Settlement(tx_hash)})
+
+    def fail_withdrawal(
+        self,
+        withdrawal_id: int,
+        user_id: int,
+        reason: str,
+        tx_hash: Optional[str] = None,
+        worker_id: Optional[str] = None,
+    ) -> bool:
+        """Mark withdrawal as failed and refund balance; update transaction description.
+
+        With `worker_id`, only while that worker holds the withdrawal's claim. Returns False
+        when nothing was changed.
+        """
+        settled = self.settle_withdrawals({withdrawal_id: Settlement(tx_hash, failure=reason)}, worker_id)
+        return withdrawal_id in settled
 
     # ---- Validation/helpers ----
     @staticmethod
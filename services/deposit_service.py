@@ -1,19 +1,39 @@
+import random
+from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
 
-from database.database import get_db_session
+from database.database import get_db_session, dialect_insert
 from database.models import (
     User,
     UserWallet,
     Deposit,
     DepositStatus,
+    ChainCursor,
+    WalletScanState,
     Transaction,
     TransactionType,
     TransactionStatus,
 )
 from services.wallet_service import get_wallet
+from shared.user_cache import invalidate_user
 from utils.helpers import get_utc_time
-from config import TELEGRAM_ADMIN_ID
+from sqlalchemy import or_
+
+from config import TELEGRAM_ADMIN_ID, DEPOSIT_CHECK_INTERVAL, DEPOSIT_HOT_MINUTES, DEPOSIT_COLD_MAX_MINUTES
+
+
+# Max tx hashes per IN (...) lookup or multi-row INSERT
+TX_HASH_BATCH_SIZE = 1000
+
+
+def dormant_poll_delay(idle_polls: int) -> timedelta:
+    """Wait before polling a dormant wallet again: the check interval doubled per empty poll, capped.
+
+    Up to 25% jitter spreads dormant wallets over time instead of polling them all in the same cycle.
+    """
+    minutes = min(DEPOSIT_CHECK_INTERVAL * 2 ** min(idle_polls, 16), DEPOSIT_COLD_MAX_MINUTES)
+    return timedelta(minutes=minutes * random.uniform(0.75, 1.0))
 
 
 class DepositService:
@@ -30,9 +50,129 @@ class DepositService:
 
     # -------- Added helpers for deposit monitor --------
     @staticmethod
-    def list_user_wallets() -> List[UserWallet]:
+    def list_user_wallets(shard: Optional[int] = None, shard_count: int = 1) -> List[UserWallet]:
+        """Return every wallet, or only those of `shard` (wallet id modulo `shard_count`)."""
+        with get_db_session() as session:
+            query = session.query(UserWallet)
+            if shard is not None:
+                query = query.filter(UserWallet.id % shard_count == shard)
+            return query.all()
+
+    # -------- Block follower cursor --------
+    @staticmethod
+    def get_chain_cursor(name: str) -> Optional[int]:
+        """Return the last processed block number for a cursor, if any."""
+        with get_db_session() as session:
+            cursor = session.query(ChainCursor).filter_by(name=name).first()
+            return cursor.block_number if cursor else None
+
+    @staticmethod
+    def save_chain_cursor(name: str, block_number: int) -> None:
+        """Persist the last processed block number for a cursor."""
+        with get_db_session() as session:
+            try:
+                cursor = session.query(ChainCursor).filter_by(name=name).first()
+                if cursor:
+                    cursor.block_number = block_number
+                else:
+                    session.add(ChainCursor(name=name, block_number=block_number))
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+
+    # -------- Per-wallet scan cursors --------
+    @staticmethod
+    def get_wallet_scan_cursors(
+        shard: Optional[int] = None, shard_count: int = 1
+    ) -> Dict[int, Tuple[Optional[int], FrozenSet[str]]]:
+        """Return {wallet_id: (last_timestamp, txIDs processed at last_timestamp)} for every scanned wallet (of `shard`)."""
+        with get_db_session() as session:
+            query = session.query(
+                WalletScanState.wallet_id,
+                WalletScanState.last_timestamp,
+                WalletScanState.boundary_tx_hashes,
+            )
+            if shard is not None:
+                query = query.filter(WalletScanState.wallet_id % shard_count == shard)
+            rows = query.all()
+            return {wallet_id: (ts, frozenset((hashes or "").split())) for wallet_id, ts, hashes in rows}
+
+    @staticmethod
+    def save_wallet_scan_cursor(
+        wallet_id: int, last_timestamp: int, tx_hashes: Iterable[str], deposit: bool = True
+    ) -> None:
+        """Move a wallet's scan cursor to its newest processed transactions, those at `last_timestamp`.
+
+        When the cursor already stands at that timestamp, `tx_hashes` add to its boundary set.
+        `deposit` is False when only other transactions (no TRX transfer) moved the cursor: the
+        wallet's polling tier is left alone.
+        """
+        with get_db_session() as session:
+            try:
+                state = session.query(WalletScanState).filter_by(wallet_id=wallet_id).first()
+                if not state:
+                    state = WalletScanState(wallet_id=wallet_id)
+                    session.add(state)
+                hashes = set(tx_hashes)
+                if state.last_timestamp == last_timestamp:
+                    hashes.update((state.boundary_tx_hashes or "").split())
+                state.last_timestamp = last_timestamp
+                state.boundary_tx_hashes = " ".join(sorted(hashes))
+                if deposit:
+                    # A deposit just arrived: keep polling this wallet every cycle for a while
+                    state.hot_until = get_utc_time() + timedelta(minutes=DEPOSIT_HOT_MINUTES)
+                    state.next_poll_at = None
+                    state.idle_polls = 0
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+
+    # -------- Polling tiers --------
+    @staticmethod
+    def list_wallets_due(shard: Optional[int] = None, shard_count: int = 1, now: Optional[datetime] = None) -> List[UserWallet]:
+        """Return the wallets to poll this cycle: hot, never scanned, or dormant and due."""
+        now = now or get_utc_time()
         with get_db_session() as session:
-            return session.query(UserWallet).all()
+            query = (
+                session.query(UserWallet)
+                .outerjoin(WalletScanState, WalletScanState.wallet_id == UserWallet.id)
+                .filter(or_(WalletScanState.next_poll_at.is_(None), WalletScanState.next_poll_at <= now))
+            )
+            if shard is not None:
+                query = query.filter(UserWallet.id % shard_count == shard)
+            return query.all()
+
+    @staticmethod
+    def record_idle_polls(wallet_ids: Iterable[int], now: Optional[datetime] = None) -> None:
+        """Push back the next poll of wallets that returned nothing (hot wallets stay due every cycle)."""
+        now = now or get_utc_time()
+        ids = list(wallet_ids)
+        with get_db_session() as session:
+            try:
+                for start in range(0, len(ids), TX_HASH_BATCH_SIZE):
+                    chunk = ids[start:start + TX_HASH_BATCH_SIZE]
+                    rows = (
+                        session.query(WalletScanState, WalletScanState.hot_until > now)
+                        .filter(WalletScanState.wallet_id.in_(chunk))
+                        .all()
+                    )
+                    seen = set()
+                    for state, hot in rows:
+                        seen.add(state.wallet_id)
+                        if hot:
+                            continue
+                        state.idle_polls = (state.idle_polls or 0) + 1
+                        state.next_poll_at = now + dormant_poll_delay(state.idle_polls)
+                    session.add_all(
+                        WalletScanState(wallet_id=wallet_id, idle_polls=1, next_poll_at=now + dormant_poll_delay(1))
+                        for wallet_id in chunk if wallet_id not in seen
+                    )
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
 
     @staticmethod
     def get_deposit_by_tx_hash(tx_hash: str) -> Optional[Deposit]:
@@ -73,6 +213,93 @@ class DepositService:
                 session.rollback()
                 raise
 
+    @staticmethod
+    def find_existing_tx_hashes(tx_hashes: Iterable[str]) -> Set[str]:
+        """Return the subset of `tx_hashes` already recorded as deposits (one IN query per batch)."""
+        hashes = list(dict.fromkeys(tx_hashes))
+        existing: Set[str] = set()
+        if not hashes:
+            return existing
+        with get_db_session() as session:
+            for i in range(0, len(hashes), TX_HASH_BATCH_SIZE):
+                chunk = hashes[i:i + TX_HASH_BATCH_SIZE]
+                rows = session.query(Deposit.tx_hash).filter(Deposit.tx_hash.in_(chunk)).all()
+                existing.update(tx_hash for (tx_hash,) in rows)
+        return existing
+
+    @staticmethod
+    def record_deposits_bulk(rows: List[dict]) -> List[Deposit]:
+        """Insert many deposits at once, skipping tx hashes that already exist, and credit the confirmed ones.
+
+        Each row needs user_id, wallet_id, tx_hash, amount_trx and confirmations.
+        Uses INSERT ... ON CONFLICT (tx_hash) DO NOTHING RETURNING, so concurrent
+        scanners cannot record the same deposit twice. The inserted confirmed deposits
+        are credited (balance and deposit Transaction) in the same commit: a recorded
+        deposit is never left uncredited. Returns only the rows inserted.
+        """
+        if not rows:
+            return []
+        now = get_utc_time()
+        values = []
+        for row in rows:
+            status = DepositStatus.confirmed if row['confirmations'] >= 19 else DepositStatus.pending
+            values.append({
+                'user_id': row['user_id'],
+                'wallet_id': row['wallet_id'],
+                'tx_hash': row['tx_hash'],
+                'amount_trx': row['amount_trx'],
+                'confirmations': row['confirmations'],
+                'status': status,
+                'created_at': now,
+                'updated_at': now,
+                'confirmed_at': now if status == DepositStatus.confirmed else None,
+            })
+
+        inserted: List[Deposit] = []
+        with get_db_session() as session:
+            try:
+                for i in range(0, len(values), TX_HASH_BATCH_SIZE):
+                    stmt = (
+                        dialect_insert(session, Deposit)
+                        .values(values[i:i + TX_HASH_BATCH_SIZE])
+                        .on_conflict_do_nothing(index_elements=['tx_hash'])
+                        .returning(Deposit)
+                    )
+                    inserted.extend(session.scalars(stmt).all())
+                credited: Dict[int, Decimal] = {}
+                for deposit in inserted:
+                    if deposit.status != DepositStatus.confirmed:
+                        continue
+                    amount = Decimal(deposit.amount_trx)
+                    credited[deposit.user_id] = credited.get(deposit.user_id, Decimal(0)) + amount
+                    session.add(Transaction(
+                        user_id=deposit.user_id,
+                        type=TransactionType.deposit,
+                        status=TransactionStatus.completed,
+                        amount_trx=amount,
+                        description=f"Deposit {deposit.tx_hash}",
+                        reference_id=str(deposit.id),
+                        tx_hash=deposit.tx_hash,
+                    ))
+                for user_id, amount in credited.items():
+                    session.query(User).filter(User.id == user_id).update(
+                        {
+                            User.account_balance: User.account_balance + amount,
+                            User.total_deposited: User.total_deposited + amount,
+                        },
+                        synchronize_session=False,
+                    )
+                # Detach before commit so the returned rows stay readable after the session closes
+                for deposit in inserted:
+                    session.expunge(deposit)
+                session.commit()
+                for user_id in credited:
+                    invalidate_user(user_id=user_id)
+                return inserted
+            except Exception:
+                session.rollback()
+                raise
+
     @staticmethod
     def credit_user_balance_and_log_tx(user_id: int, amount_trx: Decimal, reference_id: int, reference_tx_id: str) -> Transaction:
         """Credits user's ad balance and records a deposit transaction."""
@@ -95,6 +322,7 @@ class DepositService:
                 )
                 session.add(tx)
                 session.commit()
+                invalidate_user(user_id=user_id)
                 session.refresh(tx)
                 return tx
             except Exception:
@@ -107,12 +335,18 @@ class DepositService:
             return session.query(User).get(user_id)
 
     @staticmethod
-    def create_admin_forward_transaction(amount_trx: Decimal, deposit_tx_id: str, forward_tx_id: str) -> Optional[Transaction]:
+    def create_admin_forward_transaction(
+        amount_trx: Decimal,
+        deposit_tx_id: str,
+        forward_tx_id: str,
+        status: TransactionStatus = TransactionStatus.completed,
+    ) -> Optional[Transaction]:
         """Create a transaction record for the admin when a part of a user's deposit is forwarded to the main wallet.
 
         - amount_trx: amount forwarded to the main wallet
         - deposit_tx_id: original user's deposit tx hash
         - forward_tx_id: tx hash of the forwarding transaction to the main wallet
+        - status: pending while the forward awaits confirmation
         """
         if not TELEGRAM_ADMIN_ID:
             return None
@@ -127,7 +361,7 @@ class DepositService:
                     user_id=admin_user.id,
                     type=TransactionType.custom,
                     amount_trx=amount_trx,
-                    status=TransactionStatus.completed,
+                    status=status,
                     description=f"Forwarded to main wallet from deposit {deposit_tx_id}",
                     reference_id=str(deposit_tx_id),
                     tx_hash=forward_tx_id,
@@ -136,6 +370,22 @@ class DepositService:
                 session.commit()
                 session.refresh(tx)
                 return tx
+            except Exception:
+                session.rollback()
+                raise
+
+    @staticmethod
+    def set_forward_transaction_status(forward_tx_id: str, status: TransactionStatus, reason: Optional[str] = None) -> None:
+        """Resolve the admin record of a forward once its transaction is confirmed or dropped."""
+        with get_db_session() as session:
+            try:
+                tx = session.query(Transaction).filter_by(tx_hash=forward_tx_id, type=TransactionType.custom).first()
+                if not tx:
+                    return
+                tx.status = status
+                if reason:
+                    tx.description = f"{tx.description} (failed: {reason})"
+                session.commit()
             except Exception:
                 session.rollback()
                 raise
\ No newline at end of file
@@ -1,7 +1,8 @@
 from typing import List, Optional
 
 from database.database import get_db_session
-from database.models import User, ReferralCommission, CommissionStatus
+from database.models import User, ReferralCommission, ReferralStats
+from shared.referral_stats import aggregate_referral_stats, stats_to_dict
 
 
 class ReferralService:
@@ -28,21 +29,21 @@ class ReferralService:
     def summarize_commissions(user_id: int):
         """Return a simple summary for single-level referrals: total_paid, total_pending."""
         with get_db_session() as session:
-            total_paid = 0.0
-            total_pending = 0.0
-            rows = session.query(ReferralCommission).filter_by(user_id=user_id).all()
-            for row in rows:
-                # Align to models: field is amount_trx (Decimal)
-                amount = float(row.amount_trx)
-                if row.status == CommissionStatus.paid:
-                    total_paid += amount
-                else:
-                    total_pending += amount
+            stats = aggregate_referral_stats(session, user_id)
             return {
-                "total_paid": total_paid,
-                "total_pending": total_pending,
+                "total_paid": stats["total_paid"],
+                "total_pending": stats["total_pending"],
             }
 
+    @staticmethod
+    def get_referral_stats(user_id: int):
+        """Referral count and commission totals, from the sponsor's running totals when present."""
+        with get_db_session() as session:
+            stats = session.query(ReferralStats).filter_by(user_id=user_id).first()
+            if stats:
+                return stats_to_dict(stats)
+            return aggregate_referral_stats(session, user_id)
+
 
 # Backward-compatible forwarders to preserve existing routing (Telegram logic in handlers)
 async def handle_referral(update, context):
@@ -1,7 +1,9 @@
 from database.database import get_db_session
 from database.models import User, Transaction, TransactionType
 from services.wallet_service import get_or_create_wallet
-from utils.helpers import generate_referral_code, generate_share_link
+from shared.referral_codes import referral_code_for
+from shared.referral_stats import add_to_referral_stats
+from utils.helpers import generate_share_link
 
 class UserService:
     """Encapsulates all DB interactions related to users and their transactions."""
@@ -12,12 +14,8 @@ class UserService:
             return session.query(User).filter_by(telegram_id=telegram_id).first()
 
     @staticmethod
-    def generate_unique_referral_code() -> str:
-        with get_db_session() as session:
-            code = generate_referral_code()
-            while session.query(User).filter_by(referral_code=code).first():
-                code = generate_referral_code()
-            return code
+    def referral_code_for(telegram_id: str) -> str:
+        return referral_code_for(telegram_id)
 
     @staticmethod
     def find_sponsor_by_code(referral_code: str):
@@ -45,6 +43,8 @@ class UserService:
                 sponsor_id=sponsor_id,
             )
             session.add(user)
+            if sponsor_id:
+                add_to_referral_stats(session, sponsor_id, referrals=1)
             session.commit()
             session.refresh(user)
             return user
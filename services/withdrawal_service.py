@@ -2,6 +2,7 @@ from decimal import Decimal
 from typing import List, Optional
 
 from database.database import get_db_session
+from shared.user_cache import invalidate_user
 from database.models import (
     User,
     Withdrawal,
@@ -57,6 +58,7 @@ class WithdrawalService:
                 )
                 session.add(withdrawal)
                 session.commit()
+                invalidate_user(user_id=user_id)
                 session.refresh(withdrawal)
                 return withdrawal
             except Exception:
@@ -133,6 +135,7 @@ class WithdrawalService:
                 if tx_record:
                     tx_record.description = f"Withdrawal {tx_hash}"
                 session.commit()
+                invalidate_user(user_id=user_id)
             except Exception:
                 session.rollback()
                 raise
@@ -155,6 +158,7 @@ class WithdrawalService:
                     suffix = f" (tx {tx_hash})" if tx_hash else ""
                     tx_record.description = f"Withdrawal failed: {reason}{suffix}"
                 session.commit()
+                invalidate_user(user_id=user_id)
             except Exception:
                 session.rollback()
                 raise
\ No newline at end of file
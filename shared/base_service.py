@@ -1,9 +1,12 @@
+import functools
+import threading
 from abc import ABC
 from typing import Optional
 from sqlalchemy.orm import Session
 
-from database.database import get_db_session
+from database.database import get_db_session, run_in_db
 from database.models import User
+from shared.user_cache import get_user_cached
 from config import TELEGRAM_ADMIN_ID
 
 
@@ -11,14 +14,38 @@ class BaseService(ABC):
     """Base service with shared DB/session utilities and user helpers.
 
     - Opens sessions via database.get_db_session (context manager).
-    - Reuses a single Session per service instance (lazy opened).
+    - Reuses a single Session per service instance and thread (lazy opened).
     - Provides explicit close and safe commit with rollback.
     - Offers a db() helper to use the context manager ad-hoc: `with self.db() as db:`
+    - From async code, `await service.aio.method(...)` runs a method on the DB thread pool
+      instead of blocking the event loop.
     """
 
     def __init__(self) -> None:
-        self._session: Optional[Session] = None
-        self._db_ctx = None  # holds the active context manager when get_db() is used
+        # Sessions are not thread-safe: aio calls run on several threads, each gets its own
+        self._local = threading.local()
+
+    @property
+    def _session(self) -> Optional[Session]:
+        return getattr(self._local, "session", None)
+
+    @_session.setter
+    def _session(self, session: Optional[Session]) -> None:
+        self._local.session = session
+
+    @property
+    def _db_ctx(self):
+        """Holds the active context manager when get_db() is used"""
+        return getattr(self._local, "db_ctx", None)
+
+    @_db_ctx.setter
+    def _db_ctx(self, ctx) -> None:
+        self._local.db_ctx = ctx
+
+    @property
+    def aio(self) -> "_AsyncMethods":
+        """Awaitable versions of this service's methods: `await service.aio.get_user_by_id(1)`"""
+        return _AsyncMethods(self)
 
     # ---- Session handling ----
     def db(self):
@@ -52,6 +79,17 @@ class BaseService(ABC):
                 self._session = None
                 self._db_ctx = None
 
+    def _run_and_close(self, method, *args, **kwargs):
+        """Run `method`, then close this thread's persisted Session (aio calls).
+
+        The result goes back to the event loop thread, so it must not stay attached to a
+        session another call may use, and the connection must return to the pool.
+        """
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self.close_db()
+
     # Context manager support
     def __enter__(self):
         self.get_db()
@@ -62,7 +100,10 @@ class BaseService(ABC):
 
     # ---- Common user helpers ----
     def get_user_by_telegram(self, telegram_id: str) -> Optional[User]:
-        """Fetch user by Telegram ID."""
+        """Fetch user by Telegram ID through the user cache (at most one DB read per update)."""
+        return get_user_cached(telegram_id, lambda: self._load_user_by_telegram(telegram_id))
+
+    def _load_user_by_telegram(self, telegram_id: str) -> Optional[User]:
         with self.db() as session:
             return session.query(User).filter_by(telegram_id=telegram_id).first()
 
@@ -88,4 +129,24 @@ class BaseService(ABC):
         if not TELEGRAM_ADMIN_ID:
             return None
         with self.db() as session:
-            return session.query(User).filter_by(telegram_id=str(TELEGRAM_ADMIN_ID)).first()
\ No newline at end of file
+            return session.query(User).filter_by(telegram_id=str(TELEGRAM_ADMIN_ID)).first()
+
+
+class _AsyncMethods:
+    """Attribute proxy turning each service method into a coroutine run on the DB thread pool"""
+
+    __slots__ = ("_service",)
+
+    def __init__(self, service: BaseService) -> None:
+        self._service = service
+
+    def __getattr__(self, name: str):
+        method = getattr(self._service, name)
+        if not callable(method):
+            raise AttributeError(f"{type(self._service).__name__}.{name} is not a method")
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            return await run_in_db(self._service._run_and_close, method, *args, **kwargs)
+
+        return call
@@ -0,0 +1,128 @@
+"""
+Referral codes derived from the Telegram id
+
+A user's code is a keyed permutation (4-round Feistel network keyed with REFERRAL_CODE_KEY)
+of their numeric Telegram id, written in base36 on 11 characters. Distinct ids give distinct
+codes, so a code is known before the user is inserted and never needs a uniqueness lookup,
+while consecutive ids give unrelated codes. Codes generated at random by earlier versions
+are 8 characters long and cannot collide with these.
+
+Changing REFERRAL_CODE_KEY changes the codes of new users only: existing codes are stored
+and keep working, but a new code could then equal an old one. Set it once.
+
+Backfill existing users (their previous share links stop working):
+    python -m shared.referral_codes [--batch-size 1000] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import string
+from typing import Dict
+
+from sqlalchemy import bindparam, update
+
+from config import REFERRAL_CODE_KEY
+from database.database import get_db_session
+from database.models import User
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Telegram user ids have at most 52 significant bits
+ID_BITS = 52
+CODE_LENGTH = 11  # 36**11 > 2**52
+_HALF_BITS = ID_BITS // 2
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_ROUNDS = 4
+_ALPHABET = string.digits + string.ascii_lowercase
+
+# Without a secret key anyone could invert a code back to the user's Telegram id
+if not REFERRAL_CODE_KEY:
+    raise ValueError("❌ REFERRAL_CODE_KEY is not set in environment variables.")
+
+_mac = hmac.new(REFERRAL_CODE_KEY.encode(), digestmod=hashlib.sha256)
+
+
+def _round(number: int, half: int) -> int:
+    mac = _mac.copy()
+    mac.update(bytes([number]) + half.to_bytes(4, "big"))
+    return int.from_bytes(mac.digest()[:4], "big") & _HALF_MASK
+
+
+def _permute(value: int) -> int:
+    left, right = value >> _HALF_BITS, value & _HALF_MASK
+    for number in range(_ROUNDS):
+        left, right = right, left ^ _round(number, right)
+    return (left << _HALF_BITS) | right
+
+
+def referral_code_for(telegram_id: str) -> str:
+    """Return the referral code of the user with this (numeric) Telegram id."""
+    value = int(telegram_id)
+    if not 0 <= value < 1 << ID_BITS:
+        raise ValueError(f"Telegram id out of range for a referral code: {telegram_id}")
+    value = _permute(value)
+    digits = []
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, 36)
+        digits.append(_ALPHABET[digit])
+    return "".join(reversed(digits))
+
+
+def backfill_referral_codes(batch_size: int = 1000, dry_run: bool = False) -> Dict[str, int]:
+    """Give every existing user their derived referral code, `batch_size` users per commit.
+
+    Users whose Telegram id is not numeric keep their code. Safe to rerun: users already
+    holding their derived code are left untouched.
+    """
+    counts = {"checked": 0, "updated": 0, "skipped": 0}
+    statement = (
+        update(User)
+        .where(User.id == bindparam("b_id"))
+        .values(referral_code=bindparam("b_code"))
+        .execution_options(synchronize_session=False)
+    )
+    last_id = 0
+    while True:
+        with get_db_session() as session:
+            rows = (
+                session.query(User.id, User.telegram_id, User.referral_code)
+                .filter(User.id > last_id)
+                .order_by(User.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                return counts
+            last_id = rows[-1].id
+            changes = []
+            for row in rows:
+                try:
+                    code = referral_code_for(row.telegram_id)
+                except ValueError:
+                    counts["skipped"] += 1
+                    continue
+                if code != row.referral_code:
+                    changes.append({"b_id": row.id, "b_code": code})
+            counts["checked"] += len(rows)
+            counts["updated"] += len(changes)
+            if changes and not dry_run:
+                session.connection().execute(statement, changes)
+                session.commit()
+        logger.info(f"[Referral codes] {counts} (last user id {last_id})")
+
+
+def main() -> None:
+    """Replace existing users' referral codes with the codes derived from their Telegram id."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="count the codes to change without writing them")
+    args = parser.parse_args()
+    counts = backfill_referral_codes(args.batch_size, args.dry_run)
+    logger.info(f"[Referral codes] done{' (dry run)' if args.dry_run else ''}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
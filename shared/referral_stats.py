@@ -0,0 +1,93 @@
+"""
+Referral totals of a sponsor: computed with one aggregate query, or read from the
+running totals kept in referral_stats
+"""
+from decimal import Decimal
+from typing import Dict, Union
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from database.database import dialect_insert
+from database.models import CommissionStatus, ReferralCommission, ReferralStats, User
+from utils.helpers import get_utc_time
+
+
+def _aggregate(session: Session, user_id: int):
+    referrals = session.query(func.count(User.id)).filter(User.sponsor_id == user_id).scalar_subquery()
+
+    def total(status: CommissionStatus):
+        return func.coalesce(
+            func.sum(case((ReferralCommission.status == status, ReferralCommission.amount_trx), else_=0)), 0
+        )
+
+    count, paid, pending = (
+        session.query(referrals, total(CommissionStatus.paid), total(CommissionStatus.pending))
+        .select_from(ReferralCommission)
+        .filter(ReferralCommission.user_id == user_id)
+        .one()
+    )
+    return int(count or 0), Decimal(str(paid)), Decimal(str(pending))
+
+
+def aggregate_referral_stats(session: Session, user_id: int) -> Dict[str, Union[int, float]]:
+    """Count a sponsor's direct referrals and sum their paid and pending commissions in one query.
+
+    Served by the users.sponsor_id and referral_commissions(user_id, status) indexes, but its
+    cost still grows with the number of referrals and commissions.
+    """
+    referrals, paid, pending = _aggregate(session, user_id)
+    return {"referrals": referrals, "total_paid": float(paid), "total_pending": float(pending)}
+
+
+def stats_to_dict(stats: ReferralStats) -> Dict[str, Union[int, float]]:
+    return {
+        "referrals": stats.referrals,
+        "total_paid": float(stats.paid_trx),
+        "total_pending": float(stats.pending_trx),
+    }
+
+
+def add_to_referral_stats(
+    session: Session,
+    user_id: int,
+    referrals: int = 0,
+    paid_trx: Decimal = Decimal(0),
+    pending_trx: Decimal = Decimal(0),
+) -> None:
+    """Add to a sponsor's running totals, creating their row on first use.
+
+    Does not commit: the caller commits it with the registration or commission it counts.
+    """
+    now = get_utc_time()
+    stmt = dialect_insert(session, ReferralStats).values(
+        user_id=user_id,
+        referrals=referrals,
+        paid_trx=paid_trx,
+        pending_trx=pending_trx,
+        created_at=now,
+        updated_at=now,
+    )
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={
+                "referrals": ReferralStats.referrals + referrals,
+                "paid_trx": ReferralStats.paid_trx + paid_trx,
+                "pending_trx": ReferralStats.pending_trx + pending_trx,
+                "updated_at": now,
+            },
+        )
+    )
+
+
+def rebuild_referral_stats(session: Session, user_id: int) -> None:
+    """Recompute a sponsor's running totals with the aggregate query (repair after manual edits).
+
+    Does not commit.
+    """
+    referrals, paid, pending = _aggregate(session, user_id)
+    now = get_utc_time()
+    values = {"referrals": referrals, "paid_trx": paid, "pending_trx": pending, "updated_at": now}
+    stmt = dialect_insert(session, ReferralStats).values(user_id=user_id, created_at=now, **values)
+    session.execute(stmt.on_conflict_do_update(index_elements=["user_id"], set_=values))
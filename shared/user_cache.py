@@ -0,0 +1,126 @@
+"""
+Read-through cache of User rows by telegram_id
+
+Two layers:
+- a per-update memo: within one update (middleware, handler, service calls) the user is
+  read at most once. It is reset by `reset_user_memo` at the start of every update and
+  reaches the DB threads because `run_in_db` copies context variables;
+- a process-wide LRU of up to USER_CACHE_SIZE users kept USER_CACHE_TTL seconds, for the
+  updates that follow (e.g. each step of the withdrawal flow).
+
+Cached users are detached snapshots to read, never to modify or add to a session. Code
+changing a user row (balances, settings...) calls `invalidate_user` once committed; other
+processes only see the change when their entry expires.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+
+from config import USER_CACHE_SIZE, USER_CACHE_TTL
+from database.models import User
+
+
+class UserCache:
+    """Thread-safe LRU of users by telegram_id whose entries expire after `ttl` seconds"""
+
+    def __init__(self, max_size: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL) -> None:
+        self.max_size = max(0, int(max_size))
+        self.ttl = float(ttl)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._telegram_ids: Dict[int, str] = {}  # user id -> telegram_id, to invalidate by id
+        self.generation = 0  # bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, telegram_id: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(telegram_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(telegram_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(telegram_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user: User, generation: Optional[int] = None) -> None:
+        """Cache `user`; skipped if anything was invalidated since `generation` (read before loading it)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return  # the row may have changed after it was read
+            self._remove(user.telegram_id)
+            self._entries[user.telegram_id] = (time.monotonic() + self.ttl, user)
+            self._telegram_ids[user.id] = user.telegram_id
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, telegram_id: Optional[str] = None, user_id: Optional[int] = None) -> None:
+        with self._lock:
+            self.generation += 1
+            if telegram_id is None and user_id is not None:
+                telegram_id = self._telegram_ids.get(user_id)
+            if telegram_id is not None:
+                self._remove(telegram_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._telegram_ids.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _remove(self, telegram_id: str) -> None:
+        entry = self._entries.pop(telegram_id, None)
+        if entry is not None:
+            self._telegram_ids.pop(entry[1].id, None)
+
+
+user_cache = UserCache()
+
+# telegram_id -> User read during the current update; None outside an update
+_update_memo: ContextVar[Optional[Dict[str, User]]] = ContextVar("user_memo", default=None)
+
+
+async def reset_user_memo(update, context) -> None:
+    """Start an empty per-update memo (registered to run before every other handler)."""
+    _update_memo.set({})
+
+
+def get_user_cached(telegram_id: str, load: Callable[[], Optional[User]]) -> Optional[User]:
+    """Return the user from the update memo, then the process cache, then `load()` (the DB)."""
+    memo = _update_memo.get()
+    user = memo.get(telegram_id) if memo is not None else None
+    if user is None:
+        user = user_cache.get(telegram_id)
+        if user is None:
+            generation = user_cache.generation
+            user = load()
+            if user is not None:
+                user_cache.put(user, generation)
+        if user is not None and memo is not None:
+            memo[telegram_id] = user
+    return user
+
+
+def invalidate_user(telegram_id: Optional[str] = None, user_id: Optional[int] = None) -> None:
+    """Forget a user whose row changed, in the process cache and the current update's memo."""
+    user_cache.invalidate(telegram_id=telegram_id, user_id=user_id)
+    memo = _update_memo.get()
+    if memo:
+        for key, user in list(memo.items()):
+            if key == telegram_id or user.id == user_id:
+                del memo[key]
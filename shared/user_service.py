@@ -1,9 +1,43 @@
-from typing import Optional, List
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, List, Tuple
+
+from sqlalchemy import tuple_
 
 from .base_service import BaseService
+from .referral_codes import referral_code_for
+from .referral_stats import add_to_referral_stats
+from .user_cache import invalidate_user
 from database.models import User, Transaction, TransactionType
 from services.wallet_service import get_or_create_wallet
-from utils.helpers import generate_referral_code, generate_share_link
+from utils.helpers import generate_share_link
+
+
+HISTORY_COUNT_LIMIT = 1000  # rows counted for a history's total; longer histories report "at least"
+
+TransactionCursor = Tuple[datetime, int]  # (created_at, id) of a history row
+
+
+@dataclass(frozen=True)
+class TransactionPage:
+    """One page of a user's transactions, newest first, and whether pages exist around it"""
+    transactions: List[Transaction]
+    has_previous: bool
+    has_next: bool
+    total: int  # matching transactions, counted up to HISTORY_COUNT_LIMIT
+    total_is_exact: bool
+
+    @property
+    def first_cursor(self) -> Optional[TransactionCursor]:
+        """Cursor of the newest row, to fetch the previous (newer) page"""
+        tx = self.transactions[0] if self.transactions else None
+        return (tx.created_at, tx.id) if tx else None
+
+    @property
+    def last_cursor(self) -> Optional[TransactionCursor]:
+        """Cursor of the oldest row, to fetch the next (older) page"""
+        tx = self.transactions[-1] if self.transactions else None
+        return (tx.created_at, tx.id) if tx else None
 
 
 class UserService(BaseService):
@@ -23,13 +57,10 @@ class UserService(BaseService):
         return super().get_or_create_user(telegram_id, username)
 
     # ---- Referral helpers ----
-    def generate_unique_referral_code(self) -> str:
-        """Generate a referral code unique across users."""
-        db = self.get_db()
-        code = generate_referral_code()
-        while db.query(User).filter_by(referral_code=code).first():
-            code = generate_referral_code()
-        return code
+    @staticmethod
+    def referral_code_for(telegram_id: str) -> str:
+        """Referral code of a new user, derived from their Telegram id (unique, no DB lookup)."""
+        return referral_code_for(telegram_id)
 
     def find_sponsor_by_code(self, referral_code: Optional[str]) -> Optional[User]:
         """Find sponsor user by referral code."""
@@ -52,7 +83,7 @@ class UserService(BaseService):
         referral_code: str,
         sponsor_id: Optional[int],
     ) -> User:
-        """Create and persist a new user."""
+        """Create and persist a new user; the sponsor's referral count is updated in the same commit."""
         db = self.get_db()
         user = User(
             telegram_id=telegram_id,
@@ -63,6 +94,8 @@ class UserService(BaseService):
             sponsor_id=sponsor_id,
         )
         db.add(user)
+        if sponsor_id:
+            add_to_referral_stats(db, sponsor_id, referrals=1)
         self.commit()
         db.refresh(user)
         return user
@@ -81,12 +114,75 @@ class UserService(BaseService):
     def list_transactions(self, user_id: int, filter_key: Optional[str] = None) -> List[Transaction]:
         """List user transactions with optional filter (deposits/withdrawals)."""
         db = self.get_db()
+        return self._transactions_query(db, user_id, filter_key).order_by(Transaction.created_at.desc()).all()
+
+    def get_transactions_page(
+        self,
+        user_id: int,
+        filter_key: Optional[str] = None,
+        limit: int = 10,
+        after: Optional[TransactionCursor] = None,
+        before: Optional[TransactionCursor] = None,
+    ) -> TransactionPage:
+        """One page of history, newest first (keyset pagination on (created_at, id)).
+
+        `after` is the last cursor of the page shown, to get the next (older) page; `before` its
+        first cursor, to get the previous (newer) one; neither gives the newest page. Each
+        page reads `limit + 1` rows from the (user_id[, type], created_at, id) index, so its
+        cost does not depend on how long the history is.
+        """
+        with self.db() as session:
+            query = self._transactions_query(session, user_id, filter_key)
+            key = tuple_(Transaction.created_at, Transaction.id)
+            rows = None
+            if before is not None:
+                rows = (
+                    query.filter(key > tuple_(*before))
+                    .order_by(Transaction.created_at.asc(), Transaction.id.asc())
+                    .limit(limit + 1)
+                    .all()
+                )
+                # Fewer newer rows than a page: the newest page is shown instead
+                if len(rows) < limit:
+                    rows = None
+            if rows is not None:
+                has_previous = len(rows) > limit
+                transactions = list(reversed(rows[:limit]))
+                has_next = True
+            else:
+                if after is not None:
+                    query = query.filter(key < tuple_(*after))
+                rows = (
+                    query.order_by(Transaction.created_at.desc(), Transaction.id.desc())
+                    .limit(limit + 1)
+                    .all()
+                )
+                transactions = rows[:limit]
+                has_previous = after is not None
+                has_next = len(rows) > limit
+
+            counted = (
+                self._transactions_query(session, user_id, filter_key)
+                .with_entities(Transaction.id)
+                .limit(HISTORY_COUNT_LIMIT + 1)
+                .count()
+            )
+            return TransactionPage(
+                transactions=transactions,
+                has_previous=has_previous,
+                has_next=has_next,
+                total=min(counted, HISTORY_COUNT_LIMIT),
+                total_is_exact=counted <= HISTORY_COUNT_LIMIT,
+            )
+
+    @staticmethod
+    def _transactions_query(db, user_id: int, filter_key: Optional[str]):
         q = db.query(Transaction).filter_by(user_id=user_id)
         if filter_key == "deposits":
             q = q.filter_by(type=TransactionType.deposit)
         elif filter_key == "withdrawals":
             q = q.filter_by(type=TransactionType.withdrawal)
-        return q.order_by(Transaction.created_at.desc()).all()
+        return q
 
     # ---- User settings and stats ----
     def update_user_settings(self, telegram_id: str, **kwargs) -> Optional[User]:
@@ -99,6 +195,7 @@ class UserService(BaseService):
             if hasattr(user, key):
                 setattr(user, key, value)
         self.commit()
+        invalidate_user(telegram_id=telegram_id)
         db.refresh(user)
         return user
 
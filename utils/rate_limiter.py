@@ -0,0 +1,127 @@
+"""
+Token bucket rate limiter shared by sync code and asyncio tasks
+"""
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Allow `rate` operations per second with bursts of up to `capacity`.
+
+    The bucket is thread-safe and loop-agnostic: callers reserve a token under
+    a lock and then sleep outside of it, either with `acquire()` (blocking) or
+    `acquire_async()` (asyncio).
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float = 1.0) -> float:
+        """Take `tokens` from the bucket and return how long the caller must wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def try_reserve(self, tokens: float = 1.0) -> float:
+        """Take `tokens` only if they are available right now.
+
+        Returns 0 when taken, otherwise how long until they would be (nothing is taken).
+        Low-priority callers use this so they never queue ahead of `acquire()` callers.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block the current thread until `tokens` are available."""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: float = 1.0) -> None:
+        """Wait without blocking the event loop until `tokens` are available."""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self) -> None:
+        """Feedback hook for a successful call (fixed-rate buckets ignore it)."""
+
+    def on_throttle(self, retry_after: float | None = None) -> None:
+        """Feedback hook for a throttled call (fixed-rate buckets ignore it)."""
+
+    def stats(self) -> dict:
+        return {"rate": round(self.rate, 2)}
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """Token bucket whose rate follows the provider's feedback (AIMD).
+
+    - `on_success()` raises the rate by `increase` requests/second for every second's
+      worth of successful calls, up to `max_rate`.
+    - `on_throttle(retry_after)` multiplies the rate by `decrease`, down to `min_rate`, and
+      pauses the bucket for `retry_after` seconds when the provider sent one. Throttles
+      within `backoff_window` seconds of the last decrease come from calls that were
+      already in flight and only extend the pause.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        min_rate: float = 0.5,
+        max_rate: float | None = None,
+        increase: float = 0.5,
+        decrease: float = 0.5,
+        backoff_window: float = 1.0,
+    ) -> None:
+        super().__init__(rate, capacity)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate) if max_rate else self.rate
+        self.increase = float(increase)
+        self.decrease = float(decrease)
+        self.backoff_window = float(backoff_window)
+        self.throttles = 0
+        self._last_decrease = float("-inf")
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self, retry_after: float | None = None) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.throttles += 1
+            if now - self._last_decrease >= self.backoff_window:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+            if retry_after:
+                # Empty the bucket and start refilling only once the pause is over
+                self._tokens = min(self._tokens, 0.0)
+                self._updated = max(self._updated, now + retry_after)
+
+    def stats(self) -> dict:
+        return {
+            "rate": round(self.rate, 2),
+            "max_rate": self.max_rate,
+            "throttles": self.throttles,
+        }
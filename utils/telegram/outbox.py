@@ -0,0 +1,251 @@
+"""
+Notification outbox: workers enqueue, one long-lived async sender delivers
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+from telegram.ext import ExtBot
+from telegram.request import HTTPXRequest
+
+from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_RATE_LIMIT, TELEGRAM_OUTBOX_BATCH_SIZE
+from utils.logger import logger
+from utils.telegram.rate_limiter import Priority, retry_after_seconds, telegram_rate_limiter
+
+
+MAX_ATTEMPTS = 3
+IDLE_WAIT = 1.0  # seconds between checks when nothing is ready
+RESTART_DELAY_MIN = 1.0  # first wait before restarting a sender that failed (e.g. no network at start)
+RESTART_DELAY_MAX = 60.0
+NOTIFICATION_DRAIN_TIMEOUT = 60.0  # how long a short-lived worker process waits for its messages
+
+
+@dataclass
+class Notification:
+    chat_id: str
+    text: str
+    reply_markup: object | None = None
+    parse_mode: str | None = ParseMode.MARKDOWN_V2
+    attempts: int = 0
+
+
+class NotificationOutbox:
+    """Deliver notifications from worker threads without making them wait on Telegram.
+
+    - `enqueue()` is thread-safe and returns immediately.
+    - A background thread runs one event loop with one shared `ExtBot` and its pooled HTTP client.
+    - Each round sends up to `batch_size` ready messages concurrently, at most `chat_rate` per
+      chat. Messages to one chat keep their order, and chats are served round-robin so one busy
+      chat cannot starve the others.
+    - Sends go through `telegram_rate_limiter` at background priority: the global rate is
+      shared with the bot's replies, which always go first.
+    - A RetryAfter the limiter could not absorb pauses the whole outbox and re-queues the message.
+      Network errors are retried up to MAX_ATTEMPTS times. Other errors (bot blocked, bad
+      chat id, invalid markup) drop the message with a log line.
+    - If the sender fails (e.g. the bot cannot initialize while the network is down), it is
+      restarted with exponential backoff and the queue is kept. Queued messages are only
+      discarded when the sender cannot run after `stop()`.
+    - The queue is in memory: messages still queued when the process dies are lost.
+    """
+
+    def __init__(
+        self,
+        token: str | None = TELEGRAM_BOT_TOKEN,
+        chat_rate: float = TELEGRAM_CHAT_RATE_LIMIT,
+        batch_size: int = TELEGRAM_OUTBOX_BATCH_SIZE,
+        bot: ExtBot | None = None,
+    ) -> None:
+        self.token = token
+        self.bot = bot
+        self.chat_interval = 1.0 / chat_rate
+        self.batch_size = max(1, int(batch_size))
+        self.sent = 0
+        self.dropped = 0
+
+        self._chats: OrderedDict[str, deque[Notification]] = OrderedDict()
+        self._next_send: dict[str, float] = {}
+        self._paused_until = 0.0
+        self._queued = 0
+        self._inflight = 0
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._stopping = False
+
+    # ---- Producer side (any thread) ----
+    def enqueue(self, chat_id, text: str, reply_markup=None, parse_mode: str | None = ParseMode.MARKDOWN_V2) -> None:
+        if not chat_id:
+            return
+        if not (self.token or self.bot):
+            logger.warning(f"[Notify] No bot token configured, message to {chat_id} dropped")
+            return
+        chat_id = str(chat_id)
+        with self._lock:
+            self._chats.setdefault(chat_id, deque()).append(Notification(chat_id, text, reply_markup, parse_mode))
+            self._queued += 1
+        self.start()
+        self._wake()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return self._queued + self._inflight
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=asyncio.run, args=(self._run(),), name="notification-outbox", daemon=True)
+            self._thread.start()
+
+    def drain(self, timeout: float) -> bool:
+        """Wait until every queued message is sent or dropped; False on timeout"""
+        deadline = time.monotonic() + timeout
+        while self.pending:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stopping = True
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _wake(self) -> None:
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+    # ---- Sender side (outbox thread) ----
+    def _next_batch(self) -> tuple[list[Notification], float]:
+        """Pop up to batch_size messages whose chat may receive one now; else how long to wait"""
+        now = time.monotonic()
+        batch: list[Notification] = []
+        with self._lock:
+            if self._paused_until > now:
+                return batch, self._paused_until - now
+            wait = IDLE_WAIT
+            for chat_id in list(self._chats):
+                if len(batch) >= self.batch_size:
+                    break
+                ready_at = self._next_send.get(chat_id, 0.0)
+                if ready_at > now:
+                    wait = min(wait, ready_at - now)
+                    continue
+                queue = self._chats[chat_id]
+                batch.append(queue.popleft())
+                self._next_send[chat_id] = now + self.chat_interval
+                if queue:
+                    self._chats.move_to_end(chat_id)  # round-robin between chats
+                else:
+                    del self._chats[chat_id]
+            self._queued -= len(batch)
+            self._inflight += len(batch)
+            # Forget the pacing of chats that have been quiet long enough
+            for chat_id in [c for c, t in self._next_send.items() if t <= now and c not in self._chats]:
+                del self._next_send[chat_id]
+        return batch, wait
+
+    def _requeue(self, notification: Notification) -> None:
+        with self._lock:
+            self._chats.setdefault(notification.chat_id, deque()).appendleft(notification)
+            self._queued += 1
+
+    async def _send(self, bot: ExtBot, notification: Notification) -> None:
+        try:
+            await bot.send_message(
+                chat_id=notification.chat_id,
+                text=notification.text,
+                parse_mode=notification.parse_mode,
+                reply_markup=notification.reply_markup,
+                rate_limit_args={"priority": Priority.BACKGROUND},
+            )
+            self.sent += 1
+        except RetryAfter as e:
+            delay = retry_after_seconds(e)
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            logger.warning(f"[Notify] Flood control, pausing notifications for {delay:.0f}s")
+            self._requeue(notification)
+        except (BadRequest, Forbidden) as e:
+            self.dropped += 1
+            logger.error(f"[Notify] Failed to send message to {notification.chat_id}: {e}")
+        except NetworkError as e:
+            notification.attempts += 1
+            if notification.attempts < MAX_ATTEMPTS:
+                self._requeue(notification)
+            else:
+                self.dropped += 1
+                logger.error(f"[Notify] Failed to send message to {notification.chat_id} after {notification.attempts} attempts: {e}")
+        except Exception as e:
+            self.dropped += 1
+            logger.error(f"[Notify] Failed to send message to {notification.chat_id}: {e}")
+        finally:
+            with self._lock:
+                self._inflight -= 1
+
+    async def _deliver(self, bot: ExtBot) -> None:
+        while not (self._stopping and not self.pending):
+            self._wakeup.clear()  # before looking, so an enqueue from now on wakes us up
+            batch, wait = self._next_batch()
+            if batch:
+                await asyncio.gather(*(self._send(bot, n) for n in batch))
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _pause(self, delay: float) -> None:
+        """Sleep `delay` seconds, or less once stop() is requested"""
+        deadline = time.monotonic() + delay
+        while not self._stopping and time.monotonic() < deadline:
+            await asyncio.sleep(min(IDLE_WAIT, deadline - time.monotonic()))
+
+    async def _run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        bot = self.bot or ExtBot(
+            self.token,
+            request=HTTPXRequest(connection_pool_size=self.batch_size),
+            rate_limiter=telegram_rate_limiter,
+        )
+        delay = RESTART_DELAY_MIN
+        try:
+            while not (self._stopping and not self.pending):
+                try:
+                    async with bot:
+                        delay = RESTART_DELAY_MIN
+                        await self._deliver(bot)
+                except Exception as e:
+                    if self._stopping:
+                        logger.error(f"[Notify] Notification sender stopped: {e}")
+                        with self._lock:
+                            self.dropped += self._queued
+                            self._chats.clear()
+                            self._queued = 0
+                        return
+                    logger.error(f"[Notify] Notification sender failed, restarting in {delay:.0f}s: {e}")
+                    await self._pause(delay)
+                    delay = min(delay * 2, RESTART_DELAY_MAX)
+        finally:
+            self._loop = None
+            self._wakeup = None
+
+
+# Process-wide outbox, started on the first `enqueue()` call
+outbox = NotificationOutbox()
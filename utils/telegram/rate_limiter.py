@@ -0,0 +1,132 @@
+"""
+Process-wide pacing of Telegram Bot API requests
+"""
+from __future__ import annotations
+
+import asyncio
+import enum
+import threading
+import time
+from datetime import timedelta
+from typing import Any
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from config import TELEGRAM_GLOBAL_RATE_LIMIT, TELEGRAM_CHAT_RATE_LIMIT, TELEGRAM_GROUP_RATE_LIMIT
+from utils.logger import logger
+from utils.rate_limiter import TokenBucket
+
+
+MAX_RETRIES = 2  # RetryAfter retries before the error reaches the caller
+MAX_TRACKED_CHATS = 10_000
+
+
+class Priority(enum.IntEnum):
+    INTERACTIVE = 0  # replies to the user who is waiting on the bot
+    BACKGROUND = 1  # notifications, broadcasts
+
+
+def retry_after_seconds(exc: RetryAfter) -> float:
+    """RetryAfter.retry_after is an int or a timedelta depending on PTB settings"""
+    retry_after = exc.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+def _is_group(chat_id: str) -> bool:
+    return chat_id.startswith(("-", "@"))
+
+
+class TelegramRateLimiter(BaseRateLimiter[dict]):
+    """Pace every Bot API request of this process, whichever bot, thread or event loop sends it.
+
+    - A request to a chat waits for a global slot (`global_rate` per second, no burst) and a
+      slot in that chat (`chat_rate` per second for users, `group_rate` for groups and channels).
+    - Interactive requests, the default, reserve their slots right away. Background requests
+      (`rate_limit_args={"priority": Priority.BACKGROUND}`) only take a global slot that is free
+      now, so a reply is never queued behind a burst of notifications.
+    - A RetryAfter pauses every request for the time Telegram asked; the request is then retried
+      up to MAX_RETRIES times before the error is raised. All waits are asyncio sleeps, so update
+      handlers waiting for a slot never block the event loop.
+    - Requests without a chat (getUpdates, answerCallbackQuery...) are not paced.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = TELEGRAM_GLOBAL_RATE_LIMIT,
+        chat_rate: float = TELEGRAM_CHAT_RATE_LIMIT,
+        group_rate: float = TELEGRAM_GROUP_RATE_LIMIT,
+        max_retries: int = MAX_RETRIES,
+    ) -> None:
+        self.global_bucket = TokenBucket(global_rate, 1)
+        self.chat_interval = 1.0 / chat_rate
+        self.group_interval = 1.0 / group_rate
+        self.max_retries = max_retries
+        self.retries = 0
+        self._next_slot: dict[str, float] = {}
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def _reserve_chat_slot(self, chat_id: str) -> float:
+        interval = self.group_interval if _is_group(chat_id) else self.chat_interval
+        with self._lock:
+            now = time.monotonic()
+            if len(self._next_slot) > MAX_TRACKED_CHATS:
+                self._next_slot = {c: t for c, t in self._next_slot.items() if t > now}
+            slot = max(now, self._next_slot.get(chat_id, 0.0))
+            self._next_slot[chat_id] = slot + interval
+            return slot - now
+
+    async def _wait_for_pause(self) -> None:
+        while (delay := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    async def _acquire(self, chat_id: str, priority: Priority) -> None:
+        delay = self._reserve_chat_slot(chat_id)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if priority == Priority.INTERACTIVE:
+            await self.global_bucket.acquire_async()
+            return
+        while (delay := self.global_bucket.try_reserve()) > 0:
+            await asyncio.sleep(delay)
+
+    async def process_request(
+        self,
+        callback,
+        args: Any,
+        kwargs: dict[str, Any],
+        endpoint: str,
+        data: dict[str, Any],
+        rate_limit_args: dict | None,
+    ):
+        chat_id = data.get("chat_id")
+        priority = (rate_limit_args or {}).get("priority", Priority.INTERACTIVE)
+        attempt = 0
+        while True:
+            await self._wait_for_pause()
+            if chat_id is not None:
+                await self._acquire(str(chat_id), priority)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                delay = retry_after_seconds(e)
+                with self._lock:
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                    self.retries += 1
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                logger.warning(f"[Telegram] Flood control on {endpoint}, retrying in {delay:.0f}s")
+
+
+# Shared by the bot application and the notification outbox
+telegram_rate_limiter = TelegramRateLimiter()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from services.deposit_service import DepositService
+from database.database import try_advisory_lock
+from blockchain.tron_client import get_now_block_number, get_blocks, get_block_transfers
+from workers.deposit_monitor import process_transfers
+from utils.logger import get_logger
+from config import DEPOSIT_MIN_CONFIRMATIONS, BLOCK_SCAN_MAX_BLOCKS_PER_RUN
+
+
+logger = get_logger(__name__)
+
+CURSOR_NAME = "deposit_blocks"
+BLOCKS_PER_CALL = 100  # getblockbylimitnext limit
+
+
+def follow_blocks():
+    """Detect deposits by reading every new confirmed block once.
+
+    Each TransferContract is matched against an in-memory map of our wallet
+    addresses, so the cost depends on chain throughput, not on the number of
+    wallets. The last processed block is persisted after every batch so a
+    restart resumes where it left off.
+    """
+    logger.info("[Worker] Following TRON blocks for deposits started.")
+    try:
+        with try_advisory_lock(CURSOR_NAME) as acquired:
+            if not acquired:
+                logger.info("[Deposit] Blocks are being followed by another worker, skipping")
+                return
+            _follow_blocks()
+    except Exception as e:
+        logger.error(f"[Deposit] Block follower error: {e}")
+
+
+def _follow_blocks():
+    safe_head = get_now_block_number() - DEPOSIT_MIN_CONFIRMATIONS
+    last_block = DepositService.get_chain_cursor(CURSOR_NAME)
+    if last_block is None:
+        # First run: start from the current confirmed head instead of replaying history
+        DepositService.save_chain_cursor(CURSOR_NAME, safe_head)
+        logger.info(f"[Deposit] Block cursor initialised at {safe_head}")
+        return
+    if last_block >= safe_head:
+        return
+
+    wallets_by_address = {wallet.address: wallet for wallet in DepositService.list_user_wallets()}
+    target = min(safe_head, last_block + BLOCK_SCAN_MAX_BLOCKS_PER_RUN)
+    transfers = 0
+
+    start = last_block + 1
+    while start <= target:
+        end = min(start + BLOCKS_PER_CALL, target + 1)
+        blocks = get_blocks(start, end)
+        if len(blocks) != end - start:
+            logger.warning(f"[Deposit] Node returned {len(blocks)}/{end - start} blocks from {start}, retrying next run")
+            break
+
+        matches = [
+            (wallets_by_address[tx['to']], tx)
+            for block in blocks
+            for tx in get_block_transfers(block)
+            if tx['to'] in wallets_by_address
+        ]
+        if matches:
+            transfers += len(matches)
+            process_transfers(matches)
+
+        DepositService.save_chain_cursor(CURSOR_NAME, end - 1)
+        start = end
+
+    logger.info(f"[Deposit] Blocks {last_block + 1}-{start - 1} processed ({transfers} deposits matched)")
+
+
+def run_block_follower():
+    try:
+        follow_blocks()
+    except Exception as exc:
+        logger.error(f"run_block_follower failed: {exc}")
@@ -1,19 +1,28 @@
 from __future__ import annotations
 
+import argparse
 import time
+from functools import partial
 from decimal import Decimal
 
 from bot.keyboards import transaction_details_inline_keyboard
 from services.deposit_service import DepositService
-from database.models import UserWallet, DepositStatus
+from database.database import try_advisory_lock
+from database.models import UserWallet, DepositStatus, TransactionStatus
 from utils.encryption import decrypt_text
-from blockchain.tron_client import get_trx_transactions, send_trx, get_main_wallet
+from blockchain.confirmation_tracker import DEFAULT_EXPIRATION, EXPIRATION_MARGIN, tracker
+from blockchain.tron_client import send_trx, get_main_wallet, is_successful_receipt, pool as tron_pool
 from utils.logger import get_logger
+from utils.helpers import get_utc_time
 from bot.utils import safe_notify_user
-from config import DEPOSIT_TO_MAIN_WALLET_RATE, TELEGRAM_ADMIN_ID
+from utils.telegram.outbox import NOTIFICATION_DRAIN_TIMEOUT, outbox
+from workers.deposit_scanner import DepositScanner, ScanCursor
+from config import (
+    DEPOSIT_TO_MAIN_WALLET_RATE, TELEGRAM_ADMIN_ID,
+    DEPOSIT_CHECK_INTERVAL, DEPOSIT_SHARD_COUNT, DEPOSIT_SHARDS,
+)
 from bot.messages import (
     msg_deposit_confirmed,
-    msg_deposit_failed,
     msg_deposit_forwarded,
     msg_deposit_forward_failed,
 )
@@ -40,15 +49,15 @@ def forward_deposit_to_main_wallet(wallet: UserWallet, amount: Decimal, deposit_
             logger.warning("[Deposit] Calculated amount to send to main wallet is zero, skipping.")
             return
         tx_id = send_trx(private_key, main_wallet_address, amount_to_send)
-        if tx_id:
-            logger.info(f"[Deposit] {amount_to_send} TRX sent to main wallet {main_wallet_address} (tx {tx_id})")
-            # Create admin transaction log for this forward
-            try:
-                DepositService.create_admin_forward_transaction(amount_to_send, deposit_tx_id, tx_id)
-            except Exception as _log_err:
-                logger.warning(f"[Deposit] Failed to create admin forward transaction: {_log_err}")
-            msg = msg_deposit_forwarded(amount_to_send, deposit_tx_id, tx_id)
-            safe_notify_user(TELEGRAM_ADMIN_ID, msg, reply_markup=transaction_details_inline_keyboard(tx_id))
+        logger.info(f"[Deposit] {amount_to_send} TRX sent to main wallet {main_wallet_address} (tx {tx_id}), awaiting confirmation")
+        # Create admin transaction log for this forward, resolved by the confirmation tracker
+        try:
+            DepositService.create_admin_forward_transaction(
+                amount_to_send, deposit_tx_id, tx_id, status=TransactionStatus.pending
+            )
+        except Exception as _log_err:
+            logger.warning(f"[Deposit] Failed to create admin forward transaction: {_log_err}")
+        tracker.track(tx_id, partial(_on_forward_receipt, amount_to_send, deposit_tx_id))
 
     except Exception as e:
         logger.error(f"[Deposit] Error forwarding deposit to main wallet: {e}")
@@ -59,52 +68,146 @@ def forward_deposit_to_main_wallet(wallet: UserWallet, amount: Decimal, deposit_
             pass
 
 
-def monitor_deposits():
-    logger.info("[Worker] Monitoring TRON deposits started.")
-    call_count = 0
+def _on_forward_receipt(amount: Decimal, deposit_tx_id: str, tx_id: str, receipt: dict | None) -> None:
+    """Confirmation tracker callback for a forward to the main wallet."""
+    if receipt is not None and is_successful_receipt(receipt):
+        DepositService.set_forward_transaction_status(tx_id, TransactionStatus.completed)
+        logger.info(f"[Deposit] Forward {tx_id} of {amount} TRX confirmed")
+        msg = msg_deposit_forwarded(amount, deposit_tx_id, tx_id)
+        safe_notify_user(TELEGRAM_ADMIN_ID, msg, reply_markup=transaction_details_inline_keyboard(tx_id))
+        return
+    reason = "transaction expired" if receipt is None else (receipt.get("resMessage") or "transaction failed on chain")
+    DepositService.set_forward_transaction_status(tx_id, TransactionStatus.failed, reason)
+    logger.error(f"[Deposit] Forward {tx_id} of {amount} TRX failed: {reason}")
+    safe_notify_user(TELEGRAM_ADMIN_ID, msg_deposit_forward_failed(amount, deposit_tx_id, reason))
+
+
+def process_transfers(transfers: list[tuple[UserWallet, dict]]) -> None:
+    """Persist new deposits from a scan window, credit users and forward funds.
+
+    Known tx hashes are filtered with one batched lookup and the new deposits are
+    bulk-inserted (duplicates skipped by the database), instead of two queries per tx.
+    Confirmed deposits are credited in the same commit as their insert, so a failure
+    leaves the whole window unrecorded and the next scan picks it up again.
+    """
     try:
-        wallets = DepositService.list_user_wallets()
-        for wallet in wallets:
-            call_count += 1
-            if call_count % 10 == 0:  # Every 10th call
-                time.sleep(1.2)  # Sleep for 1.2 seconds
-            txs = get_trx_transactions(wallet.address)
-            for tx in txs:
-                tx_id = tx['txID']
-                exists = DepositService.get_deposit_by_tx_hash(tx_id)
-                if not exists:
-                    amount = Decimal(tx['amount']) / Decimal('1000000')
-                    confirmations = tx.get('confirmations', 0)
-                    deposit = DepositService.create_deposit_if_new(
-                        user_id=wallet.user_id,
-                        wallet_id=wallet.id,
-                        tx_hash=tx_id,
-                        amount_trx=amount,
-                        confirmations=confirmations,
-                    )
-                    if deposit.status == DepositStatus.confirmed:
-                        user = DepositService.get_user_by_id(wallet.user_id)
-                        if user:
-                            DepositService.credit_user_balance_and_log_tx(user.id, amount, deposit.id, tx_id)
-                            logger.info(f"[Deposit] {amount} TRX credited to user {user.id} (tx {tx_id})")
-                            # Telegram notification
-                            msg = msg_deposit_confirmed(amount, tx_id)
-                            safe_notify_user(user.telegram_id, msg, reply_markup=transaction_details_inline_keyboard(tx_id))
-
-                            forward_deposit_to_main_wallet(wallet, amount, tx_id)
+        existing = DepositService.find_existing_tx_hashes(tx['txID'] for _, tx in transfers)
+        candidates = {}
+        for wallet, tx in transfers:
+            if tx['txID'] not in existing:
+                candidates.setdefault(tx['txID'], (wallet, tx))
+        if not candidates:
+            return
+
+        deposits = DepositService.record_deposits_bulk([
+            {
+                'user_id': wallet.user_id,
+                'wallet_id': wallet.id,
+                'tx_hash': tx_id,
+                'amount_trx': Decimal(tx['amount']) / Decimal('1000000'),
+                'confirmations': tx.get('confirmations', 0),
+            }
+            for tx_id, (wallet, tx) in candidates.items()
+        ])
     except Exception as e:
+        # Nothing was recorded: the cursor stays put and the next scan retries the window
         logger.error(f"[Deposit] Error: {e}")
+        raise
+
+    for deposit in deposits:
+        if deposit.status != DepositStatus.confirmed:
+            continue
+        wallet, _ = candidates[deposit.tx_hash]
+        tx_id = deposit.tx_hash
+        amount = Decimal(deposit.amount_trx)
+        logger.info(f"[Deposit] {amount} TRX credited to user {deposit.user_id} (tx {tx_id})")
         try:
-            # best-effort notification if we have context
-            if 'user' in locals() and 'amount' in locals():
-                msg = msg_deposit_failed(amount, str(e))
-                safe_notify_user(user.telegram_id, msg)
-        except Exception:
-            pass
+            user = DepositService.get_user_by_id(wallet.user_id)
+            if user:
+                # Telegram notification
+                msg = msg_deposit_confirmed(amount, tx_id)
+                safe_notify_user(user.telegram_id, msg, reply_markup=transaction_details_inline_keyboard(tx_id))
+
+                forward_deposit_to_main_wallet(wallet, amount, tx_id)
+        except Exception as e:
+            # Already credited: a failed notification or forward must not stop the others
+            logger.error(f"[Deposit] Error after crediting tx {tx_id}: {e}")
+
+
+def process_wallet_transactions(wallet: UserWallet, txs: list[dict]) -> None:
+    """Persist new deposits found for a single wallet."""
+    process_transfers([(wallet, tx) for tx in txs])
+
 
+def process_and_advance_cursor(wallet: UserWallet, txs: list[dict], cursor: ScanCursor) -> None:
+    """Handle a wallet's new transfers, then move its scan cursor past every fetched transaction."""
+    if txs:
+        process_wallet_transactions(wallet, txs)
+    last_timestamp, boundary = cursor
+    if last_timestamp is not None:
+        DepositService.save_wallet_scan_cursor(wallet.id, last_timestamp, boundary, deposit=bool(txs))
 
-def run_deposit_monitor():
+
+def shard_lock_name(shard: int | None, shard_count: int) -> str:
+    return "deposit_monitor" if shard is None else f"deposit_monitor:{shard}/{shard_count}"
+
+
+def monitor_deposits(shard: int | None = None, shard_count: int = DEPOSIT_SHARD_COUNT):
+    """Scan the due wallets of one shard (or all of them when `shard` is None).
+
+    Hot wallets (deposit panel opened or deposit received recently) are polled every
+    cycle; dormant ones are skipped until their backoff expires.
+
+    The shard is guarded by a PostgreSQL advisory lock: if another process or host
+    is already scanning it, this run is skipped.
+    """
+    label = "[Deposit]" if shard is None else f"[Deposit][shard {shard}/{shard_count}]"
+    logger.info(f"[Worker] Monitoring TRON deposits started{'' if shard is None else f' (shard {shard}/{shard_count})'}.")
+    try:
+        with try_advisory_lock(shard_lock_name(shard, shard_count)) as acquired:
+            if not acquired:
+                logger.info(f"{label} Shard is being scanned by another worker, skipping")
+                return
+            now = get_utc_time()
+            wallets = DepositService.list_wallets_due(shard, shard_count, now)
+            cursors = DepositService.get_wallet_scan_cursors(shard, shard_count)
+            stats = DepositScanner().run(wallets, process_and_advance_cursor, cursors)
+            DepositService.record_idle_polls(stats.idle_wallet_ids, now)
+            logger.info(
+                f"{label} Scanned {stats.wallets} due wallets in {stats.elapsed:.1f}s "
+                f"({stats.wallets_per_second:.1f} wallets/s, {stats.failed} failed, {stats.transactions} transfers)"
+            )
+            logger.info(f"{label} TRON API rates: {tron_pool.describe_rates()}")
+    except Exception as e:
+        logger.error(f"{label} Error: {e}")
+
+
+def run_deposit_monitor(shard: int | None = None, shard_count: int = DEPOSIT_SHARD_COUNT):
     try:
-        monitor_deposits()
+        monitor_deposits(shard, shard_count)
     except Exception as exc:
-        logger.error(f"run_deposit_monitor failed: {exc}")
\ No newline at end of file
+        logger.error(f"run_deposit_monitor failed: {exc}")
+
+
+def main() -> None:
+    """Run deposit monitoring for some shards in a standalone process (one per core or host)."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--shard", type=int, action="append", help="shard to scan (repeatable, default: DEPOSIT_SHARDS or all)")
+    parser.add_argument("--shard-count", type=int, default=DEPOSIT_SHARD_COUNT)
+    parser.add_argument("--once", action="store_true", help="scan once and exit")
+    args = parser.parse_args()
+
+    shards = args.shard or DEPOSIT_SHARDS or list(range(args.shard_count))
+    while True:
+        for shard in shards:
+            run_deposit_monitor(shard, args.shard_count)
+        if args.once:
+            # Let pending forwards resolve before the process (and its tracker and outbox threads) exit
+            tracker.drain((DEFAULT_EXPIRATION + EXPIRATION_MARGIN).total_seconds())
+            outbox.drain(NOTIFICATION_DRAIN_TIMEOUT)
+            break
+        time.sleep(DEPOSIT_CHECK_INTERVAL * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import timezone
+from typing import TYPE_CHECKING, Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from blockchain.provider_pool import ProviderPool
+from blockchain.tron_client import get_trx_transactions_async, pool as default_pool
+from config import DEPOSIT_SCAN_CONCURRENCY
+from utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from database.models import UserWallet
+
+
+logger = get_logger(__name__)
+
+ScanCursor = Tuple[Optional[int], FrozenSet[str]]  # (last_timestamp, txIDs processed at last_timestamp)
+WalletResultHandler = Callable[["UserWallet", list[dict], ScanCursor], None]
+
+
+def _wallet_start_timestamp(wallet: "UserWallet") -> Optional[int]:
+    """No deposit can predate the wallet, so unscanned wallets start at its creation."""
+    created_at = getattr(wallet, "created_at", None)
+    if created_at is None:
+        return None
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return int(created_at.timestamp() * 1000)
+
+
+@dataclass
+class ScanStats:
+    wallets: int = 0
+    failed: int = 0
+    transactions: int = 0
+    elapsed: float = 0.0
+    idle_wallet_ids: list[int] = field(default_factory=list)  # polled successfully, nothing new
+
+    @property
+    def wallets_per_second(self) -> float:
+        return self.wallets / self.elapsed if self.elapsed else 0.0
+
+
+class DepositScanner:
+    """Fetch incoming TRX transfers for many wallets concurrently.
+
+    - `concurrency` workers share one pooled HTTP session and pull wallets from a single iterator.
+    - Requests are routed through the provider pool, so endpoint quotas and failover apply.
+    - `on_result(wallet, txs, cursor)` runs in a thread for each wallet that returned new
+      transactions, so blocking DB work never stalls the event loop. `txs` are its new TRX
+      transfers (possibly none) and `cursor` the timestamp and txIDs of the newest transactions
+      fetched, of any type, which the wallet's cursor moves to.
+    - With `cursors`, only transactions from each wallet's cursor timestamp on are fetched, and
+      the ones already processed at that timestamp are dropped, so idle wallets cost no DB work.
+      Other incoming transactions (TRC10/TRC20 spam, other contracts) advance the cursor too:
+      they are not fetched again on every poll.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEPOSIT_SCAN_CONCURRENCY,
+        pool: Optional[ProviderPool] = None,
+    ) -> None:
+        self.concurrency = max(1, int(concurrency))
+        self.pool = pool or default_pool
+
+    async def scan(
+        self,
+        wallets: Iterable["UserWallet"],
+        on_result: WalletResultHandler,
+        cursors: Optional[Dict[int, ScanCursor]] = None,
+    ) -> ScanStats:
+        stats = ScanStats()
+        pending = iter(wallets)
+        started = time.perf_counter()
+
+        async with self.pool.async_session(max_connections=self.concurrency) as session:
+
+            async def _worker() -> None:
+                # Workers share one iterator, so at most `concurrency` wallets are in flight
+                for wallet in pending:
+                    min_timestamp, seen = None, frozenset()
+                    if cursors is not None:
+                        min_timestamp, seen = cursors.get(wallet.id, (None, frozenset()))
+                        if min_timestamp is None:
+                            min_timestamp = _wallet_start_timestamp(wallet) or 0
+                    window = await get_trx_transactions_async(session, wallet.address, min_timestamp)
+                    stats.wallets += 1
+                    if window is None:
+                        stats.failed += 1
+                        continue
+                    # min_timestamp is inclusive: drop the transactions of that block handled last time
+                    txs = [tx for tx in window.transfers if tx['txID'] not in seen]
+                    advanced = window.last_timestamp is not None and (
+                        window.last_timestamp != min_timestamp or not window.boundary_tx_ids <= seen
+                    )
+                    if not txs:
+                        stats.idle_wallet_ids.append(wallet.id)
+                        if not advanced:
+                            continue
+                    stats.transactions += len(txs)
+                    cursor = (window.last_timestamp, frozenset(window.boundary_tx_ids))
+                    try:
+                        await asyncio.to_thread(on_result, wallet, txs, cursor)
+                    except Exception as e:
+                        logger.error(f"[Deposit] Error handling wallet {wallet.address}: {e}")
+
+            await asyncio.gather(*(_worker() for _ in range(self.concurrency)))
+
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+    def run(
+        self,
+        wallets: Iterable["UserWallet"],
+        on_result: WalletResultHandler,
+        cursors: Optional[Dict[int, ScanCursor]] = None,
+    ) -> ScanStats:
+        """Blocking entry point for scheduler threads."""
+        return asyncio.run(self.scan(wallets, on_result, cursors))
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from blockchain.tron_client import build_signed_trx, broadcast_transaction
+from config import (
+    TRON_PRIVATE_KEY,
+    WITHDRAWAL_BROADCAST_CONCURRENCY,
+    WITHDRAWAL_TX_EXPIRATION_SECONDS,
+)
+from tronpy.tron import Transaction
+
+
+K = TypeVar("K", bound=Hashable)
+R = TypeVar("R")
+
+
+class WithdrawalBroadcaster:
+    """Send many TRX transfers without waiting for each one to confirm.
+
+    The caller drives the phases and persists state in between:
+    1. `sign()` builds and signs every transfer up front (txids are known before anything is sent).
+    2. `broadcast()` pushes the signed transactions concurrently through a bounded pool.
+    3. Confirmation is left to `blockchain.confirmation_tracker`, so nothing waits for a block here.
+
+    TRON transactions carry no account nonce, so transfers from the same wallet can be
+    broadcast in parallel and in any order.
+    """
+
+    def __init__(
+        self,
+        private_key_hex: str = TRON_PRIVATE_KEY,
+        concurrency: int = WITHDRAWAL_BROADCAST_CONCURRENCY,
+        expiration_seconds: int = WITHDRAWAL_TX_EXPIRATION_SECONDS,
+    ) -> None:
+        self.private_key_hex = private_key_hex
+        self.concurrency = max(1, int(concurrency))
+        self.expiration_seconds = expiration_seconds
+
+    def _map(self, fn: Callable[..., R], items: Dict[K, tuple]) -> Dict[K, R | Exception]:
+        """Run fn(*args) for every item on the bounded pool; exceptions are returned, not raised"""
+        def _safe(args):
+            try:
+                return fn(*args)
+            except Exception as exc:
+                return exc
+
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, max(1, len(items)))) as executor:
+            return dict(zip(items, executor.map(_safe, items.values())))
+
+    def sign(self, transfers: Dict[K, Tuple[str, Decimal]]) -> Dict[K, Transaction | Exception]:
+        """{key: (to_address, amount)} -> {key: signed transaction or the error that prevented it}"""
+        return self._map(
+            lambda to_address, amount: build_signed_trx(
+                self.private_key_hex, to_address, amount, self.expiration_seconds
+            ),
+            transfers,
+        )
+
+    def broadcast(self, signed: Dict[K, dict]) -> Dict[K, Optional[Exception]]:
+        """{key: signed transaction JSON} -> {key: None if accepted, else the error}"""
+        results = self._map(broadcast_transaction, {key: (txn,) for key, txn in signed.items()})
+        return {key: result if isinstance(result, Exception) else None for key, result in results.items()}
+
+
+def expiration_of(txn: Transaction) -> int:
+    """Expiration of a signed transaction, in ms since epoch"""
+    return txn.to_json()["raw_data"]["expiration"]
+
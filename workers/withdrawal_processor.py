@@ -1,62 +1,287 @@
 from __future__ import annotations
 
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
+from typing import Dict, Tuple
 
 from bot.keyboards import transaction_details_inline_keyboard
 from modules.withdrawal.instances import withdrawal_service
-from blockchain.tron_client import send_trx
+from modules.withdrawal.service import Settlement, WithdrawalService
+from database.models import WithdrawalStatus
+from blockchain.confirmation_tracker import EXPIRATION_MARGIN, tracker
+from blockchain.provider_pool import NoEndpointAvailable
+from blockchain.tron_client import is_successful_receipt
+from workers.withdrawal_broadcaster import WithdrawalBroadcaster
+from utils.helpers import get_utc_time
 from utils.logger import get_logger
 from bot.utils import safe_notify_user
+from utils.telegram.outbox import NOTIFICATION_DRAIN_TIMEOUT, outbox
 from bot.messages import (
     msg_withdrawal_processed,
     msg_withdrawal_failed,
     msg_withdrawal_failed_insufficient_balance,
 )
-from config import TRON_PRIVATE_KEY
+from config import (
+    WITHDRAWAL_CLAIM_BATCH_SIZE,
+    WITHDRAWAL_CLAIM_LEASE_SECONDS,
+    WITHDRAWAL_PROCESS_INTERVAL,
+    WITHDRAWAL_TX_EXPIRATION_SECONDS,
+)
 
 
 logger = get_logger(__name__)
 
+# Identifies this process in the claimed_by column
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# A recovered transaction is only re-broadcast if it stays valid at least this long
+REBROADCAST_MARGIN = timedelta(seconds=30)
+
+# Tracker callbacks run on the tracker thread, so they get a session of their own
+settlement_service = WithdrawalService()
+
+# Receipts resolved during the current tracker round, settled together at the end of it
+_settlements: Dict[int, Tuple[Settlement, "_Payout"]] = {}
+_settlements_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class _Payout:
+    """What a settlement needs, copied out of the ORM objects before leaving this thread"""
+    withdrawal_id: int
+    user_id: int
+    telegram_id: str
+    amount_trx: Decimal
+    to_address: str
+
+    @classmethod
+    def of(cls, wd, user) -> "_Payout":
+        return cls(wd.id, user.id, user.telegram_id, Decimal(wd.amount_trx), wd.to_address)
+
+
+def _notify_completed(payout: _Payout, tx_hash: str) -> None:
+    logger.info(f"[Withdrawal] {payout.amount_trx} TRX sent to {payout.to_address} (user {payout.user_id}, tx {tx_hash})")
+    msg = msg_withdrawal_processed(payout.amount_trx, tx_hash)
+    safe_notify_user(payout.telegram_id, msg, reply_markup=transaction_details_inline_keyboard(tx_hash))
+
+
+def _notify_failed(payout: _Payout, reason: str, tx_hash: str | None = None) -> None:
+    logger.error(f"[Withdrawal] TRX send error for withdrawal {payout.withdrawal_id}: {reason}")
+    safe_notify_user(payout.telegram_id, msg_withdrawal_failed(payout.amount_trx, reason, tx_hash))
+
+
+def _fail(payout: _Payout, reason: str, tx_hash: str | None = None) -> None:
+    if withdrawal_service.fail_withdrawal(payout.withdrawal_id, payout.user_id, reason, tx_hash, WORKER_ID):
+        _notify_failed(payout, reason, tx_hash)
+
+
+def _can_rebroadcast(wd) -> bool:
+    if not wd.signed_tx or wd.tx_expires_at is None:
+        return False
+    expires_at = wd.tx_expires_at
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return get_utc_time() + REBROADCAST_MARGIN < expires_at
+
+
+def _flush_settlements() -> None:
+    """Settle every withdrawal resolved in this tracker round with one commit, then notify"""
+    with _settlements_lock:
+        batch = dict(_settlements)
+        _settlements.clear()
+    if not batch:
+        return
+    settled = settlement_service.settle_withdrawals(
+        {wd_id: outcome for wd_id, (outcome, _) in batch.items()}, WORKER_ID
+    )
+    for wd_id in batch.keys() - settled.keys():
+        logger.info(f"[Withdrawal] Withdrawal {wd_id} already settled or taken over by another worker, skipping")
+    for wd_id, status in settled.items():
+        outcome, payout = batch[wd_id]
+        if status == WithdrawalStatus.completed:
+            _notify_completed(payout, outcome.tx_hash)
+        else:
+            _notify_failed(payout, outcome.failure, outcome.tx_hash)
+
+
+def _track(payout: _Payout, txid: str, expires_at: datetime | None, rejection: str | None = None) -> None:
+    """Hand a broadcast withdrawal to the confirmation tracker, which settles it later.
 
-def process_withdrawals():
+    A transaction that expires without reaching the chain is rebuilt, unless a node rejected
+    its broadcast (`rejection`): the withdrawal then fails with that reason and is refunded.
+    """
+    def _on_receipt(txid: str, receipt: dict | None) -> None:
+        if receipt is None:
+            if rejection is None:
+                if settlement_service.reset_withdrawal(payout.withdrawal_id, txid, WORKER_ID):
+                    logger.warning(f"[Withdrawal] Transaction {txid} of withdrawal {payout.withdrawal_id} expired unsent, rebuilding")
+                return
+            logger.warning(f"[Withdrawal] Rejected transaction {txid} of withdrawal {payout.withdrawal_id} expired unsent, refunding")
+            outcome = Settlement(txid, failure=rejection)
+        elif is_successful_receipt(receipt):
+            outcome = Settlement(txid)
+        else:
+            outcome = Settlement(txid, failure=receipt.get("resMessage") or "transaction failed on chain")
+        with _settlements_lock:
+            _settlements[payout.withdrawal_id] = (outcome, payout)
+
+    tracker.track(txid, _on_receipt, expires_at, after_round=_flush_settlements)
+
+
+def _process_batch(broadcaster: WithdrawalBroadcaster, abandoned: list, pending: list, users: dict) -> Counter:
+    """Sign, save and broadcast one batch of claimed withdrawals, then hand them to the tracker"""
+    counts = Counter()
+    withdrawals = {}
+    users.update(withdrawal_service.get_users_by_ids(
+        wd.user_id for wd in (*abandoned, *pending) if wd.user_id not in users
+    ))
+
+    def _user(wd):
+        return users.get(wd.user_id)
+
+    # Recovery: signed withdrawals whose owner stopped tracking them (crash, restart)
+    to_broadcast = {}
+    expirations = {}
+    for wd in abandoned:
+        if tracker.is_tracking(wd.tx_hash):
+            continue
+        withdrawals[wd.id] = wd
+        expirations[wd.id] = wd.tx_expires_at
+        counts["recovered"] += 1
+        if _can_rebroadcast(wd):
+            to_broadcast[wd.id] = json.loads(wd.signed_tx)
+        else:
+            _track(_Payout.of(wd, _user(wd)), wd.tx_hash, wd.tx_expires_at)
+
+    # Phase 1: validate and sign every claimed withdrawal up front
+    transfers = {}
+    for wd in pending:
+        withdrawals[wd.id] = wd
+        user = _user(wd)
+        if user and user.account_balance >= Decimal(wd.amount_trx):
+            amount_to_send = withdrawal_service.calculate_net_amount(Decimal(wd.amount_trx)).quantize(Decimal('0.000001'))
+            transfers[wd.id] = (wd.to_address, amount_to_send)
+        else:
+            if not withdrawal_service.fail_withdrawal(wd.id, user.id, "insufficient balance", worker_id=WORKER_ID):
+                continue
+            logger.error(f"[Withdrawal] Insufficient balance for user {user.id if user else 'unknown'}")
+            msg = msg_withdrawal_failed_insufficient_balance(Decimal(wd.amount_trx))
+            if user:
+                safe_notify_user(user.telegram_id, msg)
+
+    signed = {}
+    for wd_id, txn in broadcaster.sign(transfers).items():
+        if isinstance(txn, NoEndpointAvailable):
+            withdrawal_service.reset_withdrawal(wd_id, None, WORKER_ID)
+            logger.warning(f"[Withdrawal] Could not sign withdrawal {wd_id}, retrying next run: {txn}")
+            continue
+        if isinstance(txn, Exception):
+            _fail(_Payout.of(withdrawals[wd_id], _user(withdrawals[wd_id])), str(txn))
+            continue
+        signed[wd_id] = txn.to_json()
+        expirations[wd_id] = datetime.fromtimestamp(signed[wd_id]["raw_data"]["expiration"] / 1000, tz=timezone.utc)
+    counts["signed"] += len(signed)
+    to_broadcast.update(signed)
+    # Saved before broadcasting; this also extends every lease until the transaction expires.
+    # A withdrawal another worker took over meanwhile (our lease lapsed) is left to that worker.
+    saved = withdrawal_service.mark_withdrawals_signed(
+        {wd_id: (txn["txID"], json.dumps(txn), expirations[wd_id]) for wd_id, txn in to_broadcast.items()},
+        WORKER_ID,
+        lease_margin=EXPIRATION_MARGIN,
+    )
+    for wd_id in to_broadcast.keys() - saved:
+        logger.warning(f"[Withdrawal] Withdrawal {wd_id} was taken over by another worker, not broadcasting")
+    to_broadcast = {wd_id: txn for wd_id, txn in to_broadcast.items() if wd_id in saved}
+
+    # Phase 2: broadcast concurrently and hand every sent transaction to the tracker
+    for wd_id, error in broadcaster.broadcast(to_broadcast).items():
+        wd = withdrawals[wd_id]
+        payout = _Payout.of(wd, _user(wd))
+        txid = to_broadcast[wd_id]["txID"]
+        if error is None:
+            counts["broadcast"] += 1
+            _track(payout, txid, expirations[wd_id])
+        elif isinstance(error, NoEndpointAvailable):
+            # Unknown outcome: the tracker finds it on chain or resets it once expired
+            logger.warning(f"[Withdrawal] Broadcast of withdrawal {wd_id} not confirmed by any node: {error}")
+            _track(payout, txid, expirations[wd_id])
+        else:
+            # After a failover an earlier endpoint may already have accepted and relayed it:
+            # refund only once the transaction has expired without reaching the chain
+            logger.warning(f"[Withdrawal] Broadcast of withdrawal {wd_id} rejected, refunding if it expires unsent: {error}")
+            _track(payout, txid, expirations[wd_id], rejection=str(error))
+    return counts
+
+
+def process_withdrawals(batch_size: int = WITHDRAWAL_CLAIM_BATCH_SIZE):
+    """Send withdrawals in claimed batches: sign all, broadcast concurrently, let the tracker confirm.
+
+    Each batch is claimed with FOR UPDATE SKIP LOCKED and leased to this worker, so several
+    processors (threads, processes or hosts) can run at once without paying twice. Every later
+    write (signing, reset, settlement) only applies while this worker still holds the claim and,
+    once signed, to the transaction the withdrawal carries: a slow worker whose lease lapsed and
+    was taken over drops its outcomes instead of racing the new owner.
+    Each signed transaction is saved (status processing, tx_hash) before it is broadcast,
+    and its lease then lasts until the transaction expires. A worker that dies leaves its
+    leases to expire: unsigned rows are claimed again as pending, signed ones are re-broadcast
+    while still valid and tracked again. The tracker settles them, or puts them back to pending
+    once their transaction has expired without reaching the chain. A broadcast rejected by a
+    node is tracked as well (another node may have accepted it before a failover) and only
+    refunded once its transaction has expired unsent.
+    """
     logger.info("[Worker] Processing pending withdrawals started.")
+    broadcaster = WithdrawalBroadcaster()
+    lease = timedelta(seconds=WITHDRAWAL_CLAIM_LEASE_SECONDS)
+    totals = Counter()
+    users = {}
     try:
-        withdrawals = withdrawal_service.list_pending_withdrawals()
-        for wd in withdrawals:
-            user = withdrawal_service.get_user_by_id(wd.user_id)
-            if user and user.account_balance >= Decimal(wd.amount_trx):
-                tx_hash = None
-                try:
-                    amount_to_send = withdrawal_service.calculate_net_amount(Decimal(wd.amount_trx)).quantize(Decimal('0.000001'))
-                    tx_hash = send_trx(TRON_PRIVATE_KEY, wd.to_address, amount_to_send)
-                    withdrawal_service.complete_withdrawal(user.id, wd.id, Decimal(wd.amount_trx), tx_hash)
-                    logger.info(f"[Withdrawal] {wd.amount_trx} TRX({amount_to_send} TRX) sent to {wd.to_address} (user {user.id}, tx {tx_hash})")
-                    # Telegram notification
-                    msg = msg_withdrawal_processed(Decimal(wd.amount_trx), tx_hash)
-                    safe_notify_user(user.telegram_id, msg, reply_markup=transaction_details_inline_keyboard(tx_hash))
-                except Exception as e:
-                    withdrawal_service.fail_withdrawal(wd.id, user.id, str(e), tx_hash)
-                    logger.error(f"[Withdrawal] TRX send error: {e}")
-                    msg = msg_withdrawal_failed(Decimal(wd.amount_trx), str(e), tx_hash)
-                    safe_notify_user(user.telegram_id, msg)
-            else:
-                withdrawal_service.fail_withdrawal(wd.id, user.id, "insufficient balance")
-                logger.error(f"[Withdrawal] Insufficient balance for user {user.id if user else 'unknown'}")
-                msg = msg_withdrawal_failed_insufficient_balance(Decimal(wd.amount_trx))
-                if user:
-                    safe_notify_user(user.telegram_id, msg)
+        while True:
+            abandoned = withdrawal_service.claim_abandoned_withdrawals(WORKER_ID, batch_size, lease)
+            pending = withdrawal_service.claim_pending_withdrawals(WORKER_ID, batch_size, lease)
+            if not abandoned and not pending:
+                break
+            totals += _process_batch(broadcaster, abandoned, pending, users)
+            if len(abandoned) < batch_size and len(pending) < batch_size:
+                break
     except Exception as e:
         logger.error(f"[Withdrawal] Error: {e}")
-        try:
-            if 'wd' in locals() and 'user' in locals() and user:
-                msg = msg_withdrawal_failed(Decimal(wd.amount_trx), str(e))
-                safe_notify_user(user.telegram_id, msg)
-        except Exception:
-            pass
+    logger.info(
+        f"[Withdrawal] {totals['recovered']} recovered, {totals['signed']} signed, {totals['broadcast']} broadcast, "
+        f"{tracker.pending} awaiting confirmation"
+    )
 
 
 def run_withdrawal_processor():
     try:
         process_withdrawals()
     except Exception as exc:
-        logger.error(f"run_withdrawal_processor failed: {exc}")
\ No newline at end of file
+        logger.error(f"run_withdrawal_processor failed: {exc}")
+
+
+def main() -> None:
+    """Run a withdrawal processor in a standalone process (any number can run side by side)."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--batch-size", type=int, default=WITHDRAWAL_CLAIM_BATCH_SIZE)
+    parser.add_argument("--once", action="store_true", help="process once and exit")
+    args = parser.parse_args()
+
+    while True:
+        process_withdrawals(args.batch_size)
+        if args.once:
+            # Let the broadcast transactions settle before the process (and its tracker and outbox threads) exit
+            tracker.drain((EXPIRATION_MARGIN + timedelta(seconds=WITHDRAWAL_TX_EXPIRATION_SECONDS)).total_seconds())
+            outbox.drain(NOTIFICATION_DRAIN_TIMEOUT)
+            break
+        time.sleep(WITHDRAWAL_PROCESS_INTERVAL * 60)
+
+
+if __name__ == "__main__":
+    main()